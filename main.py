@@ -1,5 +1,6 @@
 # main.py — Ejecuta scraping, procesamiento y análisis para Messi y Lamine Yamal
 
+import argparse
 import sys
 from pathlib import Path
 
@@ -18,58 +19,77 @@ sys.path.append(str(src_path))
 # 📦 IMPORTACIÓN DE FUNCIONES PRINCIPALES
 # -----------------------------------------------
 
-# Scraping: obtener datos crudos desde la web
-from scraping import scrape_messi_data, scrape_lamine_data
-
-# Procesamiento: limpiar, normalizar y enriquecer los datos
-from processing import process_data, process_lamine_data
-
-# Análisis: generar métricas, visualizaciones y gráficos
-from analysis import run_analysis, run_analysis_lamine
+# Grafo de etapas: scraping, procesamiento, análisis y gráficos de cada jugador (con caché y en paralelo).
+# Cada etapa importa sus módulos (pandas, requests, matplotlib, SQLAlchemy...) solo cuando se ejecuta.
+from pipeline import add_arguments, run_from_args
+
+# Subcomandos: (ayuda, etapas que ejecutan; {id} = cada jugador). Sin subcomando se ejecuta 'all'.
+COMMANDS = {
+    "scrape": ("Descargar los CSV crudos", ["scrape:{id}"]),
+    "process": ("Limpiar y transformar los datos crudos", ["process:{id}", "combine"]),
+    "analyze": ("Resumen numérico y gráficos", ["analyze:{id}"]),
+    "load-db": ("Cargar los datasets limpios en la base de datos", ["load-db:{id}"]),
+    "export": ("Exportar particiones por temporada y resúmenes para Power BI", ["export"]),
+    "stats": ("Contrastes de hipótesis por bootstrap y permutación", ["stats"]),
+    "all": ("Flujo completo y dashboard de Power BI", None),
+}
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Flujo completo: scraping, procesamiento y análisis")
+    subparsers = parser.add_subparsers(dest="command", metavar="{" + ",".join(COMMANDS) + "}")
+    for name, (help_text, _) in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=help_text, description=help_text)
+        sub.add_argument("players", nargs="*", help="Ids de config/players.json (todos por defecto)")
+        add_arguments(sub)
+        if name == "all":
+            sub.add_argument("--no-dashboard", action="store_true", help="No abrir el dashboard de Power BI al terminar")
+    return parser
+
+def parse_args(argv):
+    # Compatibilidad: 'python main.py --replay' equivale a 'python main.py all --replay'
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["all"] + argv
+    args = build_parser().parse_args(argv)
+
+    stages = COMMANDS[args.command][1]
+    if args.command == "load-db":
+        args.db = True
+    if stages and not args.only and not args.start:
+        ids = args.players or ["*"]
+        # combine une todos los jugadores: con una lista de jugadores solo se procesan esos
+        args.only = [s.format(id=i) for s in stages for i in ids if "{id}" in s or not args.players]
+    elif args.players and not args.only:
+        args.only = [f"*:{i}" for i in args.players]
+    return args
 
 # -----------------------------------------------
 # ▶️ EJECUCIÓN DEL FLUJO COMPLETO
 # -----------------------------------------------
 
 if __name__ == "__main__":
-    # Paso 1: Scrapeo de datos desde webs externas
-    print("🚀 Iniciando scraping...")
-    scrape_messi_data()
-    scrape_lamine_data()
-
-    # Paso 2: Procesamiento y limpieza de datos
-    print("\n🧹 Procesando datos...")
-    df_messi = process_data(return_df=True, decimal=",")
-    df_lamine = process_lamine_data(return_df=True, decimal=",")
+    args = parse_args(sys.argv[1:])
 
-    # Paso 3: Análisis y visualización de resultados
-    print("\n📊 Análisis Messi:")
-    run_analysis(df_messi)
-
-    print("\n📊 Análisis Lamine Yamal:")
-    run_analysis_lamine(df_lamine)
+    # Pasos: scraping → procesamiento → (base de datos) → resumen y gráficos, por jugador.
+    # Solo se ejecutan las etapas seleccionadas cuyas entradas cambiaron desde la última vez.
+    print(f"🚀 Iniciando: {args.command}...")
+    status = run_from_args(args)
+    if "error" in status.values():
+        sys.exit("❌ Alguna etapa falló: revisa los mensajes anteriores")
+    if args.command != "all" or args.list or args.no_dashboard:
+        sys.exit(0)
 
     # Fin del proceso de rceación de datos e imágenes
     print("\n✅ Todo listo. CSVs generados y análisis completos.")
 
-# Abrir nuestro dahboard en PowerBI
-
-from pathlib import Path
-import subprocess
-
-# Obtener la raíz del proyecto dinámicamente (donde está el main.py)
-project_root = Path(__file__).resolve().parent
-
-# Ruta relativa al archivo de Power BI
-dashboard_path = project_root / "dashboard" / "Players_career_data.pbix"
-
-# Abrir el archivo
-try:
-    print(f"\n📂 Abriendo el dashboard de Power BI...")
-    subprocess.Popen([str(dashboard_path)], shell=True)
-except Exception as e:
-    print(f"⚠️ No se pudo abrir el archivo de Power BI: {e}")
-
-
+    # Abrir nuestro dahboard en PowerBI (dentro del bloque principal: los procesos del pool no deben abrirlo)
+    import subprocess
 
+    # Ruta relativa al archivo de Power BI
+    dashboard_path = project_root / "dashboard" / "Players_career_data.pbix"
 
+    # Abrir el archivo
+    try:
+        print(f"\n📂 Abriendo el dashboard de Power BI...")
+        subprocess.Popen([str(dashboard_path)], shell=True)
+    except Exception as e:
+        print(f"⚠️ No se pudo abrir el archivo de Power BI: {e}")
@@ -0,0 +1,152 @@
+# age_index.py — Índice por edad exacta (días desde el nacimiento) para comparar carreras a la misma edad
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cube import dataset_fingerprint
+from instrumentation import instrumented
+from players import get_player, player_ids
+from storage import _pyarrow, read_dataset
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+age_index_path = project_root / "data/processed/age_index"
+
+# Se incrementa al cambiar medidas o formato: invalida los índices guardados
+AGE_INDEX_VERSION = 1
+
+# Medidas acumuladas (Matches se añade siempre: partidos disputados)
+MEASURES = ["Goals", "Assists", "Minutes"]
+
+AGE_COLUMNS = ["Date"] + MEASURES
+
+# Un índice es un dict con 'age_days' (edad de cada partido en días, ordenada) y, por medida,
+# el acumulado de la carrera con un 0 inicial: los totales hasta la edad X son acumulado[k], con
+# k = searchsorted(age_days, X, 'right'). Cada consulta es una búsqueda binaria, sin reagrupar partidos.
+
+# -------------------- CONSTRUCCIÓN --------------------
+
+def build_age_index(df, birthdate):
+    """Índice de un jugador a partir de su dataset limpio (los partidos sin fecha se descartan)."""
+    fechas = df["Date"].to_numpy(dtype="datetime64[ns]")
+    valid = ~np.isnat(fechas)
+    age_days = (fechas[valid].astype("datetime64[D]") - np.datetime64(pd.Timestamp(birthdate).date(), "D")).astype(np.int64)
+    order = np.argsort(age_days, kind="stable")
+
+    index = {"age_days": age_days[order], "Matches": np.arange(len(order) + 1, dtype=np.int64)}
+    for m in MEASURES:
+        values = df[m].to_numpy(dtype=np.float64, na_value=np.nan)[valid][order] if m in df else np.zeros(len(order))
+        index[m] = np.concatenate([[0.0], np.cumsum(np.nan_to_num(values))])
+    return index
+
+def _to_table(index):
+    return pd.DataFrame({"age_days": index["age_days"], **{m: index[m][1:] for m in ["Matches"] + MEASURES}})
+
+def _from_table(df):
+    index = {"age_days": df["age_days"].to_numpy(dtype=np.int64)}
+    for m in ["Matches"] + MEASURES:
+        index[m] = np.concatenate([[0], df[m].to_numpy()])
+    return index
+
+# -------------------- CACHÉ --------------------
+
+_loaded = {}
+
+@instrumented("load_age_index", labels=("player_id",))
+def load_age_index(player_id):
+    """
+    Índice por edad de un jugador del registro. Se guarda en data/processed/age_index/ y se reconstruye solo
+    si cambia el dataset limpio o la fecha de nacimiento; dentro del proceso se reutiliza el ya cargado.
+    """
+    player = get_player(player_id)
+    key = f"{dataset_fingerprint(player['cleaned_path'], AGE_INDEX_VERSION)}-{player['birthdate']}"
+    if _loaded.get(player_id, (None,))[0] == key:
+        return _loaded[player_id][1]
+
+    path = age_index_path / f"{player_id}_{key}.parquet"
+    pq = _pyarrow().parquet
+    if path.exists():
+        index = _from_table(pq.read_table(path).to_pandas())
+    else:
+        index = build_age_index(read_dataset(player["cleaned_path"], columns=AGE_COLUMNS), player["birthdate"])
+        age_index_path.mkdir(parents=True, exist_ok=True)
+        for old in age_index_path.glob(f"{player_id}_*.parquet"):
+            old.unlink()
+        pq.write_table(_pyarrow().Table.from_pandas(_to_table(index), preserve_index=False), path)
+    _loaded[player_id] = (key, index)
+    return index
+
+def load_age_indexes(ids=None):
+    """Índices de varios jugadores del registro (todos por defecto); los que no tienen datos procesados se omiten."""
+    indexes = {}
+    for player_id in ids or player_ids():
+        try:
+            indexes[player_id] = load_age_index(player_id)
+        except FileNotFoundError:
+            print(f"⚠️ {player_id} no tiene datos procesados: se omite")
+    return indexes
+
+# -------------------- CONSULTAS --------------------
+
+def age_days(years, birthdate=None):
+    """
+    Edad en años (admite decimales) a días desde el nacimiento. Con birthdate, los años enteros siguen el
+    calendario (el día del cumpleaños) y solo la fracción se convierte con 365,25 días por año.
+    """
+    if birthdate is None:
+        return int(round(years * 365.25))
+    birthdate = pd.Timestamp(birthdate)
+    whole = int(years)
+    birthday = birthdate + pd.DateOffset(years=whole)
+    return (birthday - birthdate).days + int(round((years - whole) * 365.25))
+
+def at_age(index, days):
+    """Totales de la carrera hasta la edad indicada en días, incluido ese día (admite un array de edades)."""
+    k = np.searchsorted(index["age_days"], days, side="right")
+    return {m: index[m][k] for m in ["Matches"] + MEASURES}
+
+def compare_at_age(ids, years):
+    """Totales de varios jugadores del registro al cumplir 'years' años (cada uno según su fecha de nacimiento)."""
+    rows = {}
+    for player_id in ids:
+        player = get_player(player_id)
+        totals = at_age(load_age_index(player_id), age_days(years, player["birthdate"]))
+        rows[player["name"]] = {m: v.item() for m, v in totals.items()}
+    return pd.DataFrame(rows).T
+
+def age_curves(indexes, start_years=None, end_years=None, step_days=30, measures=("Goals", "Assists")):
+    """
+    Curvas acumuladas superpuestas en una rejilla común de edades (años, cada step_days días).
+    indexes: {nombre: índice}. Devuelve un DataFrame con la edad como índice y una columna por (medida, jugador).
+    Por defecto la rejilla va desde el primer partido hasta el último de cualquiera de los jugadores.
+    """
+    primeros = [i["age_days"][0] for i in indexes.values() if len(i["age_days"])]
+    ultimos = [i["age_days"][-1] for i in indexes.values() if len(i["age_days"])]
+    start = age_days(start_years) if start_years is not None else min(primeros, default=0)
+    end = age_days(end_years) if end_years is not None else max(ultimos, default=0)
+    grid = np.arange(start, end + step_days, step_days)
+
+    columns = {}
+    for m in measures:
+        for nombre, index in indexes.items():
+            columns[(m, nombre)] = at_age(index, grid)[m]
+    curves = pd.DataFrame(columns, index=pd.Index(np.round(grid / 365.25, 2), name="Age"))
+    return curves
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comparativa de jugadores a la misma edad")
+    parser.add_argument("players", nargs="*", help="Jugadores a comparar (todos por defecto)")
+    parser.add_argument("--age", type=float, action="append", help="Edad en años (se puede repetir); por defecto la edad actual del más joven")
+    args = parser.parse_args()
+
+    ids = args.players or player_ids()
+    indexes = load_age_indexes(ids)
+    ids = [player_id for player_id in ids if player_id in indexes]
+    ages = args.age or [min(indexes[player_id]["age_days"][-1] for player_id in ids) / 365.25]
+    for years in ages:
+        print(f"\n🎂 A los {years:.2f} años:\n{compare_at_age(ids, years).to_string()}")
@@ -1,219 +1,264 @@
-import pandas as pd
-import matplotlib.pyplot as plt
 from pathlib import Path
 
+from players import get_player
+from cube import build_cube, slice_cube
+from instrumentation import instrumented
+from storage import read_dataset
+
 # Definimos la ruta donde se guardarán las imágenes de las gráficas
 images_path = Path(__file__).resolve().parent.parent / "images"
 images_path.mkdir(parents=True, exist_ok=True)
 
+# Columnas que necesitan los gráficos por edad, los únicos que trabajan fila a fila (la edad es distinta en cada partido)
+COLUMNAS_EDAD = ["Age", "Minutes", "Goals", "Assists"]
+
+def load_player_data(player_id, columns=None):
+    """Carga el dataset limpio de un jugador con tipos reales, leyendo solo las columnas indicadas."""
+    return read_dataset(get_player(player_id)["cleaned_path"], columns=columns)
+
+# El resto de análisis recibe el cubo de agregados de cube.py (build_cube(df) o load_cube(id)):
+# los datos se recorren una sola vez y cada función solo corta el cubo, sin modificar el DataFrame.
+# Cada gráfico se divide en datos_* (corte del cubo) y dibujar_* (pinta sobre un Axes explícito),
+# de modo que render.py puede generarlos en lote, en paralelo y sin backend interactivo.
+
+def _mostrar(dibujar, datos, archivo, save, nombre=None):
+    """Dibuja un gráfico en su propia figura, lo guarda si se pide, lo muestra y cierra la figura."""
+    # pyplot (y su backend interactivo) solo se carga al mostrar gráficos, no al importar el módulo
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    dibujar(datos, ax, nombre)
+    fig.tight_layout()
+    if save:
+        fig.savefig(images_path / archivo)
+        print(f"🖼️ Guardado: {archivo}")
+    plt.show()
+    plt.close(fig)
+
+# -------------------- DATOS Y DIBUJO DE CADA GRÁFICO --------------------
+
+def datos_goles_por_año(cubo):
+    return slice_cube(cubo, "Year", "Goals")
+
+def dibujar_goles_por_año(datos, ax, nombre):
+    datos.plot(kind="bar", title=f"Goles por Año de {nombre}", ax=ax)
+    ax.set_ylabel("Goles")
+    ax.set_xlabel("Año")
+
+def datos_goles_por_temporada(cubo):
+    return slice_cube(cubo, "Season", "Goals")
+
+def dibujar_goles_por_temporada(datos, ax, nombre):
+    datos.plot(kind='bar', title='Total de Goles por Temporada', xlabel='Temporada', ylabel='Goles', ax=ax)
+
+def datos_top_competiciones(cubo):
+    return slice_cube(cubo, "Competition", "Goals").sort_values(ascending=False).head(5)
+
+def dibujar_top_competiciones(datos, ax, nombre):
+    datos.plot(kind="bar", title=f"Top competiciones con más goles de {nombre}", xlabel="Competición", ylabel="Goles", ax=ax)
+
+def datos_asistencias_por_temporada(cubo):
+    return slice_cube(cubo, "Season", "Assists")
+
+def dibujar_asistencias_por_temporada(datos, ax, nombre):
+    datos.plot(kind='bar', title='Total de Asistencias por Temporada', xlabel='Temporada', ylabel='Asistencias', ax=ax)
+
+def datos_goles_por_mes(cubo):
+    return slice_cube(cubo, "Month", "Goals")
+
+def dibujar_goles_por_mes(datos, ax, nombre):
+    datos.plot(kind='bar', title='Goles por Mes', xlabel='Mes', ylabel='Goles', ax=ax)
+
+def datos_local_vs_visitante(cubo):
+    return slice_cube(cubo, "Home/Away", ["Goals", "Assists"])
+
+def dibujar_local_vs_visitante(datos, ax, nombre):
+    datos.plot(kind="bar", title="Goles y Asistencias - Home vs Away", ax=ax)
+    ax.set_ylabel("Total")
+    ax.set_xlabel("Condición de Juego")
+    ax.tick_params(axis="x", rotation=0)
+
+def datos_goles_asistencias_por_edad(filas):
+    # Fila a fila: la edad no es una dimensión del cubo
+    return filas.groupby("Age")[["Goals", "Assists"]].sum()
+
+def dibujar_goles_asistencias_por_edad(datos, ax, nombre):
+    datos.plot(kind="bar", title="Goles y Asistencias por Edad", ax=ax)
+    ax.set_ylabel("Cantidad")
+
+def datos_minutos_por_temporada(cubo):
+    return slice_cube(cubo, "Season", "Minutes")
+
+def dibujar_minutos_por_temporada(datos, ax, nombre):
+    datos.plot(kind="bar", title="Minutos por Temporada", ax=ax)
+    ax.set_ylabel("Minutos")
+
+def datos_titular_vs_suplente(cubo):
+    return slice_cube(cubo, "Lineup", "Matches").sort_values(ascending=False)
+
+def dibujar_titular_vs_suplente(datos, ax, nombre):
+    datos.plot(kind="pie", autopct="%1.1f%%", title="Titular vs Suplente", ax=ax)
+    ax.set_ylabel("")
+
+def datos_partidos_local_visitante(cubo):
+    return slice_cube(cubo, "Home/Away", "Matches").sort_values(ascending=False)
+
+def dibujar_partidos_local_visitante(datos, ax, nombre):
+    datos.plot(kind="bar", title="Local vs Visitante", ax=ax)
+    ax.set_ylabel("Cantidad de partidos")
+
+def datos_minutos_por_edad(filas):
+    return filas[["Age", "Minutes"]]
+
+def dibujar_minutos_por_edad(datos, ax, nombre):
+    datos.plot.scatter(x="Age", y="Minutes", title="Minutos jugados por Edad", alpha=0.6, ax=ax)
+
+# Gráficos de cada fuente de datos: (fichero, entrada 'cubo' o 'filas', función de datos, función de dibujo).
+# {prefix} es el prefijo de imágenes del jugador e {id} su id en config/players.json.
+CHARTS = {
+    "messistats": [
+        ("{prefix}goles_por_año.png", "cubo", datos_goles_por_año, dibujar_goles_por_año),
+        ("{prefix}goles_por_temporada.png", "cubo", datos_goles_por_temporada, dibujar_goles_por_temporada),
+        ("{prefix}top_competiciones_{id}.png", "cubo", datos_top_competiciones, dibujar_top_competiciones),
+        ("{prefix}asistencias_por_temporada.png", "cubo", datos_asistencias_por_temporada, dibujar_asistencias_por_temporada),
+        ("{prefix}goles_por_mes.png", "cubo", datos_goles_por_mes, dibujar_goles_por_mes),
+        ("{prefix}local_vs_visitante.png", "cubo", datos_local_vs_visitante, dibujar_local_vs_visitante),
+    ],
+    "fbref": [
+        ("{prefix}goles_asistencias_por_edad.png", "filas", datos_goles_asistencias_por_edad, dibujar_goles_asistencias_por_edad),
+        ("{prefix}minutos_por_temporada.png", "cubo", datos_minutos_por_temporada, dibujar_minutos_por_temporada),
+        ("{prefix}titular_vs_suplente.png", "cubo", datos_titular_vs_suplente, dibujar_titular_vs_suplente),
+        ("{prefix}local_vs_visitante.png", "cubo", datos_partidos_local_visitante, dibujar_partidos_local_visitante),
+        ("{prefix}minutos_por_edad.png", "filas", datos_minutos_por_edad, dibujar_minutos_por_edad),
+    ],
+}
+
 # -------------------- FUNCIONES DE MESSI --------------------
 
-def total_goals(df):
+def total_goals(cubo):
     """Muestra y retorna el total de goles en el dataset."""
-    total = df['Goals'].sum()
+    total = cubo['Goals'].sum()
     print(f"⚽ Total de goles de Messi en la carrera: {total}")
     return total
 
-def goals_by_year(df, save=False):
+def goals_by_year(cubo, save=False):
     """Goles por año calendario (basado en la fecha del partido)."""
-    df["Year"] = df["Date"].dt.year
-    goles_por_año = df.groupby("Year")["Goals"].sum()
+    goles_por_año = datos_goles_por_año(cubo)
     print("\n📈 Goles por año:\n", goles_por_año)
+    _mostrar(dibujar_goles_por_año, goles_por_año, "goles_por_año.png", save, "Leo Messi")
 
-    ax = goles_por_año.plot(kind="bar", title="Goles por Año de Leo Messi")
-    plt.ylabel("Goles")
-    plt.xlabel("Año")
-    plt.tight_layout()
-    if save:
-        plt.savefig(images_path / "goles_por_año.png")
-        print("🖼️ Guardado: goles_por_año.png")
-    plt.show()
-
-def goals_by_season(df, save=False):
+def goals_by_season(cubo, save=False):
     """Goles totales por temporada futbolística."""
-    goles_por_temporada = df.groupby("Season")["Goals"].sum().sort_index()
+    goles_por_temporada = datos_goles_por_temporada(cubo)
     print("\n📅 Goles por temporada:\n", goles_por_temporada)
+    _mostrar(dibujar_goles_por_temporada, goles_por_temporada, "goles_por_temporada.png", save)
 
-    goles_por_temporada.plot(kind='bar', title='Total de Goles por Temporada', xlabel='Temporada', ylabel='Goles')
-    plt.tight_layout()
-    if save:
-        plt.savefig(images_path / "goles_por_temporada.png")
-        print("🖼️ Guardado: goles_por_temporada.png")
-    plt.show()
-
-def goals_by_competition(df, save=False):
+def goals_by_competition(cubo, save=False):
     """Muestra las 5 competiciones donde Messi ha marcado más goles."""
     # Agrupar y seleccionar el Top 5
-    top_competiciones = df.groupby("Competition")["Goals"].sum().sort_values(ascending=False).head(5)
+    top_competiciones = datos_top_competiciones(cubo)
     print("\n🏆 Top competiciones con más goles:\n", top_competiciones)
+    _mostrar(dibujar_top_competiciones, top_competiciones, "top_competiciones_messi.png", save, "Leo Messi")
 
-    # Crear gráfico
-    top_competiciones.plot(kind="bar", title="Top competiciones con más goles de Leo Messi", xlabel="Competición", ylabel="Goles")
-    plt.tight_layout()
-
-    if save:
-        plt.savefig(images_path / "top_competiciones_messi.png")
-        print("🖼️ Guardado: top_competiciones_messi.png")
-
-    plt.show()
-
-
-def goals_per_minute(df):
+def goals_per_minute(cubo):
     """Promedio de minutos por gol (minutos jugados / goles marcados)."""
-    total_goals_ = df['Goals'].sum()
-    total_minutes = pd.to_numeric(df['Minutes'], errors='coerce').sum()
+    total_goals_ = cubo['Goals'].sum()
+    total_minutes = cubo['Minutes'].sum()
     if total_goals_ > 0:
         promedio = total_minutes / total_goals_
         print(f"⏱️ Gol cada {promedio:.2f} minutos.")
     else:
         print("⏱️ No hay goles suficientes para calcular promedio.")
 
-def average_goals_per_match(df):
+def average_goals_per_match(cubo):
     """Promedio de goles por partido."""
-    promedio = df['Goals'].mean()
+    promedio = cubo['Goals'].sum() / cubo['Goals_N'].sum()
     print(f"📊 Promedio de goles por partido: {promedio:.2f}")
 
-def assists_total_and_by_season(df, save=False):
+def assists_total_and_by_season(cubo, save=False):
     """Muestra el total de asistencias y su evolución por temporada, ordenadas cronológicamente."""
-    
+
     # Calcular el total
-    total = df['Assists'].sum()
+    total = cubo['Assists'].sum()
     print(f"🎯 Total de asistencias: {total}")
 
     # Agrupar por temporada y ordenar de más antigua a más moderna
-    asistencias_por_temporada = df.groupby('Season')['Assists'].sum().sort_index()
+    asistencias_por_temporada = datos_asistencias_por_temporada(cubo)
     print("\n📅 Asistencias por temporada (ordenadas cronológicamente):\n", asistencias_por_temporada)
+    _mostrar(dibujar_asistencias_por_temporada, asistencias_por_temporada, "asistencias_por_temporada.png", save)
 
-    # Crear gráfico
-    asistencias_por_temporada.plot(kind='bar', title='Total de Asistencias por Temporada', xlabel='Temporada', ylabel='Asistencias')
-    plt.tight_layout()
-
-    # Guardar si se desea
-    if save:
-        plt.savefig(images_path / "asistencias_por_temporada.png")
-        print("🖼️ Guardado: asistencias_por_temporada.png")
-
-    plt.show()
-
-
-def goals_by_month(df, save=False):
+def goals_by_month(cubo, save=False):
     """Distribución de goles por mes del año."""
-    df['Month'] = df['Date'].dt.month
-    goles_por_mes = df.groupby('Month')['Goals'].sum()
-
-    goles_por_mes.plot(kind='bar', title='Goles por Mes', xlabel='Mes', ylabel='Goles')
-    plt.tight_layout()
-    if save:
-        plt.savefig(images_path / "goles_por_mes.png")
-        print("🖼️ Guardado: goles_por_mes.png")
-    plt.show()
+    _mostrar(dibujar_goles_por_mes, datos_goles_por_mes(cubo), "goles_por_mes.png", save)
 
-def plot_local_vs_visitante(df, save=False):
+def plot_local_vs_visitante(cubo, save=False):
     """Comparativa entre goles y asistencias jugando de local vs visitante."""
-    resumen = df.groupby("Home/Away")[["Goals", "Assists"]].sum()
+    resumen = datos_local_vs_visitante(cubo)
     print("\n📊 Goles y asistencias - Home vs Away:\n", resumen)
+    _mostrar(dibujar_local_vs_visitante, resumen, "local_vs_visitante.png", save)
 
-    resumen.plot(kind="bar", title="Goles y Asistencias - Home vs Away")
-    plt.ylabel("Total")
-    plt.xlabel("Condición de Juego")
-    plt.xticks(rotation=0)
-    plt.tight_layout()
-    if save:
-        plt.savefig(images_path / "local_vs_visitante.png")
-        print("🖼️ Guardado: local_vs_visitante.png")
-    plt.show()
-
-def run_all_analyses(df, save=False):
+@instrumented("run_all_analyses")
+def run_all_analyses(cubo, save=False):
     """Ejecuta todos los análisis para Messi."""
     print("📊 Análisis completo de la carrera de Messi:\n")
-    total_goals(df)
-    goals_by_year(df, save=save)
-    goals_by_season(df, save=save)
-    goals_by_competition(df, save=save)
-    goals_per_minute(df)
-    average_goals_per_match(df)
-    assists_total_and_by_season(df, save=save)
-    goals_by_month(df, save=save)
-    plot_local_vs_visitante(df, save=save)
+    total_goals(cubo)
+    goals_by_year(cubo, save=save)
+    goals_by_season(cubo, save=save)
+    goals_by_competition(cubo, save=save)
+    goals_per_minute(cubo)
+    average_goals_per_match(cubo)
+    assists_total_and_by_season(cubo, save=save)
+    goals_by_month(cubo, save=save)
+    plot_local_vs_visitante(cubo, save=save)
 
 def run_analysis(df):
-    run_all_analyses(df, save=True)
+    """Análisis de Messi a partir de su DataFrame limpio (se agrega una sola vez)."""
+    run_all_analyses(build_cube(df), save=True)
 
 # -------------------- FUNCIONES DE LAMINE --------------------
 
-def resumen_lamine(df):
+def resumen_lamine(cubo):
     """Resumen numérico básico de la carrera de Lamine Yamal."""
     print("📊 Análisis de la carrera de Lamine Yamal:")
-    print(f"Total de partidos: {len(df)}")
-    print(f"Total de goles: {df['Goals'].sum()}")
-    print(f"Total de asistencias: {df['Assists'].sum()}")
-    print(f"Promedio de minutos por partido: {df['Minutes'].mean():.1f}")
+    print(f"Total de partidos: {cubo['Matches'].sum()}")
+    print(f"Total de goles: {cubo['Goals'].sum()}")
+    print(f"Total de asistencias: {cubo['Assists'].sum()}")
+    print(f"Promedio de minutos por partido: {cubo['Minutes'].sum() / cubo['Minutes_N'].sum():.1f}")
     print()
 
 def goles_asistencias_por_edad(df, save=False):
-    """Goles y asistencias agrupados por edad."""
-    resumen = df.groupby("Age")[["Goals", "Assists"]].sum()
-    resumen.plot(kind="bar", title="Goles y Asistencias por Edad")
-    plt.ylabel("Cantidad")
-    plt.tight_layout()
-    if save:
-        plt.savefig(images_path / "lamine_goles_asistencias_por_edad.png")
-        print("🖼️ Guardado: lamine_goles_asistencias_por_edad.png")
-    plt.show()
+    """Goles y asistencias agrupados por edad (fila a fila: la edad no es una dimensión del cubo)."""
+    _mostrar(dibujar_goles_asistencias_por_edad, datos_goles_asistencias_por_edad(df), "lamine_goles_asistencias_por_edad.png", save)
 
-def minutos_por_temporada(df, save=False):
+def minutos_por_temporada(cubo, save=False):
     """Total de minutos jugados por temporada."""
-    resumen = df.groupby("Season")["Minutes"].sum()
-    resumen.plot(kind="bar", title="Minutos por Temporada")
-    plt.ylabel("Minutos")
-    plt.tight_layout()
-    if save:
-        plt.savefig(images_path / "lamine_minutos_por_temporada.png")
-        print("🖼️ Guardado: lamine_minutos_por_temporada.png")
-    plt.show()
+    _mostrar(dibujar_minutos_por_temporada, datos_minutos_por_temporada(cubo), "lamine_minutos_por_temporada.png", save)
 
-def titular_vs_suplente(df, save=False):
+def titular_vs_suplente(cubo, save=False):
     """Distribución de partidos como titular o suplente."""
-    resumen = df["Lineup"].value_counts()
-    resumen.plot(kind="pie", autopct="%1.1f%%", title="Titular vs Suplente")
-    plt.ylabel("")
-    plt.tight_layout()
-    if save:
-        plt.savefig(images_path / "lamine_titular_vs_suplente.png")
-        print("🖼️ Guardado: lamine_titular_vs_suplente.png")
-    plt.show()
+    _mostrar(dibujar_titular_vs_suplente, datos_titular_vs_suplente(cubo), "lamine_titular_vs_suplente.png", save)
 
-def local_vs_visitante_lamine(df, save=False):
+def local_vs_visitante_lamine(cubo, save=False):
     """Distribución de partidos jugados en casa vs fuera (solo cantidad)."""
-    resumen = df["Home/Away"].value_counts()
-    resumen.plot(kind="bar", title="Local vs Visitante")
-    plt.ylabel("Cantidad de partidos")
-    plt.tight_layout()
-    if save:
-        plt.savefig(images_path / "lamine_local_vs_visitante.png")
-        print("🖼️ Guardado: lamine_local_vs_visitante.png")
-    plt.show()
+    _mostrar(dibujar_partidos_local_visitante, datos_partidos_local_visitante(cubo), "lamine_local_vs_visitante.png", save)
 
 def scatter_minutos_por_edad(df, save=False):
     """Dispersión de minutos jugados según la edad."""
-    df.plot.scatter(x="Age", y="Minutes", title="Minutos jugados por Edad", alpha=0.6)
-    plt.tight_layout()
-    if save:
-        plt.savefig(images_path / "lamine_minutos_por_edad.png")
-        print("🖼️ Guardado: lamine_minutos_por_edad.png")
-    plt.show()
+    _mostrar(dibujar_minutos_por_edad, datos_minutos_por_edad(df), "lamine_minutos_por_edad.png", save)
 
-def run_analysis_lamine(df, save=True):
-    """Ejecuta todos los análisis para Lamine."""
-    resumen_lamine(df)
+@instrumented("run_analysis_lamine")
+def run_analysis_lamine(df, save=True, cubo=None):
+    """Ejecuta todos los análisis para Lamine (df solo necesita COLUMNAS_EDAD si se pasa el cubo)."""
+    cubo = build_cube(df) if cubo is None else cubo
+    resumen_lamine(cubo)
     goles_asistencias_por_edad(df, save)
-    minutos_por_temporada(df, save)
-    titular_vs_suplente(df, save)
-    local_vs_visitante_lamine(df, save)
+    minutos_por_temporada(cubo, save)
+    titular_vs_suplente(cubo, save)
+    local_vs_visitante_lamine(cubo, save)
     scatter_minutos_por_edad(df, save)
 
-
-
-
-
-
+# Resumen numérico de cada fuente de datos (lo imprime el flujo completo antes de los gráficos)
+RESUMENES = {
+    "messistats": [total_goals, goals_per_minute, average_goals_per_match],
+    "fbref": [resumen_lamine],
+}
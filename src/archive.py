@@ -0,0 +1,114 @@
+# archive.py — Archivo local de páginas HTML descargadas (comprimido y direccionado por contenido)
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+
+from locks import file_lock
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+archive_path = project_root / "data/archive"
+objects_path = archive_path / "objects"
+index_path = archive_path / "index.jsonl"
+
+# Índice en memoria: URL -> lista de entradas ordenadas por fecha de descarga
+_index = None
+_lock = threading.Lock()
+
+# -------------------- ÍNDICE --------------------
+
+def _load_index():
+    global _index
+    if _index is None:
+        _index = {}
+        if index_path.exists():
+            with open(index_path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        _index.setdefault(entry["url"], []).append(entry)
+    return _index
+
+def _append_entry(entry):
+    """Añade una entrada al índice (bajo bloqueo entre procesos: las etapas de scraping del pipeline escriben a la vez)."""
+    archive_path.mkdir(parents=True, exist_ok=True)
+    with file_lock(index_path):
+        with open(index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    _index.setdefault(entry["url"], []).append(entry)
+
+def _object_file(sha):
+    return objects_path / sha[:2] / f"{sha}.html.gz"
+
+# -------------------- API --------------------
+
+def latest(url, before=None):
+    """Última entrada archivada de una URL (opcionalmente anterior a una fecha ISO). None si no existe."""
+    with _lock:
+        entries = _load_index().get(url, [])
+    if before is not None:
+        entries = [e for e in entries if e["fetched_at"] <= before]
+    return entries[-1] if entries else None
+
+def history(url):
+    """Todas las descargas archivadas de una URL, de la más antigua a la más reciente."""
+    with _lock:
+        return list(_load_index().get(url, []))
+
+def load(url, before=None):
+    """Devuelve los bytes de la última versión archivada de una URL, o None si no está archivada."""
+    entry = latest(url, before)
+    if entry is None:
+        return None
+    with gzip.open(_object_file(entry["sha256"]), "rb") as f:
+        return f.read()
+
+def store(url, content, etag=None, last_modified=None):
+    """Guarda una página descargada (sin duplicar contenido idéntico) y registra la descarga."""
+    sha = hashlib.sha256(content).hexdigest()
+    object_file = _object_file(sha)
+
+    if not object_file.exists():
+        object_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = object_file.with_name(f"{object_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with gzip.open(tmp_file, "wb") as f:
+            f.write(content)
+        os.replace(tmp_file, object_file)
+
+    entry = {
+        "url": url,
+        "sha256": sha,
+        "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "status": 200,
+        "etag": etag,
+        "last_modified": last_modified,
+    }
+    with _lock:
+        _load_index()
+        _append_entry(entry)
+    return sha
+
+def record_not_modified(url):
+    """Registra una revalidación 304: mismo contenido, nueva fecha de descarga."""
+    previous = latest(url)
+    entry = dict(previous, fetched_at=datetime.now(timezone.utc).isoformat(timespec="seconds"), status=304)
+    with _lock:
+        _append_entry(entry)
+    return entry
+
+def conditional_headers(url):
+    """Cabeceras If-None-Match / If-Modified-Since para revalidar la última versión archivada."""
+    entry = latest(url)
+    headers = {}
+    if entry is None:
+        return headers
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
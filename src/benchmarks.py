@@ -0,0 +1,960 @@
+# benchmarks.py — Micro-benchmarks de rendimiento: implementación de referencia frente a la actual
+
+import argparse
+import io
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+import archive
+from synthetic import SIZES, generate, synthetic_messi_raw
+
+# -------------------- UTILIDADES --------------------
+
+def _best_time(func, repeat):
+    """Mejor tiempo de pared (segundos) de varias ejecuciones y resultado de la última."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def _peak_memory(func):
+    """Pico de memoria del heap de Python (MB) durante una ejecución."""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak / 1e6
+
+def _report(name, old_time, new_time, old_mem=None, new_mem=None):
+    line = f"  {name:<34} antes {old_time * 1000:9.2f} ms | ahora {new_time * 1000:9.2f} ms | x{old_time / new_time:5.1f}"
+    if old_mem is not None:
+        line += f" | memoria {old_mem:7.2f} MB → {new_mem:7.2f} MB"
+    print(line)
+
+def _archived_pages(host):
+    """Última versión archivada de cada URL de un host."""
+    archive._load_index()
+    urls = [url for url in archive._index if urlsplit(url).netloc == host]
+    return [(url, archive.load(url)) for url in urls]
+
+# -------------------- IMPLEMENTACIONES DE REFERENCIA --------------------
+
+def _reference_messi_page(content):
+    """Parseo original de messistats.com: árbol completo de BeautifulSoup y find_all('tr')."""
+    from bs4 import BeautifulSoup
+    from scraping import MESSI_HEADERS
+
+    soup = BeautifulSoup(content, "html.parser")
+    data = []
+    for row in soup.find_all("tr"):
+        cols = [col.text.strip() for col in row.find_all("td")]
+        if cols:
+            data.append(cols)
+    if not data:
+        return None
+    return pd.DataFrame(data, columns=MESSI_HEADERS[:len(data[0])])
+
+def _reference_fbref_page(content):
+    """Parseo original de FBRef: pd.read_html sobre el documento completo."""
+    df = pd.read_html(io.BytesIO(content), attrs={"id": "matchlogs_all"})[0]
+    if df.columns.nlevels > 1:
+        df.columns = df.columns.get_level_values(-1)
+    return df
+
+def _reference_transform_messi(df):
+    """Procesamiento original de process_data: apply fila a fila para temporada, edad, equipo y rival."""
+    def deducir_equipo_jugador(row):
+        temporada, comp = row["Season"], str(row["Competition"])
+        home, away = row["Home Team"], row["Away Team"]
+        if pd.isna(temporada) or pd.isna(comp):
+            return "Unknown"
+        if "argentina" in comp.lower() or home == "Argentina" or away == "Argentina":
+            return "Argentina"
+        elif temporada <= "2020-2021":
+            return "FC Barcelona"
+        elif temporada in ["2021-2022", "2022-2023"]:
+            return "Paris Saint-Germain"
+        elif temporada >= "2023-2024":
+            return "Inter Miami CF"
+        return "Unknown"
+
+    def obtener_rival(row):
+        player_team, home, away = row["Player_Team"], row["Home Team"], row["Away Team"]
+        if pd.isna(player_team) or pd.isna(home) or pd.isna(away):
+            return None
+        if player_team == home and away != player_team:
+            return away
+        elif player_team == away and home != player_team:
+            return home
+        return None
+
+    def asignar_temporada(fecha):
+        if pd.isna(fecha):
+            return None
+        if datetime(2019, 8, 15) <= fecha <= datetime(2020, 8, 14):
+            return "2019-2020"
+        year = fecha.year
+        return f"{year}-{year + 1}" if fecha.month >= 8 else f"{year - 1}-{year}"
+
+    df["Competition"] = df["Competition"].apply(lambda x: x.split("\n")[1].strip() if isinstance(x, str) and "\n" in x else x)
+    df["Lineup"] = df["Lineup"].apply(lambda x: x.split("\n")[1].strip() if isinstance(x, str) and "\n" in x else x)
+    df.drop(columns=["Index", "Jersey", "Extra"], inplace=True, errors="ignore")
+    for col in ["Goals", "Assists", "Cards", "Minutes"]:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["Date"] = pd.to_datetime(df["Date"], format="%d-%m-%Y", errors="coerce", dayfirst=True)
+    df["Season"] = df["Date"].apply(asignar_temporada)
+    birthdate = pd.to_datetime("1987-06-24")
+    df["Age"] = df["Date"].apply(lambda d: round((d - birthdate).days / 365.25, 2) if pd.notna(d) else None)
+    df["Player"] = "Leo Messi"
+    df["Player_Team"] = df.apply(deducir_equipo_jugador, axis=1)
+    df["Home/Away"] = df.apply(lambda row: "Home" if row["Home Team"] == row["Player_Team"] else "Away", axis=1)
+    df["Rival_Team_Name"] = df.apply(obtener_rival, axis=1)
+    df["Age"] = df["Age"].apply(lambda x: f"{x:.2f}".replace(".", ",") if pd.notna(x) else "")
+    cols = ["Date", "Season", "Age", "Player", "Player_Team", "Home/Away", "Competition", "Home Team", "Result", "Away Team", "Rival_Team_Name", "Lineup", "Minutes", "Goals", "Assists", "Cards"]
+    return df[cols]
+
+def _reference_transform_fbref(df_yamal):
+    """Procesamiento original de process_lamine_data (commit base): diccionarios literales y apply fila a fila."""
+    birthdate = pd.to_datetime("2007-07-13")
+
+    df_yamal["Date"] = pd.to_datetime(df_yamal["Date"], errors="coerce")
+
+    def asignar_temporada(fecha):
+        if pd.isna(fecha):
+            return None
+        year = fecha.year
+        return f"{year}-{year + 1}" if fecha.month >= 8 else f"{year - 1}-{year}"
+
+    df_yamal["Season"] = df_yamal["Date"].apply(asignar_temporada)
+    df_yamal["Age"] = df_yamal["Date"].apply(lambda d: round((d - birthdate).days / 365.25, 2) if pd.notna(d) else None)
+    df_yamal["Lineup"] = df_yamal["Start"].apply(lambda s: "Starter" if s == "Y" else "Substitute")
+
+    # Limpiar nombres de equipos (ej: "eng England" -> "England")
+    df_yamal["Squad"] = df_yamal["Squad"].str.replace(r"^[a-z]{2,3}\s", "", regex=True)
+    df_yamal["Opponent"] = df_yamal["Opponent"].str.replace(r"^[a-z]{2,3}\s", "", regex=True)
+
+    # Corrección de nombres de equipos
+    TEAM_NAME_FIXES = {
+        "Barcelona": "FC Barcelona",
+        "Betis": "Real Betis",
+        "Athletic Club": "Athletic de Bilbao",
+        "Celta Vigo": "Celta de Vigo",
+        "Paris S-G": "Paris Saint-Germain",
+        "Shakhtar": "Shakhtar Donetsk",
+        "Almeria": "UD Almería",
+        "Porto": "FC Porto",
+        "Mallorca": "Real Mallorca",
+        "Antwerp": "Antwerp",
+        "Osasuna": "Osasuna",
+        "Napoli": "Napoli",
+        "Las Palmas": "Las Palmas",
+        "Granada": "Granada",
+        "Valencia": "Valencia",
+        "Real Sociedad": "Real Sociedad",
+        "Atlético Madrid": "Atlético Madrid",
+        "Real Madrid": "Real Madrid",
+        "Sevilla": "Sevilla",
+        "Girona": "Girona",
+        "Alavés": "Alavés",
+        "Rayo Vallecano": "Rayo Vallecano",
+        "Getafe": "Getafe",
+        "Cádiz": "Cádiz",
+        "Bayern Munich": "Bayern München",
+        "Young Boys": "Young Boys",
+        "Dortmund": "Borussia Dortmund",
+        "Red Star": "Red Star Belgrade",
+        "Valladolid": "Real Valladolid",
+        "Andorra": "Andorra",
+        "Cyprus": "Cyprus",
+        "Georgia": "Georgia",
+        "Denmark": "Denmark",
+        "Serbia": "Serbia",
+        "Monaco": "AS Monaco",
+        "Atalanta": "Atalanta",
+        "England": "England",
+        "Northern Ireland": "Northern Ireland"
+    }
+
+    df_yamal["Squad"] = df_yamal["Squad"].replace(TEAM_NAME_FIXES)
+    df_yamal["Opponent"] = df_yamal["Opponent"].replace(TEAM_NAME_FIXES)
+
+    def limpiar_resultado(valor):
+        if pd.isna(valor):
+            return None
+        valor = str(valor).strip()
+        if valor.startswith(("W", "D", "L")):
+            partes = valor.split(" ")
+            return partes[1] if len(partes) > 1 else None
+        if valor.isdigit():
+            return f"{valor}-{valor}"
+        return valor.replace("–", "-")
+
+    df_yamal["Result"] = df_yamal["Result"].apply(limpiar_resultado)
+
+    # Correcciones de nombres de competiciones
+    COMP_FIXES = {
+        "La Liga": "La Liga",
+        "Champions Lg": "UEFA Champions League",
+        "Copa del Rey": "Copa del Rey",
+        "Supercopa de España": "Spanish Super Cup",
+        "Friendlies (M)": "International friendly",
+        "UEFA Nations League": "UEFA Nations League",
+        "UEFA Euro Qualifying": "UEFA Euro Qualification",
+        "UEFA Euro": "UEFA Euro"
+    }
+    df_yamal["Comp"] = df_yamal["Comp"].replace(COMP_FIXES)
+
+    # Construcción del nuevo dataframe limpio
+    df_cleaned = pd.DataFrame()
+    df_cleaned["Date"] = df_yamal["Date"]
+    df_cleaned["Season"] = df_yamal["Season"]
+    df_cleaned["Age"] = df_yamal["Age"].apply(lambda x: f"{x:.2f}".replace(".", ",") if pd.notna(x) else "")
+    df_cleaned["Player"] = "Lamine Yamal"
+
+    df_cleaned["Home Team"] = df_yamal.apply(lambda row: row["Squad"] if row["Venue"] == "Home" else row["Opponent"], axis=1)
+    df_cleaned["Away Team"] = df_yamal.apply(lambda row: row["Opponent"] if row["Venue"] == "Home" else row["Squad"], axis=1)
+    df_cleaned["Competition"] = df_yamal["Comp"]
+    df_cleaned["Result"] = df_yamal["Result"]
+    df_cleaned["Lineup"] = df_yamal["Lineup"]
+
+    # Conversión y renombrado de columnas numéricas
+    for col in ["Min", "Gls", "Ast", "CrdY"]:
+        df_cleaned[col] = pd.to_numeric(df_yamal.get(col, 0), errors="coerce").fillna(0).astype(int)
+
+    df_cleaned.rename(columns={
+        "Min": "Minutes",
+        "Gls": "Goals",
+        "Ast": "Assists",
+        "CrdY": "Cards"
+    }, inplace=True)
+
+    # Deducción del equipo de Lamine
+    df_cleaned["Player_Team"] = df_cleaned.apply(lambda row: "Spain" if "international" in row["Competition"].lower() else "FC Barcelona", axis=1)
+    df_cleaned["Home/Away"] = df_cleaned.apply(lambda row: "Home" if row["Home Team"] == row["Player_Team"] else "Away", axis=1)
+    df_cleaned["Rival_Team_Name"] = df_cleaned.apply(lambda row: row["Away Team"] if row["Player_Team"] == row["Home Team"] else row["Home Team"], axis=1)
+    return df_cleaned
+
+# -------------------- BENCHMARKS --------------------
+
+def bench_extractor(repeat=5):
+    """Extractor en streaming frente a BeautifulSoup / read_html sobre las páginas archivadas."""
+    from extractor import extract_fbref_table
+    from scraping import parse_messi_page
+
+    print("🧪 Extracción de tablas (páginas de data/archive):")
+    cases = [
+        ("www.messistats.com", _reference_messi_page, parse_messi_page),
+        ("fbref.com", _reference_fbref_page, lambda c: extract_fbref_table(c, "matchlogs_all")),
+    ]
+    for host, old, new in cases:
+        pages = _archived_pages(host)
+        if not pages:
+            print(f"  ⚠️ No hay páginas archivadas de {host}: ejecuta antes el scraping")
+            continue
+
+        def run_old():
+            return [old(content) for _, content in pages]
+
+        def run_new():
+            return [new(content) for _, content in pages]
+
+        old_time, _ = _best_time(run_old, repeat)
+        new_time, _ = _best_time(run_new, repeat)
+
+        size = sum(len(content) for _, content in pages) / 1e6
+        _report(f"{host} ({len(pages)} págs, {size:.1f} MB)", old_time, new_time, _peak_memory(run_old), _peak_memory(run_new))
+
+def bench_process_data(repeat=1, n_rows=1_000_000):
+    """Transformación vectorizada de process_data frente al apply fila a fila."""
+    from players import get_player
+    from processing import transform_messistats
+
+    print(f"🧪 process_data con {n_rows:,} filas sintéticas (solo transformación, sin E/S):")
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = Path(tmp) / "raw.csv"
+        synthetic_messi_raw(n_rows).to_csv(raw_path, index=False)
+        raw = pd.read_csv(raw_path)
+
+    old_time, _ = _best_time(lambda: _reference_transform_messi(raw.copy()), repeat)
+    new_time, _ = _best_time(lambda: transform_messistats(raw.copy(), get_player("messi")), repeat)
+    _report("process_data", old_time, new_time)
+
+def bench_process_fbref(repeat=1, n_rows=1_000_000):
+    """Transformación vectorizada de process_lamine_data frente al apply fila a fila."""
+    from players import get_player
+    from processing import transform_fbref
+    from synthetic import synthetic_fbref_raw
+
+    print(f"🧪 process_lamine_data con {n_rows:,} filas sintéticas (solo transformación, sin E/S):")
+    raw = synthetic_fbref_raw(n_rows)
+    # Casos raros de las páginas reales: cabeceras repetidas, marcador suelto, letra sin marcador, vacíos y mojibake
+    raros = ["Result", "2", "W", None, "D 2â\x80\x932 (4â\x80\x933)", "L 0–1 (3–4)"]
+    raw.loc[raw.index[::1000], "Result"] = np.resize(np.array(raros, dtype=object), len(raw.index[::1000]))
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = Path(tmp) / "raw.csv"
+        raw.to_csv(raw_path, index=False)
+        raw = pd.read_csv(raw_path)
+    player = get_player("lamine")
+
+    old_time, _ = _best_time(lambda: _reference_transform_fbref(raw.copy()), repeat)
+    new_time, _ = _best_time(lambda: transform_fbref(raw.copy(), player), repeat)
+    _report("process_lamine_data", old_time, new_time)
+
+def bench_storage(repeat=3, n_rows=1_000_000):
+    """Carga de las columnas del cubo de análisis desde CSV, Parquet y Arrow IPC: tiempo y tamaño en memoria."""
+    from cube import CUBE_COLUMNS
+    from players import get_player
+    from processing import transform_messistats
+    from storage import read_dataset, write_dataset
+
+    print(f"🧪 Carga para el análisis ({n_rows:,} filas, {len(CUBE_COLUMNS)} columnas):")
+    df = transform_messistats(synthetic_messi_raw(n_rows), get_player("messi"))
+    with tempfile.TemporaryDirectory() as tmp:
+        base_path = Path(tmp) / "messi_cleaned_data.csv"
+        write_dataset(df, base_path, formats=("csv", "parquet", "arrow"))
+
+        def load(fmt, columns):
+            return lambda: read_dataset(base_path, columns=columns, fmt=fmt)
+
+        # Memoria = tamaño del DataFrame cargado (Arrow reserva fuera del heap que ve tracemalloc)
+        csv_time, csv_df = _best_time(load("csv", None), repeat)
+        for fmt in ["csv", "parquet", "arrow"]:
+            new_time, new_df = _best_time(load(fmt, CUBE_COLUMNS), repeat)
+            _report(f"CSV completo → {fmt} proyectado", csv_time, new_time,
+                    csv_df.memory_usage(deep=True).sum() / 1e6, new_df.memory_usage(deep=True).sum() / 1e6)
+
+def bench_schema(repeat=5, n_rows=1_000_000):
+    """Agrupaciones del análisis sobre texto/float64 frente al esquema compacto (categorías y números estrechos)."""
+    from cube import slice_cube
+    from players import get_player
+    from processing import transform_messistats
+    from schema import apply_schema, memory_mb
+
+    print(f"🧪 Esquema compacto con {n_rows:,} filas sintéticas (agrupaciones de analysis.py):")
+    old_df = transform_messistats(synthetic_messi_raw(n_rows), get_player("messi"))
+    old_df["Date"] = pd.to_datetime(old_df["Date"])
+    new_df = apply_schema(old_df.copy(), update=False)
+
+    def groupbys(df):
+        return lambda: [
+            slice_cube(df, "Season", ["Goals", "Assists", "Minutes"]),
+            slice_cube(df, "Competition", "Goals"),
+            slice_cube(df, "Home/Away", ["Goals", "Assists"]),
+            slice_cube(df, ["Player_Team", "Rival_Team_Name"], "Goals"),
+        ]
+
+    old_time, _ = _best_time(groupbys(old_df), repeat)
+    new_time, _ = _best_time(groupbys(new_df), repeat)
+    _report("groupby Season/Competition/...", old_time, new_time, memory_mb(old_df), memory_mb(new_df))
+
+def bench_loader(repeat=1, n_rows=200_000):
+    """Carga en SQLite (sustituto local de MySQL): DataFrame.to_sql plano frente al upsert normalizado por lotes."""
+    from sqlalchemy import create_engine
+    from loader import load_frame
+    from players import get_player
+    from processing import transform_messistats
+    from storage import to_typed
+
+    print(f"🧪 Carga en base de datos con {n_rows:,} filas sintéticas (SQLite en fichero temporal):")
+    player = get_player("messi")
+    df = to_typed(transform_messistats(synthetic_messi_raw(n_rows), player))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def engine(name):
+            return create_engine(f"sqlite:///{Path(tmp) / name}")
+
+        def run_old():
+            to_sql_engine = engine(f"to_sql_{time.perf_counter_ns()}.db")
+            df.to_sql("matches", to_sql_engine, index=False)
+            to_sql_engine.dispose()
+
+        def run_new():
+            loader_engine = engine(f"loader_{time.perf_counter_ns()}.db")
+            load_frame(df, player, loader_engine)
+            return loader_engine
+
+        old_time, _ = _best_time(run_old, repeat)
+        new_time, loader_engine = _best_time(run_new, repeat)
+        # Segunda carga sobre la misma base: todo son conflictos de clave (upsert sin duplicar)
+        rerun_time, _ = _best_time(lambda: load_frame(df, player, loader_engine), repeat)
+        loader_engine.dispose()
+    _report("to_sql → upsert normalizado", old_time, new_time)
+    print(f"  filas/s: to_sql {n_rows / old_time:,.0f} | loader {n_rows / new_time:,.0f} | re-carga {n_rows / rerun_time:,.0f}")
+
+def bench_db_read(repeat=3, n_rows=200_000, n_new=500):
+    """Análisis desde SQLite: leer la tabla entera con read_sql frente a streaming con filtros en SQL y resumen precalculado."""
+    from sqlalchemy import create_engine
+    import reader
+    from cube import CUBE_COLUMNS, build_cube
+    from loader import load_frame, rebuild_totals, refresh_totals
+    from players import get_player
+    from processing import transform_messistats
+    from storage import to_typed
+
+    print(f"🧪 Lectura desde la base de datos con {n_rows:,} filas sintéticas (SQLite en fichero temporal):")
+    player = get_player("messi")
+    raw = synthetic_messi_raw(n_rows + n_new)
+    raw.loc[n_rows:, "Date"] = [f"{d:02d}-03-2025" for d in np.arange(n_new) % 28 + 1]
+    df = to_typed(transform_messistats(raw, player))
+    season, competition = "2010-2011", "LaLiga"
+
+    with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()):
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'read.db'}")
+        load_frame(df.iloc[:n_rows], player, engine)
+
+        def read_all():
+            # Antes: todas las filas y columnas de la tabla (con sus nombres) en un DataFrame y filtros en pandas
+            with engine.connect() as conn:
+                return to_typed(pd.read_sql_query(reader.matches_query(), conn))
+
+        def old_cube():
+            return build_cube(read_all()[CUBE_COLUMNS])
+
+        def old_filtered():
+            full = read_all()
+            return full[(full["Season"] == season) & (full["Competition"] == competition)].reset_index(drop=True)
+
+        def old_summary():
+            return read_all().groupby(["Season"], observed=True)[["Goals", "Assists", "Minutes"]].sum()
+
+        results = {}
+        for name, old, new in [
+            ("cubo del jugador", old_cube, lambda: reader.load_cube_db("messi", engine)),
+            (f"filtro {season} · {competition}", old_filtered,
+             lambda: reader.read_matches(engine=engine, players="messi", seasons=season, competitions=competition)),
+            ("totales por temporada", old_summary, lambda: reader.summary(["Season"], engine, players="messi")),
+        ]:
+            old_time, _ = _best_time(old, repeat)
+            new_time, _ = _best_time(new, repeat)
+            results[name] = (old_time, new_time, _peak_memory(old), _peak_memory(new))
+
+        # Partidos nuevos en la temporada en curso: la carga solo recalcula el resumen de esa temporada
+        load_frame(df.iloc[n_rows:], player, engine)
+        with engine.begin() as conn:
+            refresh_time, _ = _best_time(lambda: refresh_totals(conn, "messi", ["2024-2025"]), repeat)
+        rebuild_time, _ = _best_time(lambda: rebuild_totals(engine), repeat)
+        engine.dispose()
+
+    for name, (old_time, new_time, old_mem, new_mem) in results.items():
+        _report(name, old_time, new_time, old_mem, new_mem)
+    _report(f"resumen tras {n_new} partidos", rebuild_time, refresh_time)
+
+def _reference_analysis(df):
+    """Agregaciones originales de analysis.py: un groupby sobre el DataFrame completo por cada función."""
+    df = df.copy()
+    df["Year"] = df["Date"].dt.year
+    df["Month"] = df["Date"].dt.month
+    return [
+        df["Goals"].sum(),
+        df.groupby("Year")["Goals"].sum(),
+        df.groupby("Season", observed=True)["Goals"].sum(),
+        df.groupby("Competition", observed=True)["Goals"].sum(),
+        df["Minutes"].sum(),
+        df["Goals"].mean(),
+        df["Assists"].sum(),
+        df.groupby("Season", observed=True)["Assists"].sum(),
+        df.groupby("Month")["Goals"].sum(),
+        df.groupby("Home/Away", observed=True)[["Goals", "Assists"]].sum(),
+        df.groupby("Season", observed=True)["Minutes"].sum(),
+        df["Lineup"].value_counts().loc[lambda s: s > 0],
+    ]
+
+def bench_cube(repeat=5, n_rows=1_000_000):
+    """Todos los análisis: un groupby por función sobre el DataFrame frente a un cubo de una pasada y cortes."""
+    from cube import build_cube, slice_cube
+    from players import get_player
+    from processing import transform_messistats
+    from storage import to_typed
+
+    print(f"🧪 Cubo de análisis con {n_rows:,} filas sintéticas (agregaciones de run_all_analyses y Lamine):")
+    df = to_typed(transform_messistats(synthetic_messi_raw(n_rows), get_player("messi")))
+
+    def run_new():
+        cubo = build_cube(df)
+        return [
+            cubo["Goals"].sum(),
+            slice_cube(cubo, "Year", "Goals"),
+            slice_cube(cubo, "Season", "Goals"),
+            slice_cube(cubo, "Competition", "Goals"),
+            cubo["Minutes"].sum(),
+            cubo["Goals"].sum() / cubo["Goals_N"].sum(),
+            cubo["Assists"].sum(),
+            slice_cube(cubo, "Season", "Assists"),
+            slice_cube(cubo, "Month", "Goals"),
+            slice_cube(cubo, "Home/Away", ["Goals", "Assists"]),
+            slice_cube(cubo, "Season", "Minutes"),
+            slice_cube(cubo, "Lineup", "Matches").sort_values(ascending=False),
+        ]
+
+    old_time, _ = _best_time(lambda: _reference_analysis(df), repeat)
+    new_time, _ = _best_time(run_new, repeat)
+    _report("análisis completo", old_time, new_time)
+
+def bench_render(repeat=1, n_players=8, n_rows=50_000):
+    """Gráficos de varios jugadores sintéticos: dibujo en serie frente al pool de procesos y repetición sin cambios."""
+    from analysis import CHARTS
+    from cube import build_cube
+    from players import get_player
+    from processing import transform_messistats
+    from render import _data_hash, render_tasks
+    from storage import to_typed
+
+    print(f"🧪 Gráficos de {n_players} jugadores sintéticos ({len(CHARTS['messistats'])} por jugador):")
+    tasks = []
+    for k in range(n_players):
+        cubo = build_cube(to_typed(transform_messistats(synthetic_messi_raw(n_rows, seed=k), get_player("messi"))))
+        for template, _, datos_fn, dibujar in CHARTS["messistats"]:
+            datos = datos_fn(cubo)
+            archivo = template.format(prefix=f"p{k}_", id=f"p{k}")
+            tasks.append({"archivo": archivo, "dibujar": dibujar, "datos": datos, "nombre": f"Jugador {k}",
+                          "hash": _data_hash(datos, archivo, dibujar.__name__)})
+
+    with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()):
+        output_dir = Path(tmp)
+        serial_time, _ = _best_time(lambda: render_tasks(tasks, output_dir, max_workers=1, force=True), repeat)
+        pool_time, _ = _best_time(lambda: render_tasks(tasks, output_dir, force=True), repeat)
+        cached_time, written = _best_time(lambda: render_tasks(tasks, output_dir), repeat)
+    _report(f"serie → pool ({len(tasks)} PNG)", serial_time, pool_time)
+    _report(f"serie → sin cambios ({len(written)} PNG)", serial_time, cached_time)
+
+def bench_incremental(repeat=1, n_rows=500_000, n_new=500):
+    """Refresco con n_new partidos nuevos: reprocesado completo frente al incremental."""
+    import processing
+    import schema
+
+    print(f"🧪 Procesamiento incremental: {n_rows:,} filas crudas + {n_new} nuevas:")
+    raw = synthetic_messi_raw(n_rows + n_new)
+    with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()):
+        tmp = Path(tmp)
+        # No tocar la tabla de códigos real (se restaura al salir, aunque falle la medida)
+        with patch.object(schema, "codes_path", tmp / "category_codes.json"):
+            raw_path, full_path, inc_path = tmp / "raw.csv", tmp / "full.csv", tmp / "inc.csv"
+
+            raw.iloc[:n_rows].to_csv(raw_path, index=False)
+            processing.process_player("messi", raw_path, inc_path, return_df=False)
+            with open(raw_path, "a", encoding="utf-8", newline="") as f:
+                raw.iloc[n_rows:].to_csv(f, index=False, header=False)
+
+            full_time, _ = _best_time(lambda: processing.process_player("messi", raw_path, full_path, return_df=False), repeat)
+            inc_time, _ = _best_time(lambda: processing.process_player("messi", raw_path, inc_path, return_df=False, incremental=True), 1)
+            noop_time, _ = _best_time(lambda: processing.process_player("messi", raw_path, inc_path, return_df=False, incremental=True), repeat)
+    _report(f"completo → incremental (+{n_new})", full_time, inc_time)
+    _report("completo → sin cambios", full_time, noop_time)
+
+def bench_streaming(repeat=1, n_rows=1_000_000, chunk_rows=None):
+    """CSV crudo grande: procesado completo en memoria frente a streaming por trozos (memoria acotada)."""
+    import processing
+    import schema
+    from synthetic import write_raw
+
+    chunk_rows = chunk_rows or processing.STREAM_CHUNK_ROWS
+    print(f"🧪 Procesamiento en streaming: {n_rows:,} filas crudas de messistats, trozos de {chunk_rows:,}:")
+    with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()):
+        tmp = Path(tmp)
+        # No tocar la tabla de códigos real (se restaura al salir, aunque falle la medida)
+        with patch.object(schema, "codes_path", tmp / "category_codes.json"):
+            raw_path, full_path, stream_path, dedup_path = (tmp / f"{name}.csv" for name in ("raw", "full", "stream", "dedup"))
+            write_raw("messistats", n_rows, raw_path)
+
+            def full():
+                processing.process_player("messi", raw_path, full_path, return_df=False)
+
+            def stream():
+                processing.process_player("messi", raw_path, stream_path, stream=True, chunk_rows=chunk_rows)
+
+            full_time, _ = _best_time(full, repeat)
+            stream_time, _ = _best_time(stream, repeat)
+            full_mem, stream_mem = _peak_memory(full), _peak_memory(stream)
+
+            # Coste de descartar repetidos con el índice de claves durante el streaming
+            dedup_time, _ = _best_time(lambda: processing.process_player("messi", raw_path, dedup_path, stream=True,
+                                                                          chunk_rows=chunk_rows, dedup=True), 1)
+    _report("completo → streaming", full_time, stream_time, full_mem, stream_mem)
+    _report("streaming → streaming con dedup", stream_time, dedup_time)
+
+def bench_export(repeat=3, n_rows=500_000, n_new=50):
+    """Refresco tras n_new partidos nuevos: reescribir todo el dataset frente a la exportación particionada por temporada."""
+    import export
+    import processing
+    import schema
+    from players import get_player
+
+    print(f"🧪 Exportación particionada: {n_rows:,} partidos + {n_new} nuevos en la última temporada:")
+    raw = synthetic_messi_raw(n_rows + n_new)
+    raw.loc[n_rows:, "Date"] = [f"{d:02d}-03-2025" for d in np.arange(n_new) % 28 + 1]
+    with tempfile.TemporaryDirectory() as tmp, redirect_stdout(io.StringIO()):
+        tmp = Path(tmp)
+        # No tocar la tabla de códigos ni la exportación reales (se restauran al salir, aunque falle la medida)
+        with patch.object(schema, "codes_path", tmp / "category_codes.json"), patch.object(export, "export_path", tmp / "export"), \
+                patch.object(export, "manifest_path", tmp / "export/manifest.json"):
+            raw_path, cleaned_path = tmp / "raw.csv", tmp / "cleaned.csv"
+            player = {**get_player("messi"), "cleaned_path": cleaned_path}
+            manifest = export.load_manifest()
+
+            raw.iloc[:n_rows].to_csv(raw_path, index=False)
+            processing.process_player("messi", raw_path, cleaned_path, return_df=False)
+            full_time, _ = _best_time(lambda: export.export_player(player, export.load_manifest()), repeat)
+            export.export_player(player, manifest)
+            noop_time, _ = _best_time(lambda: export.export_player(player, manifest), repeat)
+
+            raw.to_csv(raw_path, index=False)
+            processing.process_player("messi", raw_path, cleaned_path, return_df=False)
+            before = {key: entry["sha256"] for key, entry in manifest["partitions"].items()}
+            refresh_time, (written, unchanged, _) = _best_time(lambda: export.export_player(player, manifest), 1)
+            total = sum(e["rows"] for e in manifest["partitions"].values())
+            reload = sum(e["rows"] for key, e in manifest["partitions"].items() if before.get(key) != e["sha256"])
+    _report("exportación completa → sin cambios", full_time, noop_time)
+    _report("exportación completa → refresco", full_time, refresh_time)
+    print(f"  ✅ {written} particiones reescritas y {unchanged} sin cambios: Power BI recarga {reload:,} de {total:,} filas")
+
+def bench_imports(repeat=5):
+    """Arranque de la línea de comandos: imports de todo el proyecto (main.py original) frente a imports perezosos."""
+    import subprocess
+
+    root = Path(__file__).resolve().parent.parent
+
+    def run(*args):
+        return lambda: subprocess.run([sys.executable, *args], cwd=root, capture_output=True, check=True)
+
+    # main.py importaba scraping, processing y analysis (pyplot) y db cargaba dotenv y SQLAlchemy
+    eager = "import sys; sys.path.insert(0, 'src'); import matplotlib.pyplot, sqlalchemy, dotenv, scraping, processing, analysis, db"
+    old_time, _ = _best_time(run("-c", eager), repeat)
+    print("🧪 Arranque de procesos cortos (python + imports):")
+    for name, args in [
+        ("main.py --help", ["main.py", "--help"]),
+        ("main.py process (sin cambios)", ["main.py", "process"]),
+        ("import db", ["-c", "import sys; sys.path.insert(0, 'src'); import db"]),
+        ("import processing", ["-c", "import sys; sys.path.insert(0, 'src'); import processing"]),
+    ]:
+        new_time, _ = _best_time(run(*args), repeat)
+        _report(name, old_time, new_time)
+
+def _reference_rolling(df, n, window):
+    """Referencia: groupby().rolling() de pandas para las ventanas y un bucle de Python para las rachas."""
+    df = df[df["Date"].notna()].sort_values(["Player", "Date"], kind="stable").reset_index(drop=True)
+    goals = df["Goals"].fillna(0)
+    by_player = goals.groupby(df["Player"], sort=False, observed=True)
+    last_n = by_player.rolling(n, min_periods=1).sum().reset_index(level=0, drop=True)
+    by_date = goals.set_axis(df["Date"]).groupby(df["Player"].to_numpy(), sort=False)
+    days = by_date.rolling(f"{window}D").sum().to_numpy()
+    streak, racha, anterior = [], 0, None
+    for player, g in zip(df["Player"], goals):
+        if player != anterior:
+            racha, anterior = 0, player
+        racha = racha + 1 if g > 0 else 0
+        streak.append(racha)
+    return last_n.to_numpy(), days, df["Player"].to_numpy(), np.asarray(streak)
+
+def bench_rolling(repeat=3, n_players=10, n_rows=300_000):
+    """Ventanas móviles y rachas: groupby().rolling() y bucles frente a sumas acumuladas y RLE con NumPy."""
+    from players import get_player
+    from processing import transform_messistats
+    from rolling import rolling_metrics, streaks
+
+    base = transform_messistats(synthetic_messi_raw(n_rows), get_player("messi"))[["Date", "Player", "Goals", "Assists", "Minutes"]]
+    df = pd.concat([base.assign(Player=f"Jugador {k}", Date=base["Date"] + pd.Timedelta(days=k)) for k in range(n_players)],
+                   ignore_index=True).sample(frac=1, random_state=0)
+    print(f"🧪 Métricas móviles y rachas: {n_players} jugadores × {n_rows:,} partidos ({len(df):,} filas):")
+
+    with redirect_stdout(io.StringIO()):
+        old_time, _ = _best_time(lambda: _reference_rolling(df, 5, 30), 1)
+        new_time, _ = _best_time(lambda: rolling_metrics(df, match_windows=(5,), day_windows=(30,)), repeat)
+        streak_time, _ = _best_time(lambda: streaks(df, "Goals"), repeat)
+    _report("rolling + rachas", old_time, new_time)
+    print(f"  {'tabla de rachas goleadoras':<34} {streak_time * 1000:9.2f} ms")
+
+def bench_normalization(repeat=3, n_rows=1_000_000):
+    """Nombres de equipos y competiciones de FBRef: regex y replace fila a fila frente a resolver solo los distintos."""
+    import normalization
+    from synthetic import synthetic_fbref_raw
+
+    raw = synthetic_fbref_raw(n_rows)
+    tables = normalization.load_aliases()
+    team_fixes = {alias: canonical for alias, canonical in tables["teams"]["exact"].items() if alias != canonical}
+    comp_fixes = {alias: canonical for alias, canonical in tables["competitions"]["exact"].items() if alias != canonical}
+    print(f"🧪 Normalización de nombres con {n_rows:,} partidos de FBRef:")
+
+    def reference():
+        # process_lamine_data: regex del prefijo de país por fila y replace con los diccionarios de correcciones
+        return [raw[col].str.replace(r"^[a-z]{2,3}\s", "", regex=True).replace(team_fixes) for col in ("Squad", "Opponent")] \
+            + [raw["Comp"].replace(comp_fixes)]
+
+    def normalized():
+        return [normalization.normalize(raw[col], "teams", strip_country=True) for col in ("Squad", "Opponent")] \
+            + [normalization.normalize(raw["Comp"], "competitions")]
+
+    old_time, _ = _best_time(reference, repeat)
+    new_time, _ = _best_time(normalized, repeat)
+    _report("Squad, Opponent y Comp", old_time, new_time)
+
+def bench_age_index(repeat=3, n_players=2_000, n_rows=500, n_queries=2_000):
+    """Comparativas a la misma edad en un registro grande: filtrar y sumar partidos frente a búsqueda binaria."""
+    from age_index import at_age, build_age_index
+
+    rng = np.random.default_rng(0)
+    birthdates = pd.Timestamp(1980, 1, 1) + pd.to_timedelta(rng.integers(0, 25 * 365, n_players), unit="D")
+    player = np.repeat(np.arange(n_players), n_rows)
+    df = pd.DataFrame({
+        "Player": player,
+        "Date": birthdates[player] + pd.to_timedelta(rng.integers(15 * 365, 38 * 365, len(player)), unit="D"),
+        "Goals": rng.choice([0, 1, 2, np.nan], len(player), p=[0.6, 0.3, 0.08, 0.02]),
+        "Assists": rng.choice([0, 1, 2], len(player), p=[0.7, 0.25, 0.05]),
+        "Minutes": rng.integers(1, 91, len(player)),
+    })
+    df["age_days"] = (df["Date"] - birthdates[player]).dt.days
+    queries = list(zip(rng.integers(0, n_players, n_queries), rng.integers(15 * 365, 38 * 365, n_queries)))
+    print(f"🧪 Índice por edad: {n_players:,} jugadores × {n_rows} partidos, {n_queries:,} consultas 'jugador a la edad X':")
+
+    def build():
+        return {k: build_age_index(g, birthdates[k]) for k, g in df.groupby("Player", sort=False)}
+
+    build_time, indexes = _best_time(build, 1)
+    grupos = {k: g for k, g in df.groupby("Player", sort=False)}  # a favor de la referencia: partidos ya separados
+
+    def reference():
+        return [grupos[p].loc[grupos[p]["age_days"] <= d, ["Goals", "Assists", "Minutes"]].sum().to_numpy() for p, d in queries]
+
+    def indexed():
+        return [at_age(indexes[p], d) for p, d in queries]
+
+    old_time, _ = _best_time(reference, 1)
+    new_time, _ = _best_time(indexed, repeat)
+    _report("consultas", old_time, new_time)
+    print(f"  {'construcción de los índices':<34} {build_time * 1000:9.2f} ms | {new_time / n_queries * 1e6:.1f} µs por consulta")
+
+def _reference_resampling(a, b, scale, n_resamples, seed=0):
+    """Referencia: un remuestreo por iteración de un bucle de Python (bootstrap de cada grupo y permutación)."""
+    rng = np.random.default_rng(seed)
+
+    def ratio(num, den):
+        return num.sum() / den.sum() * scale
+
+    boot_a, boot_b, diffs = [], [], []
+    for _ in range(n_resamples):
+        ia, ib = rng.integers(0, len(a[0]), len(a[0])), rng.integers(0, len(b[0]), len(b[0]))
+        boot_a.append(ratio(a[0][ia], a[1][ia]))
+        boot_b.append(ratio(b[0][ib], b[1][ib]))
+    num, den, k = np.concatenate([a[0], b[0]]), np.concatenate([a[1], b[1]]), len(a[0])
+    for _ in range(n_resamples):
+        perm = rng.permutation(len(num))
+        diffs.append(ratio(num[perm[:k]], den[perm[:k]]) - ratio(num[perm[k:]], den[perm[k:]]))
+    boot_a, boot_b = np.array(boot_a), np.array(boot_b)
+    observed = ratio(*a) - ratio(*b)
+    return {
+        "ci_a": np.quantile(boot_a, [0.025, 0.975]), "ci_b": np.quantile(boot_b, [0.025, 0.975]),
+        "ci_diff": np.quantile(boot_a - boot_b, [0.025, 0.975]),
+        "p_value": (np.count_nonzero(np.abs(diffs) >= abs(observed) - 1e-12) + 1) / (n_resamples + 1),
+    }
+
+def bench_stats(repeat=1, n_players=4, n_rows=1_000, n_resamples=100_000, battery_resamples=10_000):
+    """Contrastes por remuestreo: bucle de Python por remuestreo frente a matrices por lotes y fragmentos con semilla."""
+    import stats
+    from players import get_player
+    from processing import transform_messistats
+    from storage import to_typed
+
+    df = to_typed(pd.concat([transform_messistats(synthetic_messi_raw(n_rows, seed=k), get_player("messi"))[stats.STATS_COLUMNS]
+                             .assign(Player=f"Jugador {k}") for k in range(n_players)], ignore_index=True))
+    print(f"🧪 Contrastes de hipótesis: {n_players} jugadores × {n_rows:,} partidos:")
+
+    # Un contraste (goles/90 de dos jugadores) con una carrera real y con la completa
+    for size in (150, n_rows):
+        df_a, df_b = (df[df["Player"] == f"Jugador {k}"].head(size) for k in (0, 1))
+        a, b = stats.metric_arrays(df_a, "goals_per_90"), stats.metric_arrays(df_b, "goals_per_90")
+        old_time, _ = _best_time(lambda: _reference_resampling(a, b, 90, n_resamples), 1)
+        new_time, _ = _best_time(lambda: stats.compare(df_a, df_b, "goals_per_90", n_resamples), repeat)
+        _report(f"goles/90 ({size:,} partidos, {n_resamples // 1000}k)", old_time, new_time)
+
+    # Batería completa en un proceso y repartida en fragmentos con semilla propia
+    with redirect_stdout(io.StringIO()):
+        battery_time, results = _best_time(lambda: stats.hypothesis_tests(df, battery_resamples), repeat)
+        pool_time, _ = _best_time(lambda: stats.hypothesis_tests(df, battery_resamples, n_jobs=2), 1)
+    print(f"  {f'batería ({len(results)} contrastes × {battery_resamples:,})':<34} {battery_time:9.2f} s | "
+          f"{pool_time:.2f} s con 2 procesos")
+
+def bench_service(repeat=1, n_players=4, n_rows=100_000, clients=8, requests_per_client=250):
+    """Prueba de carga del servicio de consultas: releer el CSV y agrupar por consulta frente al almacén indexado."""
+    import threading
+    from players import get_player
+    from processing import transform_messistats
+    from service import build_store, load_test, make_server, print_load_test, typical_queries
+    from storage import read_dataset, to_typed, write_dataset
+
+    frames = {f"p{k}": to_typed(transform_messistats(synthetic_messi_raw(n_rows, seed=k), get_player("messi")))
+              for k in range(n_players)}
+    store = build_store(frames)
+    store["players"] = {player_id: f"Jugador {player_id}" for player_id in frames}
+    paths = typical_queries(store)
+
+    print(f"🧪 Servicio de consultas: {n_players} jugadores × {n_rows:,} partidos, {clients} clientes concurrentes:")
+    with tempfile.TemporaryDirectory() as tmp:
+        # Antes: cada consulta releía el dataset del jugador (como analysis.py) y agrupaba con pandas
+        base_path = Path(tmp) / "p0_cleaned_data.csv"
+        write_dataset(frames["p0"], base_path)
+        old_time, _ = _best_time(lambda: read_dataset(base_path, fmt="csv").groupby("Season", observed=True)[["Goals", "Assists"]].sum(), repeat)
+
+    server = make_server(port=0, store=store)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        cold = load_test(base_url, paths, clients, requests_per_client, seed=1)
+        warm = load_test(base_url, paths, clients, requests_per_client, seed=2)
+    finally:
+        server.shutdown()
+        server.server_close()
+    print_load_test("caché fría", cold)
+    print_load_test("caché caliente", warm)
+    _report("releer CSV → servicio (p99)", old_time, warm["p99_ms"] / 1000)
+
+# -------------------- SUITE DE REGRESIÓN --------------------
+
+# Tiempos y memoria de referencia por tamaño y caso (dependen de la máquina: no se versionan)
+baselines_path = Path(__file__).resolve().parent.parent / "data/benchmarks/baselines.json"
+
+# Un caso es una regresión si tarda o consume más de (1 + umbral) veces su referencia
+REGRESSION_THRESHOLD = 0.20
+
+def suite_cases(base, output_dir):
+    """
+    Casos de la suite sobre un conjunto sintético de synthetic.generate: {nombre: función sin argumentos}.
+    Se ejecutan en orden: el procesamiento deja en output_dir los datasets limpios que usan los análisis.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    from analysis import COLUMNAS_EDAD, run_all_analyses, run_analysis_lamine
+    from cube import CUBE_COLUMNS, build_cube
+    from processing import process_data, process_lamine_data
+    from scraping import parse_lamine_page, parse_messi_page
+    from storage import read_dataset
+    from synthetic import read_archive
+
+    messi_path, lamine_path = output_dir / "messi_cleaned_data.csv", output_dir / "lamine_cleaned_data.csv"
+
+    def parse(source, parse_page):
+        return lambda: sum(len(parse_page(content, url)) for url, content in read_archive(base / f"archive_{source}"))
+
+    def analyses_lamine():
+        cubo = build_cube(read_dataset(lamine_path, columns=CUBE_COLUMNS))
+        run_analysis_lamine(read_dataset(lamine_path, columns=COLUMNAS_EDAD), save=False, cubo=cubo)
+
+    return {
+        "parse_messi_page": parse("messistats", parse_messi_page),
+        "parse_lamine_page": parse("fbref", parse_lamine_page),
+        "process_data": lambda: process_data(base / "messi_raw_data.csv", messi_path),
+        "process_lamine_data": lambda: process_lamine_data(base / "lamine_raw_data.csv", lamine_path, return_df=False),
+        "run_all_analyses": lambda: run_all_analyses(build_cube(read_dataset(messi_path, columns=CUBE_COLUMNS))),
+        "run_analysis_lamine": analyses_lamine,
+    }
+
+def _load_baselines():
+    if not baselines_path.exists():
+        return {}
+    return json.loads(baselines_path.read_text(encoding="utf-8"))
+
+def run_suite(size="100k", repeat=3, threshold=REGRESSION_THRESHOLD, save_baseline=False):
+    """
+    Mide tiempo (mejor de repeat) y pico de memoria de parseo, procesamiento y análisis sobre el conjunto
+    sintético del tamaño indicado y lo compara con la referencia guardada. Devuelve los casos con regresión.
+    """
+    import schema
+
+    base = generate(size)
+    results = {}
+    print(f"🧪 Suite de rendimiento: conjunto {size} ({SIZES[size]:,} filas por jugador)")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        # No tocar la tabla de códigos real (se restaura al salir, aunque falle la medida)
+        with patch.object(schema, "codes_path", tmp / "category_codes.json"):
+            for name, case in suite_cases(base, tmp).items():
+                with redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    seconds, _ = _best_time(case, repeat)
+                    memory = _peak_memory(case)
+                results[name] = {"seconds": round(seconds, 4), "memory_mb": round(memory, 2)}
+
+    baselines = _load_baselines()
+    reference = baselines.get(size, {}).get("cases", {})
+    regressions = []
+    for name, result in results.items():
+        ref = reference.get(name)
+        if ref is None:
+            print(f"  {name:<34} ahora {result['seconds'] * 1000:9.2f} ms | memoria {result['memory_mb']:7.2f} MB | sin referencia")
+            continue
+        _report(name, ref["seconds"], result["seconds"], ref["memory_mb"], result["memory_mb"])
+        if result["seconds"] > ref["seconds"] * (1 + threshold) or result["memory_mb"] > ref["memory_mb"] * (1 + threshold):
+            regressions.append(name)
+
+    if regressions:
+        print(f"  ⚠️ Regresiones (> {threshold:.0%} sobre la referencia): {', '.join(regressions)}")
+    elif reference:
+        print(f"  ✅ Sin regresiones (umbral {threshold:.0%})")
+
+    if save_baseline:
+        baselines[size] = {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "repeat": repeat,
+            "cases": results,
+        }
+        baselines_path.parent.mkdir(parents=True, exist_ok=True)
+        baselines_path.write_text(json.dumps(baselines, indent=2), encoding="utf-8")
+        print(f"💾 Referencia {size} guardada en {baselines_path}")
+    return regressions
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+BENCHMARKS = {
+    "extractor": bench_extractor,
+    "process_data": bench_process_data,
+    "process_fbref": bench_process_fbref,
+    "storage": bench_storage,
+    "schema": bench_schema,
+    "loader": bench_loader,
+    "db_read": bench_db_read,
+    "cube": bench_cube,
+    "render": bench_render,
+    "incremental": bench_incremental,
+    "streaming": bench_streaming,
+    "export": bench_export,
+    "imports": bench_imports,
+    "service": bench_service,
+    "rolling": bench_rolling,
+    "age_index": bench_age_index,
+    "normalization": bench_normalization,
+    "stats": bench_stats,
+}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks a ejecutar (todos por defecto): {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--suite", choices=list(SIZES), help="Ejecutar la suite de regresión sobre un conjunto sintético")
+    parser.add_argument("--save-baseline", action="store_true", help="Guardar los resultados de la suite como referencia")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Umbral de regresión (0.2 = 20%%)")
+    args = parser.parse_args()
+    if args.suite:
+        regressions = run_suite(args.suite, args.repeat, args.threshold, args.save_baseline)
+        sys.exit(1 if regressions else 0)
+    unknown = set(args.names) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"benchmarks desconocidos: {', '.join(sorted(unknown))}")
+    for name in args.names or BENCHMARKS:
+        BENCHMARKS[name](repeat=args.repeat)
@@ -0,0 +1,143 @@
+# cube.py — Cubo de agregados para el análisis: una sola pasada por los datos y cortes baratos
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+from players import get_player
+from storage import _pyarrow, dataset_path, read_dataset, stored_format
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+cubes_path = project_root / "data/processed/cubes"
+
+# Se incrementa al cambiar dimensiones o medidas: invalida los cubos guardados
+CUBE_VERSION = 1
+
+# Dimensiones del cubo (Year y Month salen de Date) y medidas sumadas
+DIMENSIONS = ["Player", "Season", "Year", "Month", "Competition", "Home/Away", "Lineup"]
+MEASURES = ["Goals", "Assists", "Minutes", "Cards"]
+
+# Columnas del dataset limpio que hay que leer para construir el cubo
+CUBE_COLUMNS = ["Date", "Player", "Season", "Competition", "Home/Away", "Lineup"] + MEASURES
+
+# -------------------- CONSTRUCCIÓN --------------------
+
+def _codes(serie):
+    """Códigos enteros densos de una columna (0 = nulo): los de la categoría si ya es categórica."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codes = serie.cat.codes.to_numpy()
+    else:
+        codes = pd.factorize(serie)[0]
+    return codes.astype(np.int64) + 1
+
+def _months(fechas):
+    """Meses desde 1970 de cada fecha (NaT = -1), calculados una vez por fecha distinta: de aquí salen Year y Month."""
+    codes, unicas = pd.factorize(fechas)
+    if len(unicas) == 0:
+        return np.full(len(fechas), -1, dtype=np.int64)
+    meses = np.asarray(unicas, dtype="datetime64[ns]").astype("datetime64[M]").astype(np.int64)
+    return np.where(codes >= 0, meses[codes], -1)
+
+def build_cube(df):
+    """
+    Agrega el DataFrame limpio en una sola pasada por todas las dimensiones.
+    Además de las sumas guarda Matches (filas) y Goals_N / Minutes_N (valores no nulos) para medias exactas.
+    Los nulos de las dimensiones se conservan como grupo propio: los totales del cubo son los del dataset.
+
+    Las dimensiones se combinan en una clave entera por fila y cada medida se suma con np.bincount:
+    un solo recorrido de los datos, sin ordenar ni agrupar por texto.
+    """
+    dims = [d for d in DIMENSIONS if d in df]
+    meses = _months(df["Date"])
+
+    # Clave combinada: se recomprime con factorize si el producto de cardinalidades pudiera desbordar int64
+    key = np.zeros(len(df), dtype=np.int64)
+    for codes in [_codes(df[d]) for d in dims] + [meses + 1]:
+        size = int(codes.max(initial=0)) + 1
+        if int(key.max(initial=0)) * size >= 2 ** 62:
+            key = pd.factorize(key)[0].astype(np.int64)
+        key = key * size + codes
+    ids, uniques = pd.factorize(key)
+    n = len(uniques)
+
+    # Primera fila de cada grupo: de ella se leen los valores de las dimensiones (con su tipo categórico)
+    first = np.full(n, len(df), dtype=np.int64)
+    np.minimum.at(first, ids, np.arange(len(df)))
+
+    cube = pd.DataFrame({d: df[d].take(first).reset_index(drop=True) for d in dims})
+    mes = meses[first]
+    year = np.where(mes >= 0, mes // 12 + 1970, np.nan)
+    month = np.where(mes >= 0, mes % 12 + 1, np.nan)
+    if (mes >= 0).all():
+        year, month = year.astype(np.int32), month.astype(np.int32)
+    cube.insert(cube.columns.get_loc("Season") + 1 if "Season" in cube else 0, "Year", year)
+    cube.insert(cube.columns.get_loc("Year") + 1, "Month", month)
+
+    for m in [m for m in MEASURES if m in df]:
+        values = df[m].to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = ~np.isnan(values)
+        total = np.bincount(ids, weights=np.where(valid, values, 0), minlength=n)
+        cube[m] = total.astype(np.int64) if pd.api.types.is_integer_dtype(df[m]) else total
+        if m in ("Goals", "Minutes"):
+            cube[f"{m}_N"] = np.bincount(ids, weights=valid, minlength=n).astype(np.int64)
+    cube["Matches"] = np.bincount(ids, minlength=n)
+    return cube
+
+def merge_cubes(cubes):
+    """
+    Une cubos parciales (p.ej. de los trozos de una lectura en streaming) sumando las celdas repetidas.
+    Da las mismas celdas y totales que build_cube sobre todos los datos juntos.
+    """
+    cubes = [c for c in cubes if len(c)]
+    if len(cubes) <= 1:
+        return cubes[0] if cubes else build_cube(pd.DataFrame({c: pd.Series(dtype=object) for c in CUBE_COLUMNS}))
+    cube = pd.concat(cubes, ignore_index=True)
+    keys = [c for c in cube.columns if c in DIMENSIONS or c in ("Year", "Month")]
+    sums = [c for c in cube.columns if c not in keys]
+    return cube.groupby(keys, dropna=False, observed=True, sort=False)[sums].sum().reset_index()
+
+def slice_cube(cube, by, measures):
+    """
+    Corte del cubo: suma de medidas por una o varias dimensiones, solo con los grupos presentes
+    y ordenado por etiqueta (igual que un groupby sobre la columna de texto original).
+    """
+    resumen = cube.groupby(by, observed=True)[measures].sum()
+    niveles = [resumen.index.get_level_values(i) for i in range(resumen.index.nlevels)]
+    niveles = [n.astype(object) if isinstance(n, pd.CategoricalIndex) else n for n in niveles]
+    resumen.index = pd.MultiIndex.from_arrays(niveles) if len(niveles) > 1 else niveles[0]
+    return resumen.sort_index()
+
+# -------------------- CACHÉ EN DISCO --------------------
+
+def dataset_fingerprint(base_path, version=CUBE_VERSION):
+    """Hash del fichero que leería read_dataset (mismo contenido y versión = mismo cubo o resultado derivado)."""
+    path = dataset_path(base_path, stored_format(base_path))
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return f"v{version}-{digest.hexdigest()[:16]}"
+
+@instrumented("load_cube", labels=("player_id",))
+def load_cube(player_id):
+    """
+    Cubo de un jugador del registro. Si el dataset limpio no ha cambiado desde la última vez
+    se lee el cubo guardado sin tocar los datos; si no, se construye y se guarda en data/processed/cubes/.
+    """
+    base_path = get_player(player_id)["cleaned_path"]
+    cube_path = cubes_path / f"{player_id}_{dataset_fingerprint(base_path)}.parquet"
+    pq = _pyarrow().parquet
+    if cube_path.exists():
+        return pq.read_table(cube_path).to_pandas()
+
+    cube = build_cube(read_dataset(base_path, columns=CUBE_COLUMNS))
+    cubes_path.mkdir(parents=True, exist_ok=True)
+    for old in cubes_path.glob(f"{player_id}_*.parquet"):
+        old.unlink()
+    pq.write_table(_pyarrow().Table.from_pandas(cube, preserve_index=False), cube_path)
+    print(f"🧊 Cubo de {player_id} guardado: {len(cube)} celdas")
+    return cube
@@ -1,17 +1,24 @@
 # src/db.py — Módulo para conexión con base de datos MySQL usando SQLAlchemy y dotenv
 
-from sqlalchemy import create_engine  # Motor de conexión de SQLAlchemy
-from dotenv import load_dotenv       # Cargar variables de entorno desde un archivo .env
+from functools import lru_cache      # Un único engine (y su pool de conexiones) por URL y proceso
 import os                            # Acceso a variables de entorno del sistema
 
-# Cargar las variables definidas en el archivo .env (como usuario, contraseña, etc.)
-load_dotenv()
+# SQLAlchemy y dotenv se importan al pedir la conexión, no al importar el módulo
 
-def get_engine():
+@lru_cache(maxsize=None)
+def _load_env():
+    """Carga una sola vez las variables definidas en el archivo .env (como usuario, contraseña, etc.)."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+def database_url():
     """
-    Devuelve un engine SQLAlchemy configurado para conectarse a una base de datos MySQL.
-    Usa variables de entorno para ocultar información sensible (usuario, contraseña...).
+    URL de conexión: DATABASE_URL si está definida (p.ej. sqlite:///data/futbol.db como sustituto local de MySQL)
+    o, si no, la de MySQL construida con DB_USER, DB_PASSWORD, DB_HOST, DB_PORT y DB_NAME.
     """
+    _load_env()
+    if os.getenv("DATABASE_URL"):
+        return os.getenv("DATABASE_URL")
 
     # Obtener valores desde las variables de entorno
     user = os.getenv("DB_USER")
@@ -21,10 +28,20 @@ def get_engine():
     port = os.getenv("DB_PORT", 3306)  # Usa el puerto 3306 por defecto si no se especifica
 
     # Crear cadena de conexión con formato compatible con MySQL y PyMySQL
-    connection_string = f"mysql+pymysql://{user}:{password}@{host}:{port}/{database}"
+    return f"mysql+pymysql://{user}:{password}@{host}:{port}/{database}"
+
+@lru_cache(maxsize=None)
+def get_engine(url=None):
+    """
+    Devuelve un engine SQLAlchemy configurado para conectarse a la base de datos (MySQL por defecto).
+    Usa variables de entorno para ocultar información sensible (usuario, contraseña...).
+    El engine se crea una sola vez por URL y se reutiliza, junto con su pool de conexiones.
+    """
+    from sqlalchemy import create_engine  # Motor de conexión de SQLAlchemy
 
-    # Crear engine de SQLAlchemy usando la cadena de conexión
-    engine = create_engine(connection_string)
+    url = url or database_url()
+    if url.startswith("sqlite"):
+        return create_engine(url)
 
-    # Devolver el engine para que pueda usarse en otras partes del proyecto
-    return engine
+    # pool_pre_ping descarta conexiones cerradas por el servidor; pool_recycle evita el timeout de MySQL
+    return create_engine(url, pool_size=5, max_overflow=10, pool_pre_ping=True, pool_recycle=3600)
@@ -0,0 +1,216 @@
+# export.py — Exportación para Power BI: partidos por jugador y temporada, resúmenes precalculados y manifiesto
+
+import argparse
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cube import dataset_fingerprint, load_cube, slice_cube
+from players import get_player, player_ids
+from storage import _pyarrow, dataset_path, read_dataset
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+export_path = project_root / "data/export"
+manifest_path = export_path / "manifest.json"
+
+# Se incrementa al cambiar el formato de la exportación: se reescriben todas las particiones
+EXPORT_VERSION = 1
+
+# Estructura de data/export/ (carpetas estilo Hive, las entiende el conector de carpeta de Power BI):
+#   detail/player=<id>/season=<temporada>/part.csv y part.parquet   -> partidos de un jugador en una temporada
+#   summary/<resumen>.csv y .parquet                                 -> resúmenes de todos los jugadores
+#   manifest.json -> por partición y resumen: filas, huella del contenido (sha256) y fecha de la última modificación.
+# Una partición solo se reescribe si cambia su contenido: el consumidor recarga únicamente las que cambiaron
+# (hash o fecha distintos a los de su última carga). Un jugador cuyo dataset limpio no cambió ni se lee.
+
+# Partición de los partidos sin temporada
+NO_SEASON = "unknown"
+
+# Resúmenes precalculados: dimensiones por las que se agrega el cubo de cada jugador
+SUMMARIES = {
+    "career": ["Player"],
+    "season": ["Player", "Season"],
+    "competition": ["Player", "Competition"],
+    "season_competition": ["Player", "Season", "Competition"],
+}
+SUMMARY_MEASURES = ["Matches", "Goals", "Assists", "Minutes", "Cards"]
+
+# -------------------- MANIFIESTO --------------------
+
+def load_manifest():
+    """Manifiesto de la última exportación (vacío si no hay o es de otra versión)."""
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("version") == EXPORT_VERSION:
+            return manifest
+    return {"version": EXPORT_VERSION, "sources": {}, "partitions": {}, "summaries": {}}
+
+def _save_manifest(manifest):
+    manifest["updated"] = _now()
+    export_path.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=1, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, manifest_path)
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+def manifest_files(manifest=None):
+    """Rutas de todos los ficheros exportados (manifiesto incluido)."""
+    manifest = manifest or load_manifest()
+    entries = list(manifest["partitions"].values()) + list(manifest["summaries"].values())
+    return [export_path / f for entry in entries for f in entry["files"]] + [manifest_path]
+
+# -------------------- ESCRITURA --------------------
+
+def _digest(typed):
+    """Huella del contenido de una tabla: hash vectorizado de sus filas en orden más columnas y tipos."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(typed, index=False).to_numpy().tobytes())
+    digest.update(repr([(col, str(dtype)) for col, dtype in typed.dtypes.items()]).encode("utf-8"))
+    return digest.hexdigest()
+
+def _write_table(section, key, base, typed, info, text=None):
+    """
+    Escribe una tabla (CSV y Parquet) solo si su contenido cambió respecto al manifiesto.
+    typed: la tabla con tipos reales; text: función que devuelve el DataFrame a guardar como CSV (por defecto,
+    la propia tabla con coma decimal como los CSV limpios). El CSV solo se genera si hay que escribirlo.
+    Devuelve True si se escribió.
+    """
+    digest = _digest(typed)
+    files = [dataset_path(base, fmt).relative_to(export_path).as_posix() for fmt in ("csv", "parquet")]
+    old = section.get(key)
+    if old and old["sha256"] == digest and all((export_path / f).exists() for f in files):
+        return False
+
+    csv_path, parquet_path = (export_path / f for f in files)
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    (text() if text else typed).to_csv(csv_path, index=False, sep=",", decimal=",", encoding="utf-8")
+    pa = _pyarrow()
+    pa.parquet.write_table(pa.Table.from_pandas(typed, preserve_index=False), parquet_path)
+    section[key] = {**info, "rows": len(typed), "sha256": digest, "modified": _now(), "files": files}
+    return True
+
+def _remove(section, key):
+    """Borra los ficheros de una entrada del manifiesto y las carpetas que queden vacías."""
+    for f in section.pop(key)["files"]:
+        path = export_path / f
+        path.unlink(missing_ok=True)
+        for parent in path.parents:
+            if parent == export_path or any(parent.iterdir()):
+                break
+            parent.rmdir()
+
+def _csv_text(player, typed):
+    """Texto del CSV limpio del jugador (mismas filas y orden que el dataset tipado)."""
+    csv_path = dataset_path(player["cleaned_path"], "csv")
+    if not csv_path.exists():
+        return typed.astype(object).where(typed.notna(), "").astype(str)
+    text = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    if len(text) != len(typed):
+        raise ValueError(f"El CSV y el dataset tipado de {player['id']} no tienen las mismas filas: vuelve a procesarlo")
+    return text
+
+def _source_fingerprint(base):
+    """Huella de lo que se exporta de un jugador: el dataset tipado que lee read_dataset y el texto del CSV limpio."""
+    fingerprint = dataset_fingerprint(base, EXPORT_VERSION)
+    csv_path = dataset_path(base, "csv")
+    if csv_path.exists():
+        fingerprint += "-" + hashlib.sha256(csv_path.read_bytes()).hexdigest()[:16]
+    return fingerprint
+
+def export_player(player, manifest):
+    """
+    Particiones por temporada de un jugador del registro. Si su dataset limpio no cambió desde la última
+    exportación no se lee. Devuelve (particiones escritas, sin cambios, borradas).
+    """
+    player_id = player["id"]
+    fingerprint = _source_fingerprint(player["cleaned_path"])
+    partitions = manifest["partitions"]
+    own = {key for key, entry in partitions.items() if entry["player"] == player_id}
+    if manifest["sources"].get(player_id) == fingerprint and all((export_path / f).exists() for k in own for f in partitions[k]["files"]):
+        return 0, len(own), 0
+
+    typed = read_dataset(player["cleaned_path"])
+    texts = []  # el CSV limpio se lee solo si alguna partición cambió
+
+    def text(rows):
+        if not texts:
+            texts.append(_csv_text(player, typed))
+        return texts[0].iloc[rows]
+
+    written, seen = 0, set()
+    seasons = typed["Season"].astype(object).fillna(NO_SEASON)
+    for season, rows in seasons.groupby(seasons, sort=True).indices.items():
+        key = f"detail/player={player_id}/season={season}"
+        seen.add(key)
+        written += _write_table(partitions, key, export_path / key / "part", typed.iloc[rows],
+                                {"player": player_id, "season": season}, text=partial(text, rows))
+    for key in own - seen:
+        _remove(partitions, key)
+    manifest["sources"][player_id] = fingerprint
+    return written, len(seen) - written, len(own - seen)
+
+def build_summaries(ids):
+    """Resúmenes de todos los jugadores a partir de sus cubos (con goles y asistencias por 90 minutos)."""
+    cubes = []
+    for player_id in ids:
+        try:
+            cubes.append(load_cube(player_id))
+        except FileNotFoundError:
+            print(f"⚠️ {player_id} no tiene datos procesados: se omite en los resúmenes")
+    tables = {}
+    for name, by in SUMMARIES.items():
+        parts = [slice_cube(cube, by, SUMMARY_MEASURES).reset_index() for cube in cubes]
+        table = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=by + SUMMARY_MEASURES)
+        minutes = table["Minutes"].to_numpy(dtype=np.float64)
+        for m in ("Goals", "Assists"):
+            per_90 = np.divide(table[m].to_numpy(dtype=np.float64) * 90, minutes, out=np.full(len(table), np.nan), where=minutes > 0)
+            table[f"{m}_per_90"] = np.round(per_90, 2)
+        tables[name] = table
+    return tables
+
+def export_summaries(manifest, ids):
+    """Escribe los resúmenes que cambiaron. Devuelve (escritos, sin cambios)."""
+    written = 0
+    for name, table in build_summaries(ids).items():
+        written += _write_table(manifest["summaries"], f"summary/{name}", export_path / "summary" / name, table,
+                                {"dimensions": SUMMARIES[name]})
+    return written, len(SUMMARIES) - written
+
+# -------------------- EXPORTACIÓN --------------------
+
+def export_players(ids=None):
+    """
+    Exporta los jugadores indicados (todos por defecto) y los resúmenes de todos los jugadores del registro.
+    Las particiones de otros jugadores se conservan. Devuelve las rutas de todos los ficheros exportados.
+    """
+    ids = list(ids or player_ids())
+    manifest = load_manifest()
+    written = unchanged = removed = 0
+    for player_id in ids:
+        try:
+            w, u, r = export_player(get_player(player_id), manifest)
+        except FileNotFoundError:
+            print(f"⚠️ {player_id} no tiene datos procesados: se omite")
+            continue
+        written, unchanged, removed = written + w, unchanged + u, removed + r
+    summaries_written, summaries_unchanged = export_summaries(manifest, player_ids())
+    _save_manifest(manifest)
+    print(f"📤 Exportación en {export_path}: {written} particiones escritas, {unchanged} sin cambios, {removed} borradas; "
+          f"{summaries_written} resúmenes escritos, {summaries_unchanged} sin cambios")
+    return manifest_files(manifest)
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exportación particionada por jugador y temporada para Power BI")
+    parser.add_argument("players", nargs="*", help="Ids de config/players.json (todos por defecto)")
+    args = parser.parse_args()
+    export_players(args.players)
@@ -0,0 +1,134 @@
+# extractor.py — Extracción de tablas HTML en streaming (lxml pull parser, sin construir el DOM completo)
+
+import re
+
+import pandas as pd
+from lxml import etree
+from pandas.io.parsers import TextParser
+
+# Tamaño de cada trozo de bytes que se entrega al parser
+CHUNK_SIZE = 64 * 1024
+
+# Misma normalización de espacios que aplica pd.read_html a cada celda
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+
+# -------------------- LECTURA EN STREAMING --------------------
+
+def _iter_chunks(source, chunk_size):
+    if hasattr(source, "read"):
+        while chunk := source.read(chunk_size):
+            yield chunk
+    else:
+        for offset in range(0, len(source), chunk_size):
+            yield source[offset:offset + chunk_size]
+
+def _release(element):
+    """Libera un elemento ya procesado y sus hermanos anteriores para mantener la memoria acotada."""
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+def iter_table_rows(source, table_id=None, cell_tags=("td",), chunk_size=CHUNK_SIZE):
+    """
+    Genera (sección, celdas) por cada <tr> con celdas, leyendo el HTML por trozos.
+    sección es 'thead', 'tbody' o 'tfoot'; celdas es una lista de elementos <td>/<th> ya completos.
+    Con table_id=None se recorren las filas de todo el documento; si no, solo las de esa tabla.
+    """
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    inside = table_id is None
+    done = False
+    depth = 0
+    section = "tbody"
+
+    def _drain():
+        nonlocal inside, done, depth, section
+        for event, element in parser.read_events():
+            tag = element.tag
+            if event == "start":
+                if tag == "table" and not inside and element.get("id") == table_id:
+                    inside, depth = True, 0
+                elif tag == "table" and inside:
+                    depth += 1
+                elif tag in ("thead", "tbody", "tfoot") and inside:
+                    section = tag
+                continue
+
+            if inside and tag == "tr":
+                cells = [cell for cell in element if cell.tag in cell_tags]
+                if cells:
+                    yield section, cells
+                _release(element)
+            elif inside and tag == "table":
+                if depth == 0 and table_id is not None:
+                    # Tabla objetivo completa: no hace falta seguir leyendo el documento
+                    inside, done = False, True
+                    return
+                depth -= 1
+            elif inside and tag in ("thead", "tbody", "tfoot"):
+                section = "tbody"
+            elif not inside:
+                _release(element)
+
+    for chunk in _iter_chunks(source, chunk_size):
+        parser.feed(chunk)
+        yield from _drain()
+        if done:
+            return
+    parser.close()
+    yield from _drain()
+
+def cell_text(cell):
+    """Texto completo de una celda (equivalente a .text de BeautifulSoup)."""
+    return "".join(cell.itertext())
+
+# -------------------- TABLAS CONCRETAS --------------------
+
+def extract_messi_table(source, headers):
+    """
+    Extrae todas las filas con <td> de una página de messistats.com como columnas de texto.
+    Devuelve un DataFrame con headers[:n] columnas (n = celdas de la primera fila) o None si no hay filas.
+    """
+    columns = None
+    for _, cells in iter_table_rows(source, cell_tags=("td",)):
+        values = [cell_text(cell).strip() for cell in cells]
+        if columns is None:
+            columns = [[] for _ in values]
+        if len(values) > len(columns):
+            raise ValueError(f"{len(columns)} columns passed, passed data had {len(values)} columns")
+        values += [None] * (len(columns) - len(values))
+        for column, value in zip(columns, values):
+            column.append(value)
+
+    if columns is None:
+        return None
+    # Más celdas que cabeceras: pd.DataFrame(data, columns=headers[:n]) fallaba igual (no se descartan celdas)
+    if len(columns) > len(headers):
+        raise ValueError(f"{len(headers)} columns passed, passed data had {len(columns)} columns")
+    return pd.DataFrame(dict(zip(headers[:len(columns)], columns)))
+
+def extract_fbref_table(source, table_id):
+    """
+    Extrae una tabla de FBRef (p.ej. 'matchlogs_all') con la misma tipificación que pd.read_html:
+    cabecera = última fila del <thead>, celdas <th>/<td> del cuerpo y tipos inferidos por columna.
+    """
+    header, rows = None, []
+    for section, cells in iter_table_rows(source, table_id=table_id, cell_tags=("th", "td")):
+        values = []
+        for cell in cells:
+            text = _RE_WHITESPACE.sub(" ", cell_text(cell).strip())
+            values.extend([text] * int(cell.get("colspan", 1) or 1))
+        if section == "thead":
+            header = values
+        else:
+            rows.append(values)
+
+    if header is None:
+        raise ValueError(f"No se encontró la tabla '{table_id}'")
+
+    # Rellenar filas cortas y tipar cada columna igual que read_html (números, NaN en celdas vacías)
+    rows = [row + [""] * (len(header) - len(row)) for row in rows]
+    df = TextParser(rows, header=None, thousands=",").read() if rows else pd.DataFrame(columns=range(len(header)))
+    df.columns = header
+    return df
@@ -0,0 +1,145 @@
+# fetching.py — Descarga concurrente de páginas con sesiones por host, límites de ritmo y reintentos
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import archive
+from instrumentation import instrumented
+
+# -------------------- CONFIGURACIÓN --------------------
+
+# Límites de cortesía por host: peticiones simultáneas y separación mínima entre peticiones (segundos)
+HOST_LIMITS = {
+    "www.messistats.com": {"concurrency": 4, "min_interval": 0.25},
+    "fbref.com": {"concurrency": 1, "min_interval": 1.0},
+}
+DEFAULT_LIMITS = {"concurrency": 2, "min_interval": 1.0}
+
+# Timeout de conexión y de lectura (segundos)
+TIMEOUT = (10, 30)
+
+# Reintentos con espera exponencial ante errores de red o respuestas temporales
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; Players_career_stats)"}
+
+# -------------------- ESTADO POR HOST --------------------
+
+class _HostState:
+    """Sesión keep-alive, semáforo de concurrencia y reloj de ritmo de un host."""
+
+    def __init__(self, concurrency, min_interval):
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.concurrency = concurrency
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait_turn(self):
+        """Bloquea hasta que el host admite una nueva petición según su intervalo mínimo."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+def _get_host(url):
+    host = urlsplit(url).netloc
+    with _hosts_lock:
+        if host not in _hosts:
+            limits = HOST_LIMITS.get(host, DEFAULT_LIMITS)
+            _hosts[host] = _HostState(limits["concurrency"], limits["min_interval"])
+        return _hosts[host]
+
+# -------------------- DESCARGA --------------------
+
+@instrumented("fetch", labels=(("host", "url", lambda url: urlsplit(url).netloc),), details=("url",))
+def fetch(url, replay=False):
+    """
+    Descarga una URL respetando los límites del host y reintentando con backoff. Devuelve los bytes.
+    Cada página se guarda en el archivo local y se revalida con ETag/Last-Modified (304 = copia archivada).
+    Con replay=True no hay red: se devuelve la última versión archivada.
+    """
+    if replay:
+        content = archive.load(url)
+        if content is None:
+            raise FileNotFoundError(f"{url} no está en el archivo local")
+        return content
+
+    host = _get_host(url)
+
+    for attempt in range(MAX_RETRIES + 1):
+        with host.semaphore:
+            host.wait_turn()
+            try:
+                response = host.session.get(url, timeout=TIMEOUT, headers=archive.conditional_headers(url))
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error, wait = e, None
+            else:
+                if response.status_code == 304:
+                    archive.record_not_modified(url)
+                    return archive.load(url)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    archive.store(url, response.content,
+                                  etag=response.headers.get("ETag"),
+                                  last_modified=response.headers.get("Last-Modified"))
+                    return response.content
+                error = requests.HTTPError(f"{response.status_code} en {url}", response=response)
+                retry_after = response.headers.get("Retry-After", "")
+                wait = float(retry_after) if retry_after.isdigit() else None
+
+        if attempt == MAX_RETRIES:
+            raise error
+
+        # Espera exponencial (o la indicada por el servidor) antes del siguiente intento
+        wait = wait if wait is not None else BACKOFF_SECONDS * 2 ** attempt
+        print(f"🔁 Reintentando {url} en {wait:.1f}s ({error})")
+        time.sleep(wait)
+
+
+def fetch_all(urls, max_workers=None, replay=False):
+    """
+    Descarga varias URLs en paralelo y devuelve una lista de (url, contenido) en el mismo orden.
+    Si una URL falla tras los reintentos, su contenido es None.
+    """
+    urls = list(urls)
+    if not urls:
+        return []
+
+    def _safe_fetch(url):
+        try:
+            return fetch(url, replay=replay)
+        except Exception as e:
+            print(f"❌ Error en {url}: {e}")
+            return None
+
+    # Suficientes hilos para saturar la concurrencia permitida de todos los hosts implicados
+    if replay:
+        max_workers = max_workers or min(8, len(urls))
+    elif max_workers is None:
+        hosts = {urlsplit(url).netloc: _get_host(url) for url in urls}
+        max_workers = sum(host.concurrency for host in hosts.values())
+        max_workers = max(1, min(max_workers, len(urls)))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        contents = list(pool.map(_safe_fetch, urls))
+
+    return list(zip(urls, contents))
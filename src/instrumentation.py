@@ -0,0 +1,319 @@
+# instrumentation.py — Métricas por etapa: tiempos, CPU, memoria, bytes y filas (logs JSON + fichero Prometheus)
+
+import argparse
+import atexit
+import cProfile
+import fnmatch
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from locks import file_lock
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+metrics_path = Path(os.getenv("METRICS_DIR", project_root / "data/metrics"))
+events_path = metrics_path / "events.jsonl"          # una línea JSON por ejecución de etapa
+prometheus_path = metrics_path / "pipeline.prom"     # formato de texto de Prometheus (textfile collector)
+totals_path = metrics_path / "totals.json"           # acumulados de los que se genera el .prom
+profiles_path = metrics_path / "profiles"
+
+# METRICS=1 activa el registro (desactivado por defecto); PROFILE_STAGES='process_player,fetch' (patrones)
+# perfila esas etapas con cProfile (.prof) o, con PROFILER=pyinstrument, con pyinstrument (.html, si está instalado)
+ENABLED = os.getenv("METRICS", "0") == "1"
+PROFILE_STAGES = [p for p in os.getenv("PROFILE_STAGES", "").split(",") if p]
+PROFILER = os.getenv("PROFILER", "cprofile")
+
+PROMETHEUS_PREFIX = "players_career"
+
+# Eventos pendientes de volcar: se escriben todos juntos al final del proceso (o al llegar a FLUSH_EVENTS)
+FLUSH_EVENTS = 10_000
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_events = []
+_totals = {}
+
+# -------------------- MEDIDAS DEL PROCESO --------------------
+
+def _peak_rss():
+    """Pico de memoria residente del proceso en bytes (None si no se puede medir)."""
+    try:
+        import resource
+    except ImportError:  # Windows: psutil da el pico del working set
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return getattr(psutil.Process().memory_info(), "peak_wset", None)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def _cpu_time():
+    # En hilos secundarios (descargas) solo cuenta la CPU del propio hilo
+    if threading.current_thread() is threading.main_thread():
+        return time.process_time()
+    return time.thread_time()
+
+def current():
+    """Registro de la etapa en curso en este hilo (dict vacío si no hay ninguna): para anotar rows_in, bytes..."""
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else {}
+
+# -------------------- PERFILADO --------------------
+
+@contextmanager
+def _profile(stage):
+    """Perfila la etapa si encaja con PROFILE_STAGES (solo la más externa de cada hilo)."""
+    if not PROFILE_STAGES or getattr(_local, "profiling", False) \
+            or not any(fnmatch.fnmatch(stage, pattern) for pattern in PROFILE_STAGES):
+        yield
+        return
+
+    profiles_path.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    _local.profiling = True
+    try:
+        if PROFILER == "pyinstrument":
+            from pyinstrument import Profiler
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                (profiles_path / f"{stage}_{stamp}.html").write_text(profiler.output_html(), encoding="utf-8")
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(profiles_path / f"{stage}_{stamp}.prof")
+    finally:
+        _local.profiling = False
+
+# -------------------- REGISTRO --------------------
+
+@contextmanager
+def measure(stage, **labels):
+    """
+    Mide un bloque como etapa 'stage' con etiquetas (player, page...). Dentro del bloque se pueden anotar
+    en el registro devuelto rows_in, rows_out y bytes. Al salir el registro (tiempo de pared, CPU, aumento del
+    pico de RSS y filas/bytes por segundo) se acumula en memoria; flush() lo lleva a events.jsonl y pipeline.prom.
+    """
+    record = {"stage": stage, "labels": {k: str(v) for k, v in labels.items()}}
+    if not ENABLED:
+        yield record
+        return
+
+    stack = _local.__dict__.setdefault("stack", [])
+    stack.append(record)
+    peak_before = _peak_rss()
+    cpu_before = _cpu_time()
+    start = time.perf_counter()
+    record["status"] = "ok"
+    try:
+        with _profile(stage):
+            yield record
+    except GeneratorExit:
+        # Un generador medido que se cierra antes de agotarse (break del consumidor) no es un error
+        raise
+    except BaseException as e:
+        record["status"] = "error"
+        record["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        wall = time.perf_counter() - start
+        peak_after = _peak_rss()
+        stack.pop()
+        record.update(
+            time=datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+            pid=os.getpid(),
+            wall_seconds=round(wall, 6),
+            cpu_seconds=round(_cpu_time() - cpu_before, 6),
+            peak_rss_delta_bytes=None if peak_before is None else peak_after - peak_before,
+        )
+        rows = record.get("rows_out", record.get("rows_in"))
+        if rows is not None and wall > 0:
+            record["rows_per_second"] = round(rows / wall, 1)
+        if record.get("bytes") is not None and wall > 0:
+            record["bytes_per_second"] = round(record["bytes"] / wall, 1)
+        _write(record)
+
+def _label(label, arguments):
+    if isinstance(label, str):
+        return label, arguments.get(label)
+    name, parameter, convert = label
+    return name, convert(arguments.get(parameter))
+
+def instrumented(stage=None, labels=(), details=()):
+    """
+    Decorador: mide cada llamada como etapa (por defecto el nombre de la función).
+    labels: parámetros que se usan como etiquetas (p.ej. ('player_id',)) o (etiqueta, parámetro, función)
+    para etiquetar con un valor derivado; deben tener pocos valores distintos (una serie de Prometheus por valor).
+    details: parámetros que solo se anotan en el evento (p.ej. la URL completa), sin crear series.
+    Si la función devuelve bytes se anotan como descargados; si devuelve un DataFrame/array o un entero, como filas.
+    """
+    def decorator(func):
+        name = stage or func.__name__
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind_partial(*args, **kwargs)
+            bound.apply_defaults()
+            with measure(name, **dict(_label(label, bound.arguments) for label in labels)) as record:
+                if details:
+                    record["details"] = {d: str(bound.arguments.get(d)) for d in details}
+                result = func(*args, **kwargs)
+                if isinstance(result, (bytes, bytearray)):
+                    record.setdefault("bytes", len(result))
+                elif isinstance(result, int) and not isinstance(result, bool):
+                    record.setdefault("rows_out", result)
+                elif hasattr(result, "shape"):  # DataFrame, Series o array
+                    record.setdefault("rows_out", len(result))
+                return result
+        return wrapper
+    return decorator
+
+# -------------------- SALIDAS --------------------
+
+def _write(record):
+    with _write_lock:
+        _events.append(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        series = _totals.setdefault(_series_key(record), {
+            "runs": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0, "rows_in": 0, "rows_out": 0, "bytes": 0,
+        })
+        series["runs"] += 1
+        for key in ("wall_seconds", "cpu_seconds", "rows_in", "rows_out", "bytes"):
+            series[key] += record.get(key) or 0
+        series["last_wall_seconds"] = record["wall_seconds"]
+        series["last_peak_rss_delta_bytes"] = record["peak_rss_delta_bytes"]
+        series["last_rows_per_second"] = record.get("rows_per_second")
+        series["last_timestamp_seconds"] = time.time()
+        pending = len(_events)
+    if pending >= FLUSH_EVENTS:
+        flush()
+
+def _series_key(record):
+    labels = dict(record["labels"], stage=record["stage"], status=record["status"])
+    return json.dumps(labels, sort_keys=True)
+
+def flush():
+    """
+    Vuelca los registros acumulados en memoria: añade los eventos a events.jsonl y suma los contadores a
+    totals.json y pipeline.prom (bajo bloqueo entre procesos). Se llama sola al terminar el proceso.
+    """
+    with _write_lock:
+        events, totals = _events[:], dict(_totals)
+        _events.clear()
+        _totals.clear()
+    if not events:
+        return
+    try:
+        metrics_path.mkdir(parents=True, exist_ok=True)
+        with file_lock(totals_path):
+            with open(events_path, "a", encoding="utf-8") as f:
+                f.write("".join(events))
+            saved = json.loads(totals_path.read_text(encoding="utf-8")) if totals_path.exists() else {}
+            for key, series in totals.items():
+                if key not in saved:
+                    saved[key] = series
+                    continue
+                for name, value in series.items():
+                    counter = name in ("runs", "wall_seconds", "cpu_seconds", "rows_in", "rows_out", "bytes")
+                    saved[key][name] = saved[key].get(name, 0) + value if counter else value
+
+            tmp_path = totals_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(saved, indent=1), encoding="utf-8")
+            os.replace(tmp_path, totals_path)
+            tmp_path = prometheus_path.with_suffix(".tmp")
+            tmp_path.write_text(prometheus_text(saved), encoding="utf-8")
+            os.replace(tmp_path, prometheus_path)
+    except OSError as e:
+        print(f"⚠️ No se pudieron guardar las métricas ({len(events)} registros): {e}")
+
+def run_and_flush(func, *args, **kwargs):
+    """
+    Ejecuta func(*args, **kwargs) y vuelca sus métricas al terminar. Para las tareas de un ProcessPoolExecutor:
+    sus procesos no pasan por atexit y los registros del trabajador se perderían.
+    """
+    try:
+        return func(*args, **kwargs)
+    finally:
+        flush()
+
+def _after_fork():
+    # El hijo hereda los registros pendientes del padre (los vuelca el padre) y las etapas abiertas de su hilo
+    global _write_lock
+    _write_lock = threading.Lock()
+    _events.clear()
+    _totals.clear()
+    _local.__dict__.clear()
+
+atexit.register(flush)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+# Métricas del .prom: (nombre, tipo, clave en totals.json, ayuda)
+PROMETHEUS_METRICS = [
+    ("stage_runs_total", "counter", "runs", "Ejecuciones de la etapa"),
+    ("stage_wall_seconds_total", "counter", "wall_seconds", "Tiempo de pared acumulado"),
+    ("stage_cpu_seconds_total", "counter", "cpu_seconds", "Tiempo de CPU acumulado"),
+    ("stage_rows_in_total", "counter", "rows_in", "Filas de entrada procesadas"),
+    ("stage_rows_out_total", "counter", "rows_out", "Filas de salida generadas"),
+    ("stage_bytes_total", "counter", "bytes", "Bytes descargados o leídos"),
+    ("stage_last_wall_seconds", "gauge", "last_wall_seconds", "Tiempo de pared de la última ejecución"),
+    ("stage_last_peak_rss_delta_bytes", "gauge", "last_peak_rss_delta_bytes", "Aumento del pico de RSS en la última ejecución"),
+    ("stage_last_rows_per_second", "gauge", "last_rows_per_second", "Filas por segundo en la última ejecución"),
+    ("stage_last_timestamp_seconds", "gauge", "last_timestamp_seconds", "Fin de la última ejecución (epoch)"),
+]
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def prometheus_text(totals):
+    """Totales en formato de texto de Prometheus (una serie por etapa, etiquetas y estado)."""
+    lines = []
+    for name, kind, key, help_text in PROMETHEUS_METRICS:
+        metric = f"{PROMETHEUS_PREFIX}_{name}"
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+        for series_key, series in sorted(totals.items()):
+            if series.get(key) is None:
+                continue
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in json.loads(series_key).items())
+            lines.append(f"{metric}{{{labels}}} {series[key]}")
+    return "\n".join(lines) + "\n"
+
+# -------------------- CONSULTA --------------------
+
+def read_events(path=events_path):
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def slowest(events, top=10, stage=None):
+    """Ejecuciones más lentas (opcionalmente de una etapa o patrón)."""
+    if stage:
+        events = [e for e in events if fnmatch.fnmatch(e["stage"], stage)]
+    return sorted(events, key=lambda e: e["wall_seconds"], reverse=True)[:top]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Etapas y páginas más lentas según data/metrics/events.jsonl")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--stage", help="Solo esta etapa (admite patrones: 'fetch', 'process_*')")
+    args = parser.parse_args()
+    for e in slowest(read_events(), args.top, args.stage):
+        labels = " ".join(f"{k}={v}" for k, v in {**e["labels"], **e.get("details", {})}.items())
+        rate = f" | {e['rows_per_second']:,.0f} filas/s" if e.get("rows_per_second") else ""
+        print(f"⏱️ {e['wall_seconds']:8.3f} s | CPU {e['cpu_seconds']:7.3f} s | {e['stage']} {labels}{rate}")
@@ -0,0 +1,283 @@
+# loader.py — Carga masiva de los datasets procesados en la base de datos (tablas normalizadas, upsert idempotente)
+
+import argparse
+
+import pandas as pd
+from sqlalchemy import (Column, Date, Float, ForeignKey, Index, Integer, MetaData, SmallInteger, String, Table,
+                        UniqueConstraint, delete, func, insert, or_, select)
+
+from db import get_engine
+from instrumentation import instrumented
+from players import get_player, player_ids
+from storage import read_dataset, to_typed
+
+# Filas por lote: cada lote es un único executemany del driver dentro de la transacción
+BATCH_SIZE = 5000
+
+# -------------------- ESQUEMA --------------------
+
+metadata = MetaData()
+
+players_table = Table(
+    "players", metadata,
+    Column("player_id", String(50), primary_key=True),
+    Column("name", String(100), nullable=False),
+    Column("birthdate", Date),
+)
+
+teams_table = Table(
+    "teams", metadata,
+    Column("team_id", Integer, primary_key=True, autoincrement=True),
+    Column("name", String(100), nullable=False),
+    UniqueConstraint("name", name="uq_teams_name"),
+)
+
+competitions_table = Table(
+    "competitions", metadata,
+    Column("competition_id", Integer, primary_key=True, autoincrement=True),
+    Column("name", String(150), nullable=False),
+    UniqueConstraint("name", name="uq_competitions_name"),
+)
+
+# Clave natural de un partido de un jugador: jugador + fecha + local + visitante (re-cargar no duplica)
+matches_table = Table(
+    "matches", metadata,
+    Column("player_id", String(50), ForeignKey("players.player_id"), primary_key=True),
+    Column("date", Date, primary_key=True),
+    Column("home_team_id", Integer, ForeignKey("teams.team_id"), primary_key=True),
+    Column("away_team_id", Integer, ForeignKey("teams.team_id"), primary_key=True),
+    Column("season", String(9)),
+    Column("age", Float),
+    Column("player_team_id", Integer, ForeignKey("teams.team_id")),
+    Column("rival_team_id", Integer, ForeignKey("teams.team_id")),
+    Column("competition_id", Integer, ForeignKey("competitions.competition_id")),
+    Column("home_away", String(4)),
+    Column("result", String(20)),
+    Column("lineup", String(20)),
+    Column("minutes", SmallInteger),
+    Column("goals", SmallInteger),
+    Column("assists", SmallInteger),
+    Column("cards", SmallInteger),
+    # Lecturas y refresco del resumen por jugador y temporada sin recorrer toda su carrera
+    Index("ix_matches_player_season", "player_id", "season"),
+)
+
+MATCH_KEY = ["player_id", "date", "home_team_id", "away_team_id"]
+
+# Resumen precalculado: totales por jugador, temporada y competición (los totales por jugador o por temporada
+# se agregan desde aquí). Se recalculan solo las temporadas que toca cada carga. goals_n y minutes_n cuentan los
+# partidos con el dato, como Goals_N y Minutes_N del cubo, para medias exactas.
+totals_table = Table(
+    "match_totals", metadata,
+    Column("player_id", String(50), ForeignKey("players.player_id"), nullable=False),
+    Column("season", String(9)),
+    Column("competition_id", Integer, ForeignKey("competitions.competition_id")),
+    Column("matches", Integer, nullable=False),
+    Column("goals", Integer, nullable=False),
+    Column("assists", Integer, nullable=False),
+    Column("minutes", Integer, nullable=False),
+    Column("cards", Integer, nullable=False),
+    Column("goals_n", Integer, nullable=False),
+    Column("minutes_n", Integer, nullable=False),
+    Index("ix_match_totals_player_season", "player_id", "season"),
+)
+
+def create_tables(engine=None):
+    """Crea las tablas e índices que falten (no toca los existentes)."""
+    engine = engine or get_engine()
+    metadata.create_all(engine)
+    for table in metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+# -------------------- UPSERT POR LOTES --------------------
+
+def _insert(dialect):
+    """Constructor INSERT del dialecto, con soporte de ON CONFLICT / ON DUPLICATE KEY."""
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"Upsert no soportado para el dialecto '{dialect}'")
+    return insert
+
+def _column_values(table, df, dialect):
+    """Valores de cada columna como listas de Python (NaN -> None) ya convertidos por el tipo SQL del dialecto."""
+    values = {}
+    for name in df.columns:
+        column = df[name].astype(object).where(df[name].notna(), None).tolist()
+        process = table.c[name].type.bind_processor(dialect)
+        values[name] = [process(v) for v in column] if process else column
+    return values
+
+def upsert(conn, table, df, key, batch_size=BATCH_SIZE):
+    """
+    Inserta o actualiza las filas de df (columnas = columnas de la tabla) por su clave, en lotes de batch_size.
+    SQLite/PostgreSQL usan ON CONFLICT DO UPDATE y MySQL ON DUPLICATE KEY UPDATE.
+    La sentencia se compila una vez y cada lote va directo al executemany del driver
+    (PyMySQL lo reescribe como un único INSERT multi-fila), sin procesar parámetros fila a fila en SQLAlchemy.
+    """
+    if df.empty:
+        return 0
+    dialect = conn.dialect
+    stmt = _insert(dialect.name)(table)
+    update_cols = [c for c in df.columns if c not in key]
+
+    if dialect.name in ("mysql", "mariadb"):
+        # Sin columnas que actualizar se reasigna la clave: equivale a "no hacer nada" si ya existe
+        stmt = stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_cols or key[:1]})
+    elif update_cols:
+        stmt = stmt.on_conflict_do_update(index_elements=key, set_={c: stmt.excluded[c] for c in update_cols})
+    else:
+        stmt = stmt.on_conflict_do_nothing(index_elements=key)
+
+    compiled = stmt.compile(dialect=dialect, column_keys=list(df.columns))
+    values = _column_values(table, df, dialect)
+    if compiled.positional:
+        rows = list(zip(*[values[name] for name in compiled.positiontup]))
+    else:
+        rows = [dict(zip(values, row)) for row in zip(*values.values())]
+
+    for start in range(0, len(rows), batch_size):
+        conn.exec_driver_sql(str(compiled), rows[start:start + batch_size])
+    return len(rows)
+
+def _id_map(conn, table, id_col, names):
+    """Registra los nombres nuevos y devuelve {nombre: id}."""
+    upsert(conn, table, pd.DataFrame({"name": names}), key=["name"])
+    return dict(conn.execute(select(table.c.name, table.c[id_col])).all())
+
+# -------------------- RESUMEN PRECALCULADO --------------------
+
+def _season_filter(column, seasons):
+    """Condición 'temporada en la lista' que también acepta la temporada nula."""
+    known = [s for s in seasons if s is not None]
+    condition = column.in_(known)
+    return or_(condition, column.is_(None)) if len(known) < len(seasons) else condition
+
+def refresh_totals(conn, player_id, seasons=None):
+    """
+    Recalcula en la base de datos (DELETE + INSERT ... SELECT agrupado) los totales de un jugador en las
+    temporadas indicadas (todas si seasons es None). Devuelve las filas de resumen escritas.
+    """
+    m, t = matches_table.c, totals_table.c
+    where = [m.player_id == player_id]
+    where_totals = [t.player_id == player_id]
+    if seasons is not None:
+        seasons = list(seasons)
+        if not seasons:
+            return 0
+        where.append(_season_filter(m.season, seasons))
+        where_totals.append(_season_filter(t.season, seasons))
+    conn.execute(delete(totals_table).where(*where_totals))
+    totals = select(
+        m.player_id, m.season, m.competition_id,
+        func.count().label("matches"),
+        *[func.coalesce(func.sum(m[c]), 0).label(c) for c in ("goals", "assists", "minutes", "cards")],
+        func.count(m.goals).label("goals_n"),
+        func.count(m.minutes).label("minutes_n"),
+    ).where(*where).group_by(m.player_id, m.season, m.competition_id)
+    return conn.execute(insert(totals_table).from_select([c.name for c in totals_table.c], totals)).rowcount
+
+def _touched_seasons(conn, player_id, rows):
+    """
+    Temporadas cuyos totales cambia una carga: las de las filas nuevas y las de los partidos ya guardados en su rango
+    de fechas (un partido re-cargado puede cambiar de temporada). None si el jugador aún no tiene resumen.
+    """
+    t, m = totals_table.c, matches_table.c
+    if conn.execute(select(t.player_id).where(t.player_id == player_id).limit(1)).first() is None:
+        return None
+    dates = rows["date"].dropna()
+    stored = conn.execute(select(m.season).distinct().where(m.player_id == player_id, m.date.between(dates.min(), dates.max()))).scalars()
+    return set(rows["season"].astype(object).where(rows["season"].notna(), None)) | set(stored)
+
+def rebuild_totals(engine=None):
+    """Recalcula el resumen de todos los jugadores (p.ej. en una base cargada antes de existir la tabla)."""
+    engine = engine or get_engine()
+    create_tables(engine)
+    with engine.begin() as conn:
+        return sum(refresh_totals(conn, player_id) for player_id in conn.execute(select(players_table.c.player_id)).scalars())
+
+# -------------------- NORMALIZACIÓN --------------------
+
+def match_rows(df, player_id, team_ids, competition_ids):
+    """Partidos del DataFrame limpio como filas de la tabla matches (sin fecha o equipos no se pueden identificar)."""
+    df = df.dropna(subset=["Date", "Home Team", "Away Team"])
+    # Un partido repetido en el dataset se queda con su última versión, igual que en la base de datos
+    df = df.drop_duplicates(subset=["Date", "Home Team", "Away Team"], keep="last")
+
+    def ids(col, mapping):
+        return df[col].astype(object).map(mapping).astype("Int64")
+
+    return pd.DataFrame({
+        "player_id": player_id,
+        "date": df["Date"].dt.date,
+        "home_team_id": ids("Home Team", team_ids),
+        "away_team_id": ids("Away Team", team_ids),
+        "season": df["Season"],
+        "age": df["Age"],
+        "player_team_id": ids("Player_Team", team_ids),
+        "rival_team_id": ids("Rival_Team_Name", team_ids),
+        "competition_id": ids("Competition", competition_ids),
+        "home_away": df["Home/Away"],
+        "result": df["Result"],
+        "lineup": df["Lineup"],
+        "minutes": df["Minutes"].astype("Int64"),
+        "goals": df["Goals"].astype("Int64"),
+        "assists": df["Assists"].astype("Int64"),
+        "cards": df["Cards"].astype("Int64"),
+    })
+
+def load_frame(df, player, engine=None, batch_size=BATCH_SIZE):
+    """
+    Carga el DataFrame limpio de un jugador en una sola transacción y actualiza en ella el resumen de las
+    temporadas que cambian. Devuelve los partidos cargados.
+    """
+    engine = engine or get_engine()
+    create_tables(engine)
+    df = to_typed(df)
+    team_names = pd.unique(pd.concat([df[c].astype(object) for c in ["Home Team", "Away Team", "Player_Team", "Rival_Team_Name"]]).dropna())
+    competition_names = pd.unique(df["Competition"].astype(object).dropna())
+
+    with engine.begin() as conn:
+        upsert(conn, players_table, pd.DataFrame([{
+            "player_id": player["id"],
+            "name": player["name"],
+            "birthdate": pd.Timestamp(player["birthdate"]).date(),
+        }]), key=["player_id"])
+        team_ids = _id_map(conn, teams_table, "team_id", team_names)
+        competition_ids = _id_map(conn, competitions_table, "competition_id", competition_names)
+        rows = match_rows(df, player["id"], team_ids, competition_ids)
+        seasons = _touched_seasons(conn, player["id"], rows) if not rows.empty else set()
+        n = upsert(conn, matches_table, rows, MATCH_KEY, batch_size)
+        refresh_totals(conn, player["id"], seasons)
+        return n
+
+@instrumented("load_player", labels=("player_id",))
+def load_player(player_id, engine=None):
+    """Carga en la base de datos el dataset procesado de un jugador del registro."""
+    player = get_player(player_id)
+    n = load_frame(read_dataset(player["cleaned_path"]), player, engine)
+    print(f"🗄️ {player['name']}: {n} partidos cargados en la base de datos")
+    return n
+
+def load_players(ids=None, engine=None):
+    """Carga todos los jugadores del registro (o los indicados) reutilizando el mismo engine."""
+    engine = engine or get_engine()
+    return {player_id: load_player(player_id, engine) for player_id in (ids or player_ids())}
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Carga de los datasets procesados en la base de datos")
+    parser.add_argument("players", nargs="*", help="Ids de config/players.json (todos por defecto)")
+    parser.add_argument("--url", help="URL de SQLAlchemy (por defecto DATABASE_URL o la MySQL del .env)")
+    parser.add_argument("--rebuild-totals", action="store_true", help="Recalcular el resumen de todos los jugadores sin cargar datos")
+    args = parser.parse_args()
+    if args.rebuild_totals:
+        print(f"🗄️ Resumen recalculado: {rebuild_totals(get_engine(args.url))} filas")
+    else:
+        load_players(args.players, get_engine(args.url))
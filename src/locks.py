@@ -0,0 +1,50 @@
+# locks.py — Bloqueo entre procesos sobre ficheros .lock (tabla de códigos, alias, archivo, métricas, gráficos)
+
+import os
+import time
+from contextlib import contextmanager
+
+def _try_lock(fd):
+    """Bloqueo exclusivo sin espera del fichero abierto (True si se obtuvo)."""
+    try:
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+@contextmanager
+def file_lock(path, timeout=30):
+    """
+    Bloqueo entre procesos sobre un fichero .lock (flock en POSIX, msvcrt.locking en Windows).
+    El sistema lo libera si el proceso que lo tiene muere, así que nunca se borra el bloqueo de otro:
+    si no se obtiene en timeout segundos se lanza TimeoutError con el PID que lo tiene.
+    """
+    lock_path = path.with_suffix(".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    deadline = time.monotonic() + timeout
+    fd = os.open(lock_path, os.O_CREAT | os.O_RDWR)
+    try:
+        while not _try_lock(fd):
+            if time.monotonic() > deadline:
+                holder = os.pread(fd, 32, 0).decode(errors="replace").strip() if hasattr(os, "pread") else "?"
+                raise TimeoutError(f"{lock_path} sigue bloqueado tras {timeout} s (proceso {holder or '?'})")
+            time.sleep(0.01)
+        # PID del proceso que tiene el bloqueo, solo para el mensaje de error de quien espera
+        os.ftruncate(fd, 0)
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.write(fd, str(os.getpid()).encode())
+        yield
+    finally:
+        if os.name == "nt":
+            import msvcrt
+            os.lseek(fd, 0, os.SEEK_SET)
+            try:
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            except OSError:  # no se llegó a obtener
+                pass
+        os.close(fd)  # en POSIX cerrar el descriptor libera el bloqueo
@@ -0,0 +1,153 @@
+# normalization.py — Nombres canónicos de equipos y competiciones: tabla de alias común a todas las fuentes
+
+import difflib
+import hashlib
+import json
+import re
+import unicodedata
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from locks import file_lock
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+aliases_path = project_root / "config/aliases.json"
+learned_path = project_root / "data/processed/aliases_learned.json"
+
+# Estructura de config/aliases.json: {"teams": {canónico: [alias...]}, "competitions": {...}}.
+# Un nombre se resuelve, por orden: alias o canónico exacto -> mismo nombre sin tildes, mayúsculas ni
+# signos -> alias aproximado (difflib) ya aprendido -> búsqueda aproximada entre los nombres con las mismas
+# marcas de filial o juvenil (FILIAL). Si nada encaja se deja tal cual.
+# Los alias aproximados se guardan en data/processed/aliases_learned.json: se resuelven una sola vez y se
+# pueden revisar y pasar a config/aliases.json. Se descartan si cambia la tabla.
+KINDS = ("teams", "competitions")
+
+# Parecido mínimo (0-1) entre nombres normalizados para aceptar un alias aproximado
+FUZZY_CUTOFF = 0.9
+
+# Marcas de filial, reserva o categoría juvenil ('Barcelona B', 'Atlètic', 'U19'...): un nombre solo se
+# empareja de forma aproximada con otro que tenga las mismas marcas ('Barcelona B' nunca -> 'Barcelona')
+FILIAL = re.compile(r"\b(?:[bc]|ii|iii|reserves?|reservas?|atletic|castilla|juvenil|youth|academy|primavera|jong|u\d{2}|sub\s?\d{2})\b")
+
+# Prefijo de país de FBRef ("eng England", "es Betis")
+PREFIJO_PAIS = re.compile(r"^[a-z]{2,3}\s")
+
+_tables = None
+_learned = None
+
+# -------------------- TABLA DE ALIAS --------------------
+
+def fold(name):
+    """Clave de comparación: sin tildes, en minúsculas y con los signos como espacios ('Atlético-Madrid' -> 'atletico madrid')."""
+    sin_tildes = "".join(c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w]+", " ", sin_tildes.casefold()).split())
+
+def load_aliases():
+    """Tablas de búsqueda por tipo (se leen una sola vez por proceso): exactas, normalizadas y versión."""
+    global _tables
+    if _tables is None:
+        text = aliases_path.read_text(encoding="utf-8") if aliases_path.exists() else "{}"
+        config = json.loads(text)
+        _tables = {"version": hashlib.sha256(text.encode()).hexdigest()[:16]}
+        for kind in KINDS:
+            exact = {}
+            for canonical, aliases in config.get(kind, {}).items():
+                for alias in [canonical, *aliases]:
+                    exact[alias] = canonical
+            _tables[kind] = {"exact": exact, "folded": {fold(a): c for a, c in exact.items()}}
+    return _tables
+
+def _filial(key):
+    return tuple(FILIAL.findall(key))
+
+def _load_learned():
+    global _learned
+    if _learned is None:
+        _learned = _read_learned()
+    return _learned
+
+def _read_learned():
+    """Alias aproximados guardados {tipo: {nombre normalizado: canónico o null}} si son de la tabla actual."""
+    version = load_aliases()["version"]
+    if learned_path.exists():
+        data = json.loads(learned_path.read_text(encoding="utf-8"))
+        if data.get("version") == version:
+            return data
+    return {"version": version, **{kind: {} for kind in KINDS}}
+
+def learned_version():
+    """Hash del fichero de alias aprendidos (None si no existe): cambia al aprender o editar un alias."""
+    if not learned_path.exists():
+        return None
+    return hashlib.sha256(learned_path.read_bytes()).hexdigest()[:16]
+
+def _save_learned(kind, nuevos):
+    """Añade alias aproximados al fichero (bajo bloqueo: varios procesos pueden procesar jugadores a la vez)."""
+    with file_lock(learned_path):
+        data = _read_learned()
+        data[kind].update(nuevos)
+        tmp_path = learned_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+        tmp_path.replace(learned_path)
+    _load_learned()[kind].update(nuevos)
+
+# -------------------- RESOLUCIÓN --------------------
+
+def resolve_names(names, kind, fuzzy=True):
+    """Nombre canónico de cada nombre (los que no son texto o no se reconocen se devuelven sin cambios)."""
+    table = load_aliases()[kind]
+    learned = _load_learned()[kind]
+    choices = {}
+    for key in table["folded"]:
+        choices.setdefault(_filial(key), []).append(key)
+    result, nuevos = [], {}
+    for name in names:
+        if not isinstance(name, str):
+            result.append(name)
+            continue
+        canonical = table["exact"].get(name)
+        if canonical is None:
+            key = fold(name)
+            canonical = table["folded"].get(key)
+            if canonical is None and fuzzy:
+                if key in learned:
+                    canonical = learned[key]
+                elif key in nuevos:
+                    canonical = nuevos[key]
+                else:
+                    match = difflib.get_close_matches(key, choices.get(_filial(key), []), n=1, cutoff=FUZZY_CUTOFF)
+                    canonical = nuevos[key] = table["folded"][match[0]] if match else None
+                    if canonical is not None:
+                        print(f"🔤 Alias aproximado ({kind}): '{name}' -> '{canonical}'")
+        result.append(name if canonical is None else canonical)
+    if nuevos:
+        _save_learned(kind, nuevos)
+    return result
+
+def normalize(serie, kind, strip_country=False, fuzzy=True):
+    """
+    Normaliza una columna de nombres de equipos o competiciones ('teams' / 'competitions').
+    Solo se resuelven los valores distintos (categorías o pd.factorize) y el resultado se reparte por código,
+    así el coste depende del número de nombres distintos y no de filas. Los nulos se conservan.
+    strip_country quita antes el prefijo de país de FBRef.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codes, uniques = serie.cat.codes.to_numpy(), serie.cat.categories
+    else:
+        codes, uniques = pd.factorize(serie)
+    names = [PREFIJO_PAIS.sub("", n, count=1) if strip_country and isinstance(n, str) else n for n in uniques]
+    resolved = np.array(resolve_names(names, kind, fuzzy) + [None], dtype=object)
+    return pd.Series(resolved[codes], index=serie.index, name=serie.name, dtype=object).where(codes != -1, serie)
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+if __name__ == "__main__":
+    learned = _load_learned()
+    for kind in KINDS:
+        pendientes = {k: v for k, v in learned[kind].items() if v}
+        print(f"🔤 {kind}: {len(load_aliases()[kind]['exact'])} alias en {aliases_path.name}, {len(pendientes)} aproximados aprendidos")
+        for key, canonical in sorted(pendientes.items()):
+            print(f"   '{key}' -> '{canonical}'")
@@ -0,0 +1,363 @@
+# pipeline.py — Flujo completo como grafo de etapas: caché por hash de contenido y ramas de jugadores en paralelo
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from pathlib import Path
+
+from instrumentation import flush, measure
+from players import get_player, load_registry, player_ids
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+src_path = project_root / "src"
+state_path = project_root / "data/.pipeline_state.json"
+aliases_path = project_root / "config/aliases.json"  # tabla de alias de normalization.py: entrada del procesamiento
+learned_path = project_root / "data/processed/aliases_learned.json"  # alias aproximados aprendidos: también cambian nombres
+
+# Un scraping se considera al día durante este tiempo (segundos); después se vuelve a descargar
+SCRAPE_MAX_AGE = 24 * 3600
+
+# Cada etapa es un dict:
+#   name    -> nombre único, p.ej. 'process:messi'
+#   run     -> función sin argumentos (partial) que devuelve la lista de ficheros que genera
+#   deps    -> etapas que deben terminar antes; sus ficheros generados son entradas de esta etapa
+#   inputs  -> ficheros de entrada adicionales (p.ej. el código fuente de la etapa)
+#   params  -> parámetros que cambian el resultado (configuración del jugador, formato...)
+#   max_age -> segundos tras los que la etapa caduca aunque no cambien sus entradas (None = nunca)
+# Una etapa se salta si el hash de sus entradas y parámetros coincide con el de su última ejecución
+# y sus ficheros generados siguen intactos.
+
+# -------------------- ETAPAS --------------------
+
+def _scrape(player_id, replay, incremental):
+    from scraping import scrape_player
+    scrape_player(player_id, replay=replay, incremental=incremental)
+    return [get_player(player_id)["raw_path"]]
+
+def _process(player_id, incremental, stream):
+    from processing import OUTPUT_FORMATS, process_player
+    from storage import dataset_path
+    process_player(player_id, return_df=False, incremental=incremental, stream=stream)
+    return [dataset_path(get_player(player_id)["cleaned_path"], fmt) for fmt in OUTPUT_FORMATS]
+
+def _combine(ids):
+    from processing import OUTPUT_FORMATS, combine_players
+    from storage import dataset_path
+    output_path = project_root / "data/processed/players_cleaned_data.csv"
+    combine_players(ids, output_path)
+    print(f"✅ Dataset combinado ({len(ids)} jugadores) guardado en: {output_path}")
+    return [dataset_path(output_path, fmt) for fmt in OUTPUT_FORMATS]
+
+def _export(ids):
+    from export import export_players
+    return export_players(ids)
+
+def _stats(ids):
+    from stats import results_path, run_tests
+    run_tests(ids)
+    return [results_path]
+
+def _load_db(player_id):
+    from loader import load_player
+    load_player(player_id)
+    return []
+
+def _analyze(player_id):
+    from analysis import RESUMENES, images_path
+    from cube import load_cube
+    from render import chart_tasks, render_tasks
+
+    player = get_player(player_id)
+    print(f"\n📊 Análisis {player['name']}:")
+    cubo = load_cube(player_id)
+    for resumen in RESUMENES[player["source"]]:
+        resumen(cubo)
+
+    # Un solo proceso por jugador: el paralelismo ya lo dan las ramas del grafo
+    tasks = chart_tasks(player_id)
+    render_tasks(tasks, images_path, max_workers=1)
+    return [images_path / task["archivo"] for task in tasks]
+
+def _code(*modules):
+    return [src_path / f"{module}.py" for module in modules]
+
+def build_stages(ids=None, replay=False, incremental=False, db=False, max_age=SCRAPE_MAX_AGE, stream=False):
+    """
+    Grafo del flujo completo: por jugador scrape → process → analyze (y load-db si db=True),
+    más la unión de todos los datasets limpios (combine), la exportación particionada para Power BI (export) y los
+    contrastes de hipótesis por remuestreo (stats). stream=True procesa por trozos con memoria acotada.
+    """
+    ids = list(ids or player_ids())
+    registry = load_registry()
+    stages = []
+    for player_id in ids:
+        config = registry[player_id]
+        stages += [
+            {
+                "name": f"scrape:{player_id}",
+                "run": partial(_scrape, player_id, replay, incremental),
+                "deps": [],
+                "inputs": _code("scraping", "extractor", "fetching"),
+                "params": {"urls": config["urls"], "source": config["source"], "replay": replay, "incremental": incremental},
+                "max_age": max_age,
+            },
+            {
+                "name": f"process:{player_id}",
+                "run": partial(_process, player_id, incremental and not stream, stream),
+                "deps": [f"scrape:{player_id}"],
+                "inputs": _code("processing", "schema", "storage", "players", "normalization") + [aliases_path, learned_path],
+                "params": {key: value for key, value in config.items() if key != "urls"},
+            },
+            {
+                "name": f"analyze:{player_id}",
+                "run": partial(_analyze, player_id),
+                "deps": [f"process:{player_id}"],
+                "inputs": _code("analysis", "cube", "render"),
+                "params": {"name": config["name"], "image_prefix": config.get("image_prefix")},
+            },
+        ]
+        if db:
+            from db import database_url  # ligero: dotenv se carga aquí y SQLAlchemy solo al conectar
+            stages.append({
+                "name": f"load-db:{player_id}",
+                "run": partial(_load_db, player_id),
+                "deps": [f"process:{player_id}"],
+                "inputs": _code("loader", "db"),
+                "params": {"url": database_url()},  # solo entra en el hash, no se guarda
+            })
+    stages.append({
+        "name": "combine",
+        "run": partial(_combine, ids),
+        "deps": [f"process:{player_id}" for player_id in ids],
+        "inputs": _code("processing"),
+        "params": {"players": ids},
+    })
+    stages.append({
+        "name": "export",
+        "run": partial(_export, ids),
+        "deps": [f"process:{player_id}" for player_id in ids],
+        "inputs": _code("export", "cube"),
+        "params": {"players": ids},
+    })
+    stages.append({
+        "name": "stats",
+        "run": partial(_stats, ids),
+        "deps": [f"process:{player_id}" for player_id in ids],
+        "inputs": _code("stats", "storage"),
+        "params": {"players": ids},
+    })
+    return stages
+
+# -------------------- ESTADO Y HASHES --------------------
+
+def _rel(path):
+    """Ruta relativa a la raíz del proyecto (el estado no depende de dónde esté clonado)."""
+    path = Path(path).resolve()
+    return str(path.relative_to(project_root)) if path.is_relative_to(project_root) else str(path)
+
+def _signature(path):
+    """(tamaño, fecha de modificación) de un fichero, o None si no existe."""
+    try:
+        stat = (project_root / path).stat()
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+def _file_hash(path, files):
+    """sha256 del contenido de un fichero; se reutiliza el calculado antes si no cambió su firma."""
+    signature = _signature(path)
+    if signature is None:
+        return None
+    cached = files.get(path)
+    if cached and cached[:2] == signature:
+        return cached[2]
+    digest = hashlib.sha256()
+    with open(project_root / path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    files[path] = signature + [digest.hexdigest()]
+    return digest.hexdigest()
+
+def _stage_hash(stage, records, files):
+    """Hash de los parámetros de la etapa, su código y el contenido de lo que generaron sus dependencias."""
+    digest = hashlib.sha256(json.dumps(stage["params"], sort_keys=True, default=str).encode())
+    inputs = {_rel(path) for path in stage["inputs"]}
+    for dep in stage["deps"]:
+        inputs.update(records.get(dep, {}).get("outputs", {}))
+    for path in sorted(inputs):
+        digest.update(f"{path}={_file_hash(path, files)}\n".encode())
+    return digest.hexdigest()
+
+def _up_to_date(stage, record, digest):
+    if record is None or record["hash"] != digest:
+        return False
+    if stage.get("max_age") is not None and time.time() - record["finished"] > stage["max_age"]:
+        return False
+    return all(_signature(path) == signature for path, signature in record["outputs"].items())
+
+def _load_state():
+    if not state_path.exists():
+        return {"stages": {}, "files": {}}
+    return json.loads(state_path.read_text(encoding="utf-8"))
+
+def _save_state(state):
+    state_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = state_path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, state_path)
+
+# -------------------- EJECUCIÓN --------------------
+
+def _execute(name, run):
+    """Ejecuta una etapa (en el proceso actual o en uno del pool) y mide su duración."""
+    start = time.perf_counter()
+    with measure("pipeline", step=name) as record:
+        outputs = run()
+        record["outputs"] = len(outputs)
+    # Los procesos del pool no pasan por atexit: cada etapa vuelca sus métricas al terminar
+    flush()
+    return [str(path) for path in outputs], time.perf_counter() - start
+
+def select_stages(stages, only=None, start=None):
+    """
+    Nombres de las etapas a ejecutar: las que encajan con algún patrón de only (p.ej. 'process:*'),
+    o la etapa start y todas las que dependen de ella. Sin filtros, todas.
+    """
+    names = [stage["name"] for stage in stages]
+    if only:
+        return {name for name in names if any(fnmatch.fnmatch(name, pattern) for pattern in only)}
+    if start:
+        selected = {name for name in names if fnmatch.fnmatch(name, start)}
+        for stage in stages:  # las etapas están en orden topológico
+            if selected & set(stage["deps"]):
+                selected.add(stage["name"])
+        return selected
+    return set(names)
+
+def run_pipeline(stages, only=None, start=None, force=False, max_workers=None):
+    """
+    Ejecuta el grafo de etapas en orden de dependencias. Las etapas al día se saltan sin ejecutarse;
+    las listas se reparten en un pool de procesos, así que las ramas de cada jugador avanzan a la vez.
+    Las etapas no seleccionadas (only/start) se dan por buenas con lo que haya en disco.
+    Devuelve {etapa: 'ok' | 'al día' | 'error' | 'omitida'}.
+    """
+    names = [stage["name"] for stage in stages]
+    unknown = {dep for stage in stages for dep in stage["deps"]} - set(names)
+    if unknown:
+        raise ValueError(f"Dependencias desconocidas: {', '.join(sorted(unknown))}")
+
+    selected = select_stages(stages, only, start)
+    if (only or start) and not selected:
+        raise ValueError(f"Ninguna etapa coincide con {only or start}. Disponibles: {', '.join(names)}")
+
+    state = _load_state()
+    records, files = state["stages"], state["files"]
+    status = {}
+    pending = list(stages)
+    running = {}
+    workers = max_workers or len(player_ids())
+    pool = None
+    started = time.perf_counter()
+
+    def finish(stage, digest, result=None, error=None):
+        if error is not None:
+            status[stage["name"]] = "error"
+            print(f"❌ {stage['name']}: {error}")
+            return
+        outputs, seconds = result
+        outputs = [_rel(path) for path in outputs]
+        records[stage["name"]] = {
+            "hash": digest,
+            "finished": time.time(),
+            "seconds": round(seconds, 3),
+            "outputs": {path: _signature(path) for path in outputs},
+        }
+        status[stage["name"]] = "ok"
+        _save_state(state)
+        print(f"✅ {stage['name']} ({seconds:.1f} s)")
+
+    try:
+        while pending or running:
+            ready = [s for s in pending if all(dep in status for dep in s["deps"])]
+            for stage in ready:
+                pending.remove(stage)
+                name = stage["name"]
+                if any(status[dep] in ("error", "omitida") for dep in stage["deps"]):
+                    status[name] = "omitida"
+                    print(f"⛔ {name}: omitida por un error en sus dependencias")
+                    continue
+                if name not in selected:
+                    status[name] = "al día"
+                    continue
+
+                digest = _stage_hash(stage, records, files)
+                if not force and _up_to_date(stage, records.get(name), digest):
+                    status[name] = "al día"
+                    print(f"⏭️ {name}: al día")
+                    continue
+
+                print(f"▶️ {name}")
+                if workers > 1:
+                    pool = pool or ProcessPoolExecutor(max_workers=workers)
+                    running[pool.submit(_execute, name, stage["run"])] = (stage, digest)
+                else:
+                    try:
+                        finish(stage, digest, _execute(name, stage["run"]))
+                    except Exception as e:
+                        finish(stage, digest, error=e)
+
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, digest = running.pop(future)
+                    try:
+                        finish(stage, digest, future.result())
+                    except Exception as e:
+                        finish(stage, digest, error=e)
+            elif pending and not ready:
+                raise ValueError(f"Dependencias circulares entre: {', '.join(s['name'] for s in pending)}")
+    finally:
+        if pool:
+            pool.shutdown()
+        # Guarda también los hashes de ficheros calculados aunque ninguna etapa se haya ejecutado
+        _save_state(state)
+
+    selected_status = [value for name, value in status.items() if name in selected]
+    counts = {value: selected_status.count(value) for value in ("ok", "al día", "error", "omitida")}
+    print(f"🏁 Pipeline en {time.perf_counter() - started:.2f} s: {counts['ok']} ejecutadas, "
+          f"{counts['al día']} al día, {counts['error']} con error, {counts['omitida']} omitidas")
+    return status
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+def add_arguments(parser):
+    """Opciones del pipeline (las comparten main.py y este módulo)."""
+    parser.add_argument("--replay", action="store_true", help="Usar solo las páginas archivadas en data/archive (sin red)")
+    parser.add_argument("--incremental", action="store_true", help="Descargar solo temporadas abiertas y procesar solo los partidos nuevos o cambiados")
+    parser.add_argument("--stream", action="store_true", help="Procesar los CSV crudos por trozos con memoria acotada (sin modo incremental)")
+    parser.add_argument("--db", action="store_true", help="Cargar los datasets limpios en la base de datos (DATABASE_URL o .env)")
+    parser.add_argument("--only", nargs="+", metavar="ETAPA", help="Ejecutar solo estas etapas (admite patrones: 'process:*', '*:messi')")
+    parser.add_argument("--from", dest="start", metavar="ETAPA", help="Ejecutar esta etapa y todas las que dependen de ella")
+    parser.add_argument("--force", action="store_true", help="Ejecutar las etapas seleccionadas aunque estén al día")
+    parser.add_argument("--workers", type=int, help="Procesos en paralelo (por defecto, uno por jugador)")
+    parser.add_argument("--max-age", type=float, default=SCRAPE_MAX_AGE / 3600, help="Horas que un scraping se considera al día")
+    parser.add_argument("--list", action="store_true", help="Mostrar las etapas y sus dependencias sin ejecutar nada")
+
+def run_from_args(args):
+    stages = build_stages(replay=args.replay, incremental=args.incremental, db=args.db, max_age=args.max_age * 3600, stream=args.stream)
+    if args.list:
+        for stage in stages:
+            print(f"  {stage['name']:<16} ← {', '.join(stage['deps']) or '-'}")
+        return {}
+    return run_pipeline(stages, only=args.only, start=args.start, force=args.force, max_workers=args.workers)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flujo completo como grafo de etapas con caché")
+    add_arguments(parser)
+    run_from_args(parser.parse_args())
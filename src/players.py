@@ -0,0 +1,50 @@
+# players.py — Registro de jugadores: datos personales, fuente de datos y trayectoria por equipos
+
+import json
+from pathlib import Path
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+registry_path = project_root / "config/players.json"
+
+# Estructura de cada jugador en config/players.json:
+#   name, birthdate      -> nombre mostrado y fecha de nacimiento (YYYY-MM-DD)
+#   source, urls         -> fuente ('messistats' o 'fbref') y páginas de partidos por temporada
+#   national_team        -> selección: nombre, palabras clave en la competición y si se detecta por rival
+#   clubs                -> trayectoria ordenada; 'until' es la última temporada en el club (null = actual)
+#   season_overrides     -> intervalos de fechas con temporada forzada (p.ej. 2019-2020 por el COVID)
+#   image_prefix         -> prefijo de sus gráficos en images/ (por defecto '<id>_')
+
+_registry = None
+
+def load_registry():
+    """Devuelve el registro completo {id: jugador} (se lee una sola vez por proceso)."""
+    global _registry
+    if _registry is None:
+        with open(registry_path, encoding="utf-8") as f:
+            _registry = json.load(f)
+    return _registry
+
+def player_ids():
+    return list(load_registry())
+
+def get_player(player_id):
+    """Datos de un jugador con su id y las rutas de sus CSV crudo y limpio."""
+    registry = load_registry()
+    if player_id not in registry:
+        raise KeyError(f"Jugador desconocido: '{player_id}'. Disponibles: {', '.join(registry)}")
+    return dict(
+        registry[player_id],
+        id=player_id,
+        raw_path=project_root / "data/raw" / f"{player_id}_raw_data.csv",
+        cleaned_path=project_root / "data/processed" / f"{player_id}_cleaned_data.csv",
+    )
+
+def season_overrides(player):
+    """Excepciones de temporada como tuplas (inicio, fin, año_inicio) para asignar_temporadas."""
+    # pandas solo se importa aquí: leer el registro (p.ej. desde pipeline.py) no debe cargarlo
+    import pandas as pd
+    return [
+        (pd.Timestamp(o["start"]), pd.Timestamp(o["end"]), o["season_start"])
+        for o in player.get("season_overrides", [])
+    ]
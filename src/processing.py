@@ -1,70 +1,153 @@
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import argparse
+import hashlib
+import io
+import json
+import os
 import re
+import tempfile
+from contextlib import ExitStack
 
-# -------------------- FUNCIONES AUXILIARES --------------------
-
-# Determina el equipo del jugador en base a temporada, competición y equipos implicados
-def deducir_equipo_jugador(row, jugador="Messi"):
-    temporada = row["Season"]
-    comp = str(row["Competition"])
-    home = row["Home Team"]
-    away = row["Away Team"]
-
-    if pd.isna(temporada) or pd.isna(comp):
-        return "Unknown"
-
-    if jugador == "Messi":
-        # Argentina en cualquier competición internacional
-        if "argentina" in comp.lower() or home == "Argentina" or away == "Argentina":
-            return "Argentina"
-        elif temporada <= "2020-2021":
-            return "FC Barcelona"
-        elif temporada in ["2021-2022", "2022-2023"]:
-            return "Paris Saint-Germain"
-        elif temporada >= "2023-2024":
-            return "Inter Miami CF"
-    elif jugador == "Lamine":
-        # Si el partido es con selección, asignamos "Spain"
-        if "spain" in comp.lower() or home == "Spain" or away == "Spain":
-            return "Spain"
-        else:
-            return "FC Barcelona"
-
-    return "Unknown"
-
-# Extrae el equipo rival según la posición del jugador (local/visitante)
-def obtener_rival(row):
-    player_team = row["Player_Team"]
-    home = row["Home Team"]
-    away = row["Away Team"]
-
-    if pd.isna(player_team) or pd.isna(home) or pd.isna(away):
-        return None
-
-    if player_team == home and away != player_team:
-        return away
-    elif player_team == away and home != player_team:
-        return home
-    else:
-        return None
+import players
+from instrumentation import current, instrumented, run_and_flush
+from normalization import learned_version, load_aliases, normalize
+from players import get_player, season_overrides
+from schema import NUMERIC_COLUMNS, apply_schema, downcast_numbers, encode_categories, fixed_types, load_code_table, numeric_dtypes, numeric_stats, update_code_table
+from storage import _pyarrow, dataset_path, read_dataset, remove_other_formats, to_typed, write_dataset
 
-# -------------------- MESSI --------------------
+# Columnas del marcador que se añaden al final del dataset limpio de cualquier fuente
+SCORE_COLUMNS = ["Goals_For", "Goals_Against", "Outcome"]
 
-def process_data(input_rel="data/raw/messi_raw_data.csv", output_rel="data/processed/messi_cleaned_data.csv", return_df=False, decimal=","):
-    # Crea rutas relativas a raíz del proyecto
-    project_root = Path(__file__).resolve().parent.parent
-    input_path = project_root / input_rel
-    output_path = project_root / output_rel
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+# -------------------- FUNCIONES AUXILIARES --------------------
 
-    # Carga CSV crudo
-    df = pd.read_csv(input_path)
+def asignar_temporadas(fechas, excepciones=()):
+    """
+    Temporada futbolística (agosto-julio) de cada fecha, p.ej. '2019-2020'. None si no hay fecha.
+    excepciones: tuplas (inicio, fin, año_inicio) que fuerzan la temporada en ese intervalo de fechas.
+    """
+    year = fechas.dt.year
+    start = year.where(fechas.dt.month >= 8, year - 1)
+    for inicio, fin, año in excepciones:
+        start = start.mask(fechas.between(inicio, fin), año)
+
+    # Solo hay unas pocas temporadas distintas: se formatean una vez y se reparten por código
+    codes, uniques = pd.factorize(start)
+    etiquetas = np.array([f"{int(y)}-{int(y) + 1}" for y in uniques] + [None], dtype=object)
+    return pd.Series(etiquetas[codes], index=fechas.index, dtype=object)
+
+def calcular_edades(fechas, birthdate):
+    """Edad (años con 2 decimales y coma decimal, p.ej. '17,05') en cada fecha. '' si no hay fecha."""
+    # Se formatea una sola vez por fecha distinta, no por partido
+    codes, uniques = pd.factorize(fechas)
+    dias = (uniques - birthdate).days
+    etiquetas = np.array([f"{round(d / 365.25, 2):.2f}".replace(".", ",") for d in dias] + [""], dtype=object)
+    return pd.Series(etiquetas[codes], index=fechas.index, dtype=object)
+
+def por_valor_unico(serie, func):
+    """Aplica func a los valores distintos de la serie y reparte el resultado por código (los nulos se conservan)."""
+    codes, uniques = pd.factorize(serie)
+    resultado = func(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+    return pd.Series(resultado[codes], index=serie.index, dtype=object).where(codes != -1, serie)
+
+def convertir_fechas(textos, format, **kwargs):
+    """
+    pd.to_datetime parseando cada texto distinto una sola vez (los nulos quedan como NaT).
+    El formato es obligatorio: inferirlo de los valores de cada trozo (streaming) podría leer fechas distintas.
+    """
+    codes, uniques = pd.factorize(textos)
+    fechas = pd.DatetimeIndex(pd.to_datetime(uniques, format=format, **kwargs)).append(pd.DatetimeIndex([pd.NaT]))
+    return pd.Series(fechas[codes], index=textos.index)
+
+def segunda_linea(textos):
+    """Para textos con salto de línea se queda con la segunda línea ('🏆\\nLaLiga' -> 'LaLiga')."""
+    if textos.dtype != object:
+        return textos
+
+    def _limpiar(unicos):
+        con_salto = unicos.str.contains("\n", regex=False, na=False)
+        return unicos.where(~con_salto, unicos.str.split("\n").str[1].str.strip())
+
+    return por_valor_unico(textos, _limpiar)
+
+def extraer_marcador(resultados):
+    """Goles (primer número, segundo número) de cada resultado ('2-1', '3–1', '2–2 (4–3)') como float (NaN si no hay)."""
+    codes, uniques = pd.factorize(resultados)
+    partes = pd.Series(uniques, dtype=object).astype(str).str.extract(r"(\d+)\D+(\d+)").astype(float).to_numpy()
+    partes = np.vstack([partes.reshape(-1, 2), [[np.nan, np.nan]]])  # fila extra para los nulos (código -1)
+    return partes[codes, 0], partes[codes, 1]
+
+def añadir_marcador(df, resultados, propio_primero):
+    """
+    Añade Goals_For / Goals_Against (goles del equipo del jugador y del rival, enteros con nulos) y Outcome (W/D/L).
+    propio_primero: array/Series booleana (o escalar) que indica si el primer número del resultado es del equipo del jugador.
+    """
+    primero, segundo = extraer_marcador(resultados)
+    propio_primero = np.broadcast_to(np.asarray(propio_primero, dtype=bool), primero.shape)
+    a_favor = np.where(propio_primero, primero, segundo)
+    en_contra = np.where(propio_primero, segundo, primero)
+    df["Goals_For"] = pd.array(a_favor, dtype="Int8")
+    df["Goals_Against"] = pd.array(en_contra, dtype="Int8")
+    df["Outcome"] = np.select([a_favor > en_contra, a_favor < en_contra, a_favor == en_contra], ["W", "L", "D"], None)
+    return df
+
+# Determina el equipo del jugador en cada partido según su selección y su trayectoria de clubes
+def deducir_equipos(df, player, requiere_temporada=True):
+    temporada = df["Season"]
+    seleccion = player["national_team"]
+
+    # Partido con la selección: palabra clave en la competición o (si aplica) la selección como local/visitante
+    patron = "|".join(re.escape(k) for k in seleccion["competition_keywords"]) or "(?!)"
+    es_seleccion = por_valor_unico(
+        df["Competition"].astype(str), lambda comps: comps.str.lower().str.contains(patron)
+    ).astype(bool)
+    if seleccion["match_by_team"]:
+        es_seleccion |= (df["Home Team"] == seleccion["name"]) | (df["Away Team"] == seleccion["name"])
+
+    condiciones, equipos = [], []
+    if requiere_temporada:
+        condiciones.append(temporada.isna())
+        equipos.append("Unknown")
+    condiciones.append(es_seleccion)
+    equipos.append(seleccion["name"])
+
+    # Clubes en orden: el primero cuya última temporada no se ha superado (until=None es el club actual)
+    for club in player["clubs"]:
+        condiciones.append(temporada <= club["until"] if club["until"] else pd.Series(True, index=df.index))
+        equipos.append(club["team"])
+
+    return pd.Series(np.select(condiciones, equipos, default="Unknown"), index=df.index, dtype=object)
 
+# Extrae el equipo rival según la posición del jugador (local/visitante)
+def obtener_rivales(df):
+    player_team = df["Player_Team"]
+    home = df["Home Team"]
+    away = df["Away Team"]
+
+    validos = player_team.notna() & home.notna() & away.notna()
+    condiciones = [
+        validos & (player_team == home) & (away != player_team),
+        validos & (player_team == away) & (home != player_team),
+    ]
+    rivales = np.select(condiciones, [away.to_numpy(dtype=object), home.to_numpy(dtype=object)], default=None)
+    return pd.Series(rivales, index=df.index, dtype=object)
+
+# -------------------- FUENTE: MESSISTATS.COM --------------------
+
+def transform_messistats(df, player):
+    """Limpia y enriquece un CSV crudo de messistats.com (todas las columnas en operaciones vectorizadas)."""
     # Limpieza de columnas que vienen con saltos de línea
-    df["Competition"] = df["Competition"].apply(lambda x: x.split("\n")[1].strip() if isinstance(x, str) and "\n" in x else x)
-    df["Lineup"] = df["Lineup"].apply(lambda x: x.split("\n")[1].strip() if isinstance(x, str) and "\n" in x else x)
+    df["Competition"] = segunda_linea(df["Competition"])
+    df["Lineup"] = segunda_linea(df["Lineup"])
+
+    # Alias de config/aliases.json (sin búsqueda aproximada: messistats ya usa nombres completos). Cambia nombres
+    # publicados para unirlos con FBRef: 'Mallorca' -> 'Real Mallorca', 'Porto' -> 'FC Porto', 'Cadiz' -> 'Cádiz'...
+    df["Competition"] = normalize(df["Competition"], "competitions", fuzzy=False)
+    for col in ["Home Team", "Away Team"]:
+        df[col] = normalize(df[col], "teams", fuzzy=False)
 
     # Eliminar columnas innecesarias si existen
     df.drop(columns=["Index", "Jersey", "Extra"], inplace=True, errors="ignore")
@@ -74,179 +157,477 @@ def process_data(input_rel="data/raw/messi_raw_data.csv", output_rel="data/proce
         df[col] = pd.to_numeric(df[col], errors="coerce")
 
     # Convertir fechas
-    df["Date"] = pd.to_datetime(df["Date"], format="%d-%m-%Y", errors="coerce", dayfirst=True)
+    df["Date"] = convertir_fechas(df["Date"], "%d-%m-%Y", errors="coerce", dayfirst=True)
 
     # Crear columna de temporada (usando lógica de temporada futbolística)
-    def asignar_temporada(fecha):
-        if pd.isna(fecha):
-            return None
-        if datetime(2019, 8, 15) <= fecha <= datetime(2020, 8, 14):
-            return "2019-2020"
-        year = fecha.year
-        return f"{year}-{year + 1}" if fecha.month >= 8 else f"{year - 1}-{year}"
-
-    df["Season"] = df["Date"].apply(asignar_temporada)
+    df["Season"] = asignar_temporadas(df["Date"], excepciones=season_overrides(player))
 
-    # Edad de Messi en cada partido
-    birthdate = pd.to_datetime("1987-06-24")
-    df["Age"] = df["Date"].apply(lambda d: round((d - birthdate).days / 365.25, 2) if pd.notna(d) else None)
-    df["Player"] = "Leo Messi"  # columna fija de jugador
+    # Edad del jugador en cada partido, formateada con coma como decimal
+    df["Age"] = calcular_edades(df["Date"], pd.to_datetime(player["birthdate"]))
+    df["Player"] = player["name"]  # columna fija de jugador
 
     # Determinar equipo y local/visitante
-    df["Player_Team"] = df.apply(lambda row: deducir_equipo_jugador(row, "Messi"), axis=1)
-    df["Home/Away"] = df.apply(lambda row: "Home" if row["Home Team"] == row["Player_Team"] else "Away", axis=1)
+    df["Player_Team"] = deducir_equipos(df, player)
+    df["Home/Away"] = np.where(df["Home Team"] == df["Player_Team"], "Home", "Away")
 
     # Obtener nombre del equipo rival
-    df["Rival_Team_Name"] = df.apply(obtener_rival, axis=1)
+    df["Rival_Team_Name"] = obtener_rivales(df)
 
-    # Formatear edad con coma como decimal
-    df["Age"] = df["Age"].apply(lambda x: f"{x:.2f}".replace(".", ",") if pd.notna(x) else "")
+    # Marcador desde el punto de vista del jugador (messistats da el resultado como local-visitante)
+    añadir_marcador(df, df["Result"], propio_primero=df["Home/Away"] == "Home")
 
     # Reordenar columnas
-    cols = ["Date", "Season", "Age", "Player", "Player_Team", "Home/Away", "Competition", "Home Team", "Result", "Away Team", "Rival_Team_Name", "Lineup", "Minutes", "Goals", "Assists", "Cards"]
-    df = df[cols]
+    cols = ["Date", "Season", "Age", "Player", "Player_Team", "Home/Away", "Competition", "Home Team", "Result", "Away Team", "Rival_Team_Name", "Lineup", "Minutes", "Goals", "Assists", "Cards"] + SCORE_COLUMNS
+    return df[cols]
+
+# -------------------- FUENTE: FBREF --------------------
+
+def limpiar_resultados(resultados):
+    """
+    Marcador de FBRef sin la letra del resultado: 'W 3–1' -> '3–1', 'D 2–2 (4–3)' -> '2–2', '2' -> '2-2'.
+    Se limpia cada texto distinto una sola vez con métodos de texto vectorizados (los nulos quedan como None).
+    """
+    def _limpiar(unicos):
+        textos = unicos.astype(str).str.strip()
+        con_letra = textos.str[:1].isin(["W", "D", "L"])
+        marcador = textos.str.split(" ").str[1]
+        return textos.str.replace("–", "-", regex=False) \
+            .mask(textos.str.isdigit(), textos + "-" + textos) \
+            .mask(con_letra, marcador.astype(object).where(marcador.notna(), None))
+
+    return por_valor_unico(resultados, _limpiar).where(resultados.notna(), None)
+
+def transform_fbref(df_yamal, player):
+    """Limpia y enriquece un CSV crudo de match logs de FBRef (todas las columnas en operaciones vectorizadas)."""
+    df_yamal["Date"] = convertir_fechas(df_yamal["Date"], "%Y-%m-%d", errors="coerce")
+    venue_home = (df_yamal["Venue"] == "Home").to_numpy()
+
+    # Nombres canónicos de equipos (sin prefijo de país: "eng England" -> "England") y competiciones según config/aliases.json
+    squad = normalize(df_yamal["Squad"], "teams", strip_country=True).to_numpy(dtype=object)
+    opponent = normalize(df_yamal["Opponent"], "teams", strip_country=True).to_numpy(dtype=object)
+
+    df_cleaned = pd.DataFrame({
+        "Date": df_yamal["Date"],
+        "Season": asignar_temporadas(df_yamal["Date"], excepciones=season_overrides(player)),
+        "Age": calcular_edades(df_yamal["Date"], pd.to_datetime(player["birthdate"])),
+        "Player": player["name"],
+        "Home Team": np.where(venue_home, squad, opponent),
+        "Away Team": np.where(venue_home, opponent, squad),
+        "Competition": normalize(df_yamal["Comp"], "competitions"),
+        "Result": limpiar_resultados(df_yamal["Result"]),
+        "Lineup": np.where(df_yamal["Start"] == "Y", "Starter", "Substitute").astype(object),
+    }, index=df_yamal.index)
 
-    # Guardar CSV limpio
-    df.to_csv(output_path, index=False, sep=",", decimal=decimal, encoding="utf-8")
-    print(f"✅ Datos procesados guardados en: {output_path}")
+    # Conversión y renombrado de columnas numéricas
+    for col, name in [("Min", "Minutes"), ("Gls", "Goals"), ("Ast", "Assists"), ("CrdY", "Cards")]:
+        df_cleaned[name] = pd.to_numeric(df_yamal.get(col, 0), errors="coerce").fillna(0).astype(int)
+
+    # Deducción del equipo del jugador (FBRef no distingue la selección por rival, solo por competición)
+    df_cleaned["Player_Team"] = deducir_equipos(df_cleaned, player, requiere_temporada=False)
+    es_local = (df_cleaned["Home Team"] == df_cleaned["Player_Team"]).to_numpy()
+    df_cleaned["Home/Away"] = np.where(es_local, "Home", "Away").astype(object)
+    df_cleaned["Rival_Team_Name"] = np.where(es_local, df_cleaned["Away Team"], df_cleaned["Home Team"])
+
+    # En FBRef el marcador ya viene desde el punto de vista del equipo del jugador
+    return añadir_marcador(df_cleaned, df_cleaned["Result"], propio_primero=True)
+
+# -------------------- PIPELINE GENÉRICO --------------------
+
+# Transformación a aplicar según la fuente de datos de cada jugador
+TRANSFORMS = {
+    "messistats": transform_messistats,
+    "fbref": transform_fbref,
+}
+
+# Formatos en los que se guarda cada dataset limpio: CSV (Power BI) y Parquet tipado (análisis)
+OUTPUT_FORMATS = ("csv", "parquet")
+
+# Versión de la lógica de transformación: al cambiarla, el modo incremental reconstruye todo desde cero.
+# 3: los equipos y competiciones de messistats también pasan por la tabla de alias (cambian nombres publicados)
+TRANSFORM_VERSION = 3
+
+# -------------------- PROCESAMIENTO INCREMENTAL --------------------
+
+# Junto a cada dataset limpio se guardan:
+#   <limpio>.manifest.json    -> versión, bytes del CSV crudo ya procesados y su sha256, tipos de las columnas
+#   <limpio>.fingerprints.npy -> huella (hash) de cada fila cruda procesada, en el orden del CSV limpio
+# Las transformaciones son fila a fila, así que la fila limpia i solo depende de la fila cruda i.
+
+def _manifest_path(output_path):
+    return output_path.with_suffix(".manifest.json")
+
+def _fingerprints_path(output_path):
+    return output_path.with_suffix(".fingerprints.npy")
+
+def _sha256_prefix(path, size):
+    """sha256 de los primeros size bytes de un fichero (objeto hashlib, para poder seguir actualizándolo)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while size > 0 and (chunk := f.read(min(size, 1024 * 1024))):
+            digest.update(chunk)
+            size -= len(chunk)
+    return digest
+
+def fingerprint_rows(data, names=None):
+    """Huella de cada fila de un CSV crudo (bytes): hash de sus valores como texto, independiente de los tipos inferidos."""
+    options = dict(header=None, names=names) if names else {}
+    text = pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, **options)
+    return pd.util.hash_pandas_object(text, index=False).to_numpy()
+
+def _read_raw(data, manifest=None):
+    """DataFrame crudo desde bytes; con manifest (trozo final sin cabecera) usa sus columnas y tipos de texto."""
+    if manifest is None:
+        return pd.read_csv(io.BytesIO(data))
+    kinds = {"O": object, "f": np.float64}
+    dtypes = {col: kinds[kind] for col, kind in manifest["raw_dtypes"].items() if kind in kinds}
+    return pd.read_csv(io.BytesIO(data), header=None, names=manifest["raw_columns"], dtype=dtypes)
+
+def _align_numeric(df, kinds):
+    """
+    Ajusta las columnas numéricas de las filas nuevas al tipo del dataset existente (entero o float),
+    para que se escriban igual ('1' o '1,0'). None si hay nulos en una columna entera: hay que reconstruir.
+    """
+    for col, kind in kinds.items():
+        if col not in df or df[col].dtype.kind == kind:
+            continue
+        if kind == "i":
+            return None
+        df[col] = df[col].astype(np.float32)
+    return df
+
+def _transform(raw, player):
+    """Transformación de la fuente del jugador más el esquema compacto."""
+    return apply_schema(TRANSFORMS[player["source"]](raw, player))
+
+def _save_manifest(output_path, manifest, fingerprints):
+    np.save(_fingerprints_path(output_path), fingerprints)
+    _manifest_path(output_path).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+def _full_process(player, input_path, output_path, formats, decimal):
+    """Procesa el CSV crudo completo, reescribe el dataset limpio y deja el manifiesto listo para el modo incremental."""
+    data = input_path.read_bytes()
+    raw = _read_raw(data)
+    current().update(rows_in=len(raw), bytes=len(data))
+    df = TRANSFORMS[player["source"]](raw.copy(), player)
+
+    # Esquema compacto: categorías con códigos globales y números estrechos (el CSV no cambia)
+    df = apply_schema(df, report=player["name"])
+
+    # Guardar dataset limpio en los formatos pedidos
+    write_dataset(df, output_path, formats, decimal=decimal)
+    _save_manifest(output_path, {
+        "transform_version": TRANSFORM_VERSION,
+        "aliases_version": load_aliases()["version"],
+        "learned_version": learned_version(),
+        "formats": sorted(formats),
+        "decimal": decimal,
+        "raw_size": len(data),
+        "raw_sha256": hashlib.sha256(data).hexdigest(),
+        "raw_columns": list(raw.columns),
+        "raw_dtypes": {col: raw[col].dtype.kind for col in raw.columns},
+        "columns": list(df.columns),
+        "numeric_kinds": {col: df[col].dtype.kind for col in NUMERIC_COLUMNS if col in df},
+        "rows": len(df),
+    }, fingerprint_rows(data))
+    print(f"✅ Datos procesados guardados en: {output_path.with_suffix('')} ({', '.join(formats)})")
+    return df
+
+def _merge_columnar(output_path, formats, decimal, keep, new_typed, order):
+    """
+    Rehace los formatos columnares sin transformar nada: filas ya tipadas del Parquet/Arrow existente
+    (posiciones keep) más las filas nuevas, colocadas según order (posición final de cada fila).
+    """
+    columnar = [fmt for fmt in formats if fmt != "csv"]
+    if not columnar:
+        return
+    old = read_dataset(output_path, fmt=columnar[0]).iloc[keep]
+    # Sin filas nuevas no se concatena: el marco vacío no tiene tipos y pandas avisa al combinarlos
+    merged = pd.concat([old, new_typed], ignore_index=True) if len(new_typed) else old.reset_index(drop=True)
+    merged.index = order
+    merged = downcast_numbers(encode_categories(merged.sort_index().reset_index(drop=True)))
+    write_dataset(merged, output_path, columnar, decimal=decimal)
+
+def _incremental_process(player, input_path, output_path, formats, decimal):
+    """
+    Procesa solo las filas crudas nuevas o cambiadas y las integra en el dataset limpio existente.
+    - CSV crudo solo ampliado (lo normal con scraping incremental): se leen solo los bytes nuevos y se añaden al final.
+    - CSV crudo reescrito: las filas con huella conocida reutilizan su fila limpia y solo se transforman las demás.
+    Reconstruye todo si no hay manifiesto, cambió TRANSFORM_VERSION, la tabla de alias o los alias aprendidos, los formatos o el tipo de alguna columna.
+    """
+    manifest_path = _manifest_path(output_path)
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8")) if manifest_path.exists() else None
+    outputs = [dataset_path(output_path, fmt) for fmt in formats] + [_fingerprints_path(output_path)]
+    if manifest is None or not all(path.exists() for path in outputs) \
+            or manifest["transform_version"] != TRANSFORM_VERSION \
+            or manifest.get("aliases_version") != load_aliases()["version"] \
+            or manifest.get("learned_version") != learned_version() \
+            or manifest["formats"] != sorted(formats) or manifest["decimal"] != decimal:
+        print(f"🔁 {player['name']}: reconstrucción completa (sin manifiesto válido o nueva versión de la transformación)")
+        return _full_process(player, input_path, output_path, formats, decimal)
+
+    old_fingerprints = np.load(_fingerprints_path(output_path))
+    size = input_path.stat().st_size
+    digest = _sha256_prefix(input_path, manifest["raw_size"]) if size >= manifest["raw_size"] else None
+
+    if digest is not None and digest.hexdigest() == manifest["raw_sha256"]:
+        # Solo se añadieron filas al final del CSV crudo
+        with open(input_path, "rb") as f:
+            f.seek(manifest["raw_size"])
+            tail = f.read()
+        digest.update(tail)
+        if not tail.strip():
+            print(f"⏭️ {player['name']}: sin partidos nuevos")
+            return pd.DataFrame(columns=manifest["columns"])
+        raw = _read_raw(tail, manifest)
+        current().update(rows_in=len(raw), bytes=len(tail))
+        new = _align_numeric(_transform(raw, player), manifest["numeric_kinds"])
+        if new is None:
+            return _full_process(player, input_path, output_path, formats, decimal)
+
+        if "csv" in formats:
+            new.to_csv(dataset_path(output_path, "csv"), mode="a", header=False, index=False, sep=",", decimal=decimal, encoding="utf-8")
+        keep = np.arange(manifest["rows"])
+        _merge_columnar(output_path, formats, decimal, keep, to_typed(new), np.arange(manifest["rows"] + len(new)))
+        fingerprints = np.concatenate([old_fingerprints, fingerprint_rows(tail, manifest["raw_columns"])])
+        print(f"➕ {player['name']}: {len(new)} filas nuevas añadidas a {output_path.name}")
+    else:
+        # CSV crudo reescrito: reutilizar filas limpias por huella y transformar solo las nuevas o cambiadas
+        data = input_path.read_bytes()
+        digest = hashlib.sha256(data)
+        raw = _read_raw(data)
+        if list(raw.columns) != manifest["raw_columns"] or "csv" not in formats:
+            return _full_process(player, input_path, output_path, formats, decimal)
+
+        fingerprints = fingerprint_rows(data)
+        current().update(rows_in=len(raw), bytes=len(data))
+        known = pd.Series(np.arange(len(old_fingerprints)), index=old_fingerprints)
+        position = known[~known.index.duplicated()].reindex(fingerprints).to_numpy()
+        changed = np.isnan(position)
+        keep = position[~changed].astype(np.int64)
+
+        new = _align_numeric(_transform(raw[changed].copy(), player), manifest["numeric_kinds"]) if changed.any() \
+            else pd.DataFrame(columns=manifest["columns"])
+        if new is None:
+            return _full_process(player, input_path, output_path, formats, decimal)
+
+        # Filas limpias como texto: las reutilizadas tal cual y las nuevas con el mismo formato de escritura
+        csv_path = dataset_path(output_path, "csv")
+        text_options = dict(dtype=str, keep_default_na=False, na_values=[""])
+        old_text = pd.read_csv(csv_path, **text_options).iloc[keep]
+        new_text = pd.read_csv(io.StringIO(new.to_csv(index=False, sep=",", decimal=decimal)), **text_options)
+        order = np.concatenate([np.flatnonzero(~changed), np.flatnonzero(changed)])
+        merged = pd.concat([old_text, new_text], ignore_index=True)
+        merged.index = order
+        merged.sort_index().to_csv(csv_path, index=False, sep=",", encoding="utf-8")
+        _merge_columnar(output_path, formats, decimal, keep, to_typed(new), order)
+        print(f"🔀 {player['name']}: {int(changed.sum())} filas nuevas o cambiadas, {len(keep)} reutilizadas")
+
+    manifest.update(
+        raw_size=size if digest is not None else len(data),
+        raw_sha256=digest.hexdigest(),
+        rows=len(fingerprints),
+        learned_version=learned_version(),
+    )
+    _save_manifest(output_path, manifest, fingerprints)
+    return new
+
+# -------------------- PROCESAMIENTO EN STREAMING --------------------
+
+# Para CSV crudos que no caben en memoria: se leen por trozos de STREAM_CHUNK_ROWS filas (como texto, así todos
+# los trozos llegan con los mismos tipos) y cada trozo pasa por la misma transformación que el proceso completo.
+#   Pasada 1: se transforma cada trozo y se guarda en un directorio temporal, anotando solo lo que depende del
+#             fichero entero: la clave de cada partido (hash uint64 de MATCH_KEY), los valores nuevos de las
+#             categorías (tabla global) y los nulos y el rango de cada columna numérica.
+#   Pasada 2: se releen los trozos transformados y se escriben en cada formato según llegan, con las mismas
+#             categorías y tipos numéricos en todos (los que tendría el proceso completo).
+# En memoria solo hay un trozo y el índice de claves (8 bytes por fila más 1 de la marca de fila conservada).
+STREAM_CHUNK_ROWS = 100_000
+
+# Clave de un partido para descartar repetidos (el mismo criterio que la carga en base de datos)
+MATCH_KEY = ["Date", "Home Team", "Away Team"]
+
+def _raw_chunks(input_path, chunk_rows):
+    """Trozos del CSV crudo leídos como texto: los tipos los fija la transformación, igual en todos los trozos."""
+    with pd.read_csv(input_path, dtype=str, chunksize=chunk_rows) as reader:
+        yield from reader
+
+def _spooled_chunks(spool, keep):
+    """Trozos transformados de la pasada 1 con solo las filas que se conservan."""
+    start = 0
+    for path in spool:
+        df = pd.read_pickle(path)
+        mask = keep[start:start + len(df)]
+        start += len(df)
+        yield df if mask.all() else df[mask].copy()
+
+def _write_stream(chunks, output_path, formats, decimal):
+    """
+    Escribe los pares (trozo para el CSV, trozo tipado) según llegan en cada formato. Se escribe en ficheros .tmp
+    que sustituyen a los anteriores solo al terminar: un error a medias no deja el dataset limpio incompleto.
+    Devuelve las filas escritas.
+    """
+    paths = {fmt: dataset_path(output_path, fmt) for fmt in formats}
+    tmp_paths = {fmt: path.with_name(path.name + ".tmp") for fmt, path in paths.items()}
+    pa = _pyarrow() if set(formats) - {"csv"} else None
+    rows, schema = 0, None
+    with ExitStack() as stack:
+        csv_file = stack.enter_context(open(tmp_paths["csv"], "w", encoding="utf-8", newline="")) if "csv" in formats else None
+        writers = []
+        for k, (df, typed) in enumerate(chunks):
+            if csv_file:
+                df.to_csv(csv_file, index=False, header=k == 0, sep=",", decimal=decimal)
+            if pa:
+                if k == 0:
+                    table = pa.Table.from_pandas(typed, preserve_index=False)
+                    # Una columna de texto vacía en el primer trozo no puede quedar con tipo nulo
+                    schema = pa.schema([f.with_type(pa.string()) if pa.types.is_null(f.type) else f for f in table.schema],
+                                       metadata=table.schema.metadata)
+                    if "parquet" in formats:
+                        writers.append(stack.enter_context(pa.parquet.ParquetWriter(tmp_paths["parquet"], schema)))
+                    if "arrow" in formats:
+                        sink = stack.enter_context(pa.OSFile(str(tmp_paths["arrow"]), "wb"))
+                        writers.append(stack.enter_context(pa.ipc.new_file(sink, schema)))
+                table = pa.Table.from_pandas(typed, schema=schema, preserve_index=False)
+                for writer in writers:
+                    writer.write_table(table)
+            rows += len(df)
+    for fmt, path in paths.items():
+        tmp_paths[fmt].replace(path)
+    return rows
+
+def _stream_process(player, input_path, output_path, formats, decimal, chunk_rows=STREAM_CHUNK_ROWS, dedup=False):
+    """
+    Procesa el CSV crudo por trozos con memoria acotada (ver arriba). El resultado es el mismo que el del proceso
+    completo; con dedup=True se descartan los partidos repetidos (misma MATCH_KEY) quedándose con la última
+    versión, como drop_duplicates(keep="last"). Devuelve las filas escritas.
+    """
+    keys, chunk_stats, rows_in = [], [], 0
+    with tempfile.TemporaryDirectory(dir=output_path.parent) as tmp:
+        spool = []
+        for k, raw in enumerate(_raw_chunks(input_path, chunk_rows)):
+            rows_in += len(raw)
+            df = TRANSFORMS[player["source"]](raw, player)
+            update_code_table(df)
+            keys.append(pd.util.hash_pandas_object(df[MATCH_KEY], index=False).to_numpy())
+            chunk_stats.append(numeric_stats(df))
+            spool.append(Path(tmp) / f"{k}.pkl")
+            df.to_pickle(spool[-1])
+        current().update(rows_in=rows_in, bytes=input_path.stat().st_size)
+        if not spool:
+            return len(_full_process(player, input_path, output_path, formats, decimal))
+
+        keys = np.concatenate(keys)
+        keep = ~pd.Series(keys).duplicated(keep="last").to_numpy() if dedup else np.ones(len(keys), dtype=bool)
+        if not keep.all():
+            # Los tipos numéricos dependen solo de las filas que se conservan
+            chunk_stats = [numeric_stats(df) for df in _spooled_chunks(spool, keep)]
+            print(f"🧹 {player['name']}: {len(keep) - keep.sum()} partidos repetidos descartados")
+
+        table, dtypes = load_code_table(), numeric_dtypes(chunk_stats)
+
+        def typed_chunks():
+            for df in _spooled_chunks(spool, keep):
+                df = fixed_types(df, table, dtypes)
+                yield df, fixed_types(to_typed(df), table, dtypes)
+
+        rows = _write_stream(typed_chunks(), output_path, formats, decimal)
+
+    # El manifiesto del modo incremental ya no describe este dataset: la próxima vez se reconstruye entero
+    _manifest_path(output_path).unlink(missing_ok=True)
+    _fingerprints_path(output_path).unlink(missing_ok=True)
+    print(f"✅ Datos procesados por trozos guardados en: {output_path.with_suffix('')} ({', '.join(formats)}, {rows} filas)")
+    return rows
+
+@instrumented("process_player", labels=("player_id",))
+def process_player(player_id, input_rel=None, output_rel=None, return_df=True, decimal=",", formats=OUTPUT_FORMATS, incremental=False,
+                   stream=False, chunk_rows=STREAM_CHUNK_ROWS, dedup=False):
+    """
+    Procesa el CSV crudo de un jugador del registro y guarda su dataset limpio.
+    formats: cualquier combinación de 'csv', 'parquet' y 'arrow' (Arrow IPC, lectura mapeada en memoria).
+    incremental=True: solo transforma las filas crudas nuevas o cambiadas y devuelve únicamente esas filas.
+    stream=True: procesa por trozos de chunk_rows filas con memoria acotada y no devuelve el DataFrame;
+    dedup=True descarta además los partidos repetidos (solo en streaming).
+    """
+    player = get_player(player_id)
+    project_root = Path(__file__).resolve().parent.parent
+    input_path = project_root / input_rel if input_rel else player["raw_path"]
+    output_path = project_root / output_rel if output_rel else player["cleaned_path"]
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if stream:
+        if incremental:
+            raise ValueError("El modo incremental y el streaming no se pueden combinar")
+        current()["rows_out"] = _stream_process(player, input_path, output_path, formats, decimal, chunk_rows, dedup)
+        remove_other_formats(output_path, formats)
+        return None
+    if dedup:
+        raise ValueError("dedup solo está disponible en streaming (stream=True)")
+
+    process = _incremental_process if incremental else _full_process
+    df = process(player, input_path, output_path, formats, decimal)
+    # Solo quedan los formatos de esta ejecución: los lectores no pueden caer en una copia antigua
+    remove_other_formats(output_path, formats)
+    current()["rows_out"] = len(df)
     if return_df:
         return df
 
-# -------------------- LAMINE --------------------
-
-def process_lamine_data(input_rel="data/raw/lamine_raw_data.csv", output_rel="data/processed/lamine_cleaned_data.csv", return_df=True, decimal=","):
-    project_root = Path(__file__).resolve().parent.parent
-    input_path = project_root / input_rel
-    output_path = project_root / output_rel
-    output_path.parent.mkdir(parents=True, exist_ok=True)
+def combine_players(player_ids, output_path, decimal=",", formats=OUTPUT_FORMATS):
+    """
+    Une los datasets limpios ya guardados de varios jugadores en uno solo, sin volver a transformar.
+    El CSV combinado copia el texto de cada CSV por jugador (mismo formato de números y edades).
+    """
+    paths = [get_player(player_id)["cleaned_path"] for player_id in player_ids]
+    if "csv" in formats:
+        text = [pd.read_csv(path, dtype=str, keep_default_na=False, na_values=[""]) for path in paths]
+        csv_path = dataset_path(output_path, "csv")
+        pd.concat(text, ignore_index=True).to_csv(csv_path, index=False, sep=",", encoding="utf-8")
+    columnar = [fmt for fmt in formats if fmt != "csv"]
+    if columnar:
+        typed = [read_dataset(path, fmt=columnar[0]) for path in paths]
+        combined = downcast_numbers(encode_categories(pd.concat(typed, ignore_index=True)))
+        write_dataset(combined, output_path, columnar, decimal=decimal)
+    remove_other_formats(output_path, formats)
+
+def process_players(player_ids=None, output_rel="data/processed/players_cleaned_data.csv", max_workers=None, decimal=",", formats=OUTPUT_FORMATS, incremental=False,
+                    stream=False, chunk_rows=STREAM_CHUNK_ROWS, dedup=False):
+    """
+    Procesa varios jugadores del registro (todos por defecto) en paralelo, uno por proceso,
+    y une los resultados en un único CSV combinado. Devuelve {id: DataFrame limpio}
+    (con incremental=True, solo las filas nuevas o cambiadas de cada jugador; con stream=True, None).
+    """
+    player_ids = list(player_ids or players.player_ids())
+    workers = min(max_workers or os.cpu_count() or 1, len(player_ids))
+    process = partial(process_player, decimal=decimal, formats=formats, incremental=incremental, stream=stream, chunk_rows=chunk_rows, dedup=dedup)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(partial(run_and_flush, process), player_ids))
+    else:
+        frames = [process(player_id) for player_id in player_ids]
 
-    df_yamal = pd.read_csv(input_path)
-    birthdate = pd.to_datetime("2007-07-13")
+    # Dataset combinado de todos los jugadores procesados
+    output_path = Path(__file__).resolve().parent.parent / output_rel
+    combine_players(player_ids, output_path, decimal, formats)
+    print(f"✅ Dataset combinado ({len(player_ids)} jugadores) guardado en: {output_path}")
+    return dict(zip(player_ids, frames))
 
-    df_yamal["Date"] = pd.to_datetime(df_yamal["Date"], errors="coerce")
+# -------------------- MESSI Y LAMINE --------------------
 
-    def asignar_temporada(fecha):
-        if pd.isna(fecha):
-            return None
-        year = fecha.year
-        return f"{year}-{year + 1}" if fecha.month >= 8 else f"{year - 1}-{year}"
-
-    df_yamal["Season"] = df_yamal["Date"].apply(asignar_temporada)
-    df_yamal["Age"] = df_yamal["Date"].apply(lambda d: round((d - birthdate).days / 365.25, 2) if pd.notna(d) else None)
-    df_yamal["Lineup"] = df_yamal["Start"].apply(lambda s: "Starter" if s == "Y" else "Substitute")
-
-    # Limpiar nombres de equipos (ej: "eng England" -> "England")
-    df_yamal["Squad"] = df_yamal["Squad"].str.replace(r"^[a-z]{2,3}\s", "", regex=True)
-    df_yamal["Opponent"] = df_yamal["Opponent"].str.replace(r"^[a-z]{2,3}\s", "", regex=True)
-
-    # Corrección de nombres de equipos
-    TEAM_NAME_FIXES = {
-        "Barcelona": "FC Barcelona",
-        "Betis": "Real Betis",
-        "Athletic Club": "Athletic de Bilbao",
-        "Celta Vigo": "Celta de Vigo",
-        "Paris S-G": "Paris Saint-Germain",
-        "Shakhtar": "Shakhtar Donetsk",
-        "Almeria": "UD Almería",
-        "Porto": "FC Porto",
-        "Mallorca": "Real Mallorca",
-        "Antwerp": "Antwerp",
-        "Osasuna": "Osasuna",
-        "Napoli": "Napoli",
-        "Las Palmas": "Las Palmas",
-        "Granada": "Granada",
-        "Valencia": "Valencia",
-        "Real Sociedad": "Real Sociedad",
-        "Atlético Madrid": "Atlético Madrid",
-        "Real Madrid": "Real Madrid",
-        "Sevilla": "Sevilla",
-        "Girona": "Girona",
-        "Alavés": "Alavés",
-        "Rayo Vallecano": "Rayo Vallecano",
-        "Getafe": "Getafe",
-        "Cádiz": "Cádiz",
-        "Bayern Munich": "Bayern München",
-        "Young Boys": "Young Boys",
-        "Dortmund": "Borussia Dortmund",
-        "Red Star": "Red Star Belgrade",
-        "Valladolid": "Real Valladolid",
-        "Andorra": "Andorra",
-        "Cyprus": "Cyprus",
-        "Georgia": "Georgia",
-        "Denmark": "Denmark",
-        "Serbia": "Serbia",
-        "Monaco": "AS Monaco",
-        "Atalanta": "Atalanta",
-        "England": "England",
-        "Northern Ireland": "Northern Ireland"
-    }
-
-    df_yamal["Squad"] = df_yamal["Squad"].replace(TEAM_NAME_FIXES)
-    df_yamal["Opponent"] = df_yamal["Opponent"].replace(TEAM_NAME_FIXES)
-
-    def limpiar_resultado(valor):
-        if pd.isna(valor):
-            return None
-        valor = str(valor).strip()
-        if valor.startswith(("W", "D", "L")):
-            partes = valor.split(" ")
-            return partes[1] if len(partes) > 1 else None
-        if valor.isdigit():
-            return f"{valor}-{valor}"
-        return valor.replace("–", "-")
-
-    df_yamal["Result"] = df_yamal["Result"].apply(limpiar_resultado)
-
-    # Correcciones de nombres de competiciones
-    COMP_FIXES = {
-        "La Liga": "La Liga",
-        "Champions Lg": "UEFA Champions League",
-        "Copa del Rey": "Copa del Rey",
-        "Supercopa de España": "Spanish Super Cup",
-        "Friendlies (M)": "International friendly",
-        "UEFA Nations League": "UEFA Nations League",
-        "UEFA Euro Qualifying": "UEFA Euro Qualification",
-        "UEFA Euro": "UEFA Euro"
-    }
-    df_yamal["Comp"] = df_yamal["Comp"].replace(COMP_FIXES)
-
-    # Construcción del nuevo dataframe limpio
-    df_cleaned = pd.DataFrame()
-    df_cleaned["Date"] = df_yamal["Date"]
-    df_cleaned["Season"] = df_yamal["Season"]
-    df_cleaned["Age"] = df_yamal["Age"].apply(lambda x: f"{x:.2f}".replace(".", ",") if pd.notna(x) else "")
-    df_cleaned["Player"] = "Lamine Yamal"
-
-    df_cleaned["Home Team"] = df_yamal.apply(lambda row: row["Squad"] if row["Venue"] == "Home" else row["Opponent"], axis=1)
-    df_cleaned["Away Team"] = df_yamal.apply(lambda row: row["Opponent"] if row["Venue"] == "Home" else row["Squad"], axis=1)
-    df_cleaned["Competition"] = df_yamal["Comp"]
-    df_cleaned["Result"] = df_yamal["Result"]
-    df_cleaned["Lineup"] = df_yamal["Lineup"]
+def process_data(input_rel="data/raw/messi_raw_data.csv", output_rel="data/processed/messi_cleaned_data.csv", return_df=False, decimal=",", formats=OUTPUT_FORMATS):
+    return process_player("messi", input_rel, output_rel, return_df, decimal, formats)
 
-    # Conversión y renombrado de columnas numéricas
-    for col in ["Min", "Gls", "Ast", "CrdY"]:
-        df_cleaned[col] = pd.to_numeric(df_yamal.get(col, 0), errors="coerce").fillna(0).astype(int)
-
-    df_cleaned.rename(columns={
-        "Min": "Minutes",
-        "Gls": "Goals",
-        "Ast": "Assists",
-        "CrdY": "Cards"
-    }, inplace=True)
-
-    # Deducción del equipo de Lamine
-    df_cleaned["Player_Team"] = df_cleaned.apply(lambda row: "Spain" if "international" in row["Competition"].lower() else "FC Barcelona", axis=1)
-    df_cleaned["Home/Away"] = df_cleaned.apply(lambda row: "Home" if row["Home Team"] == row["Player_Team"] else "Away", axis=1)
-    df_cleaned["Rival_Team_Name"] = df_cleaned.apply(lambda row: row["Away Team"] if row["Player_Team"] == row["Home Team"] else row["Home Team"], axis=1)
-
-    # Guardar CSV limpio
-    df_cleaned.to_csv(output_path, index=False, sep=",", encoding="utf-8", decimal=decimal)
-    print(f"✅ Datos procesados guardados en: {output_path}")
-    if return_df:
-        return df_cleaned
+def process_lamine_data(input_rel="data/raw/lamine_raw_data.csv", output_rel="data/processed/lamine_cleaned_data.csv", return_df=True, decimal=",", formats=OUTPUT_FORMATS):
+    return process_player("lamine", input_rel, output_rel, return_df, decimal, formats)
 
 # -------------------- EJECUCIÓN --------------------
 
 if __name__ == "__main__":
-    process_data()
-    process_lamine_data()
+    parser = argparse.ArgumentParser(description="Procesamiento de los jugadores del registro")
+    parser.add_argument("players", nargs="*", help="Ids de config/players.json (todos por defecto)")
+    parser.add_argument("--formats", nargs="+", default=list(OUTPUT_FORMATS), choices=["csv", "parquet", "arrow"], help="Formatos de salida")
+    parser.add_argument("--incremental", action="store_true", help="Transformar solo las filas crudas nuevas o cambiadas")
+    parser.add_argument("--stream", action="store_true", help="Procesar por trozos con memoria acotada (CSV crudos muy grandes)")
+    parser.add_argument("--chunk-rows", type=int, default=STREAM_CHUNK_ROWS, help="Filas por trozo en streaming")
+    parser.add_argument("--dedup", action="store_true", help="En streaming, descartar partidos repetidos (fecha y equipos) quedándose con el último")
+    args = parser.parse_args()
+    process_players(args.players, formats=args.formats, incremental=args.incremental, stream=args.stream, chunk_rows=args.chunk_rows, dedup=args.dedup)
@@ -0,0 +1,199 @@
+# reader.py — Lectura desde la base de datos: partidos en streaming por trozos tipados y resúmenes precalculados
+
+import argparse
+
+import pandas as pd
+from sqlalchemy import func, select
+
+from cube import CUBE_COLUMNS, build_cube, merge_cubes
+from db import get_engine
+from instrumentation import instrumented, measure
+from loader import competitions_table, create_tables, matches_table, players_table, teams_table, totals_table
+from players import get_player, player_ids
+from schema import NUMERIC_COLUMNS, fixed_types, load_code_table, numeric_dtypes
+
+# Filas por trozo: el cursor del servidor entrega los partidos de CHUNK_ROWS en CHUNK_ROWS
+CHUNK_ROWS = 50_000
+
+# Columnas del dataset limpio que se pueden leer de la base de datos: (tabla de nombres, columna de matches).
+# Los equipos y competiciones se guardan normalizados por id: cada columna pedida añade su JOIN.
+COLUMNS = {
+    "Date": (None, "date"),
+    "Season": (None, "season"),
+    "Age": (None, "age"),
+    "Player": (players_table, "player_id"),
+    "Player_Team": (teams_table, "player_team_id"),
+    "Home/Away": (None, "home_away"),
+    "Competition": (competitions_table, "competition_id"),
+    "Home Team": (teams_table, "home_team_id"),
+    "Result": (None, "result"),
+    "Away Team": (teams_table, "away_team_id"),
+    "Rival_Team_Name": (teams_table, "rival_team_id"),
+    "Lineup": (None, "lineup"),
+    "Minutes": (None, "minutes"),
+    "Goals": (None, "goals"),
+    "Assists": (None, "assists"),
+    "Cards": (None, "cards"),
+}
+
+# Dimensiones y medidas del resumen precalculado (mismos nombres que el cubo)
+SUMMARY_DIMENSIONS = {"Player": "player_id", "Season": "season", "Competition": "competition_id"}
+SUMMARY_MEASURES = {
+    "Matches": "matches", "Goals": "goals", "Assists": "assists", "Minutes": "minutes",
+    "Cards": "cards", "Goals_N": "goals_n", "Minutes_N": "minutes_n",
+}
+
+# -------------------- CONSULTAS --------------------
+
+def _as_list(value):
+    return None if value is None else [value] if isinstance(value, str) else list(value)
+
+def _filters(columns, players=None, seasons=None, competitions=None, date_from=None, date_to=None):
+    """
+    Condiciones WHERE sobre las columnas de matches o match_totals (columns = su .c): jugadores por id,
+    temporadas y competiciones por nombre (subconsulta sobre competitions, sin JOIN) y rango de fechas.
+    """
+    where = []
+    if players is not None:
+        where.append(columns.player_id.in_(_as_list(players)))
+    if seasons is not None:
+        where.append(columns.season.in_(_as_list(seasons)))
+    if competitions is not None:
+        ids = select(competitions_table.c.competition_id).where(competitions_table.c.name.in_(_as_list(competitions)))
+        where.append(columns.competition_id.in_(ids))
+    if date_from is not None:
+        where.append(columns.date >= pd.Timestamp(date_from).date())
+    if date_to is not None:
+        where.append(columns.date <= pd.Timestamp(date_to).date())
+    return where
+
+def matches_query(columns=None, **filters):
+    """
+    SELECT de partidos con solo las columnas pedidas (nombres del dataset limpio) y los filtros en el WHERE.
+    Orden de la clave primaria (jugador, fecha, local, visitante): se recorre el índice sin ordenar en memoria.
+    """
+    columns = list(columns or COLUMNS)
+    unknown = set(columns) - set(COLUMNS)
+    if unknown:
+        raise ValueError(f"Columnas no disponibles en la base de datos: {', '.join(sorted(unknown))}")
+    m = matches_table.c
+    source, selected = matches_table, []
+    for name in columns:
+        table, column = COLUMNS[name]
+        if table is None:
+            selected.append(m[column].label(name))
+            continue
+        # Un alias por columna: local, visitante, equipo propio y rival salen de la misma tabla de equipos
+        alias = table.alias(f"{column}_names")
+        source = source.outerjoin(alias, list(alias.primary_key)[0] == m[column])
+        selected.append(alias.c.name.label(name))
+    return select(*selected).select_from(source).where(*_filters(m, **filters)).order_by(*matches_table.primary_key.columns)
+
+def _numeric_stats(conn, columns, filters):
+    """Nulos, mínimo y máximo de las columnas numéricas pedidas, agregados en la base de datos (una fila)."""
+    m = matches_table.c
+    numeric = [c for c in columns if c in NUMERIC_COLUMNS]
+    if not numeric:
+        return {}
+    aggregates = []
+    for name in numeric:
+        column = m[COLUMNS[name][1]]
+        aggregates += [(func.count() - func.count(column)), func.min(column), func.max(column)]
+    row = conn.execute(select(*aggregates).where(*_filters(m, **filters))).one()
+    return {name: (bool(row[3 * k]), row[3 * k + 1], row[3 * k + 2]) for k, name in enumerate(numeric)}
+
+def stream_matches(columns=None, chunk_rows=CHUNK_ROWS, engine=None, **filters):
+    """
+    Generador de trozos tipados (DataFrames de como mucho chunk_rows filas) con los partidos que cumplen los filtros
+    (players, seasons, competitions, date_from, date_to). La consulta usa un cursor del servidor (stream_results):
+    ni la base de datos ni el driver envían el resultado entero de golpe.
+    Todos los trozos tienen los mismos tipos que tendría el resultado completo en read_dataset: categorías con
+    la tabla global de códigos y cada número con el tipo de toda la consulta (calculado antes con MIN/MAX en SQL).
+    La medida 'stream_matches' cubre el recorrido entero (incluido el tiempo de quien consume los trozos) y sus filas.
+    """
+    engine = engine or get_engine()
+    columns = list(columns or COLUMNS)
+    table = load_code_table()
+    with measure("stream_matches") as record, engine.connect() as conn:
+        record["rows_out"] = 0
+        dtypes = numeric_dtypes([_numeric_stats(conn, columns, filters)])
+        result = conn.execution_options(stream_results=True, max_row_buffer=chunk_rows).execute(matches_query(columns, **filters))
+        for rows in result.partitions(chunk_rows):
+            chunk = pd.DataFrame.from_records(rows, columns=columns)
+            if "Date" in chunk:
+                chunk["Date"] = pd.to_datetime(chunk["Date"])
+            if "Age" in chunk:
+                chunk["Age"] = chunk["Age"].astype("float64")
+            record["rows_out"] += len(chunk)
+            yield fixed_types(chunk, table, dtypes)
+
+def read_matches(columns=None, chunk_rows=CHUNK_ROWS, engine=None, **filters):
+    """Partidos filtrados en un solo DataFrame tipado (para resultados que caben en memoria)."""
+    chunks = list(stream_matches(columns, chunk_rows, engine, **filters))
+    if not chunks:
+        return fixed_types(pd.DataFrame({c: pd.Series(dtype=object) for c in columns or COLUMNS}), load_code_table(), {})
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+
+@instrumented("load_cube_db", labels=("player_id",))
+def load_cube_db(player_id, engine=None, chunk_rows=CHUNK_ROWS):
+    """Cubo de análisis de un jugador leído de la base de datos: un cubo por trozo y se unen (memoria acotada)."""
+    return merge_cubes(build_cube(chunk) for chunk in stream_matches(CUBE_COLUMNS, chunk_rows, engine, players=player_id))
+
+# -------------------- RESUMEN PRECALCULADO --------------------
+
+def summary(by=("Player",), engine=None, **filters):
+    """
+    Totales desde la tabla de resumen match_totals agrupados por by (Player, Season, Competition), con los filtros
+    en el WHERE (players, seasons, competitions). Columnas como las del cubo: Matches, Goals, Assists, Minutes...
+    """
+    by = _as_list(by)
+    unknown = set(by) - set(SUMMARY_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Dimensiones no disponibles en el resumen: {', '.join(sorted(unknown))}")
+    engine = engine or get_engine()
+    create_tables(engine)
+    t = totals_table.c
+    source, keys = totals_table, []
+    for name in by:
+        column = t[SUMMARY_DIMENSIONS[name]]
+        if name == "Player":
+            source = source.join(players_table, players_table.c.player_id == column)
+            column = players_table.c.name
+        elif name == "Competition":
+            source = source.outerjoin(competitions_table, competitions_table.c.competition_id == column)
+            column = competitions_table.c.name
+        keys.append(column.label(name))
+    measures = [func.sum(t[column]).label(name) for name, column in SUMMARY_MEASURES.items()]
+    query = select(*keys, *measures).select_from(source).where(*_filters(t, **filters))
+    if keys:
+        query = query.group_by(*keys).order_by(*keys)
+    with engine.connect() as conn:
+        df = pd.DataFrame(conn.execute(query).all(), columns=by + list(SUMMARY_MEASURES))
+    df[list(SUMMARY_MEASURES)] = df[list(SUMMARY_MEASURES)].fillna(0).astype("int64")
+    return df.set_index(by) if by else df
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resúmenes, análisis y gráficos leídos de la base de datos")
+    parser.add_argument("players", nargs="*", help="Ids de config/players.json (todos por defecto)")
+    parser.add_argument("--url", help="URL de SQLAlchemy (por defecto DATABASE_URL o la MySQL del .env)")
+    parser.add_argument("--by", nargs="+", default=["Player", "Season"], choices=list(SUMMARY_DIMENSIONS), help="Dimensiones del resumen")
+    parser.add_argument("--season", nargs="+", help="Filtrar temporadas")
+    parser.add_argument("--competition", nargs="+", help="Filtrar competiciones")
+    parser.add_argument("--charts", action="store_true", help="Generar también el análisis y los gráficos desde la base de datos")
+    args = parser.parse_args()
+
+    engine = get_engine(args.url)
+    ids = args.players or player_ids()
+    print(summary(args.by, engine, players=ids, seasons=args.season, competitions=args.competition).to_string())
+    if args.charts:
+        from analysis import RESUMENES
+        from render import chart_tasks, images_path, render_tasks
+
+        for player_id in ids:
+            print(f"\n📊 Análisis {get_player(player_id)['name']} (base de datos):")
+            cubo = load_cube_db(player_id, engine)
+            for resumen in RESUMENES[get_player(player_id)["source"]]:
+                resumen(cubo)
+        render_tasks([task for player_id in ids for task in chart_tasks(player_id, engine)], images_path)
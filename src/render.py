@@ -0,0 +1,141 @@
+# render.py — Generación en lote de los gráficos: sin backend interactivo, en paralelo y solo si cambian los datos
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+from analysis import CHARTS, COLUMNAS_EDAD, images_path, load_player_data
+from cube import load_cube
+from instrumentation import instrumented, run_and_flush
+from locks import file_lock
+from players import get_player, player_ids
+
+# Se incrementa al cambiar el estilo de los gráficos: fuerza a regenerarlos todos
+RENDER_VERSION = 1
+
+# Fichero (en la carpeta de salida) con el hash de los datos con los que se generó cada imagen
+STATE_FILE = ".render_state.json"
+
+# -------------------- TAREAS --------------------
+
+def _data_hash(datos, *extra):
+    """Hash de los datos agregados de un gráfico (valores, índice y columnas) más su título/versión."""
+    digest = hashlib.sha256(json.dumps([RENDER_VERSION, *extra]).encode())
+    digest.update(pd.util.hash_pandas_object(datos, index=True).to_numpy().tobytes())
+    columns = list(datos.columns) if isinstance(datos, pd.DataFrame) else [datos.name]
+    digest.update(repr([str(i) for i in [datos.index.name, *columns]]).encode())
+    return digest.hexdigest()
+
+def chart_tasks(player_id, engine=None):
+    """
+    Gráficos de un jugador: [{archivo, dibujar, datos, nombre, hash}] con los datos ya cortados del cubo.
+    Con engine los datos se leen de la base de datos (cubo por trozos y solo las columnas por edad) en vez de los ficheros.
+    """
+    player = get_player(player_id)
+    charts = CHARTS[player["source"]]
+    prefix = player.get("image_prefix", f"{player_id}_")
+    por_filas = any(f == "filas" for _, f, _, _ in charts)
+
+    if engine is None:
+        cubo = load_cube(player_id)
+        filas = load_player_data(player_id, COLUMNAS_EDAD) if por_filas else None
+    else:
+        from reader import load_cube_db, read_matches
+        cubo = load_cube_db(player_id, engine)
+        filas = read_matches(COLUMNAS_EDAD, engine=engine, players=player_id) if por_filas else None
+
+    tasks = []
+    for template, fuente, datos_fn, dibujar in charts:
+        datos = datos_fn(cubo if fuente == "cubo" else filas)
+        archivo = template.format(prefix=prefix, id=player_id)
+        tasks.append({
+            "archivo": archivo,
+            "dibujar": dibujar,
+            "datos": datos,
+            "nombre": player["name"],
+            "hash": _data_hash(datos, archivo, dibujar.__name__, player["name"]),
+        })
+    return tasks
+
+# -------------------- DIBUJO --------------------
+
+def _init_worker():
+    # Cada proceso dibuja sin ventanas: backend Agg (PNG en memoria)
+    import matplotlib
+    matplotlib.use("Agg")
+
+def render_chart(task, output_dir=images_path):
+    """Dibuja un gráfico en una Figure propia (sin el estado global de pyplot) y lo guarda en output_dir."""
+    fig = Figure()
+    ax = fig.add_subplot()
+    task["dibujar"](task["datos"], ax, task["nombre"])
+    fig.tight_layout()
+    fig.savefig(output_dir / task["archivo"])
+    return task["archivo"]
+
+# -------------------- LOTE --------------------
+
+def _load_state(output_dir):
+    state_path = output_dir / STATE_FILE
+    if not state_path.exists():
+        return {}
+    return json.loads(state_path.read_text(encoding="utf-8"))
+
+def _save_state(output_dir, state):
+    tmp_path = output_dir / f"{STATE_FILE}.tmp"
+    tmp_path.write_text(json.dumps(state, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp_path, output_dir / STATE_FILE)
+
+@instrumented("render_tasks")
+def render_tasks(tasks, output_dir=images_path, max_workers=None, force=False):
+    """
+    Dibuja las tareas de gráficos repartidas en un pool de procesos.
+    Un gráfico solo se vuelve a dibujar si cambió el hash de sus datos agregados o falta la imagen (force=True: todos).
+    Devuelve la lista de imágenes generadas.
+    """
+    state = _load_state(output_dir)
+    pending = [
+        t for t in tasks
+        if force or state.get(t["archivo"]) != t["hash"] or not (output_dir / t["archivo"]).exists()
+    ]
+    if not pending:
+        print(f"⏭️ Gráficos sin cambios ({len(tasks)}): no se regenera ninguno")
+        return []
+
+    workers = min(max_workers or os.cpu_count() or 1, len(pending))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            written = list(pool.map(partial(run_and_flush, render_chart, output_dir=output_dir), pending))
+    else:
+        written = [render_chart(task, output_dir) for task in pending]
+
+    # Se relee el estado bajo bloqueo: varios procesos pueden estar dibujando jugadores distintos a la vez
+    with file_lock(output_dir / STATE_FILE):
+        state = _load_state(output_dir)
+        for task in pending:
+            state[task["archivo"]] = task["hash"]
+            print(f"🖼️ Guardado: {task['archivo']}")
+        _save_state(output_dir, state)
+    print(f"✅ {len(written)} gráficos generados, {len(tasks) - len(written)} sin cambios")
+    return written
+
+def render_players(ids=None, max_workers=None, force=False):
+    """Genera en images/ los gráficos de varios jugadores del registro (todos por defecto)."""
+    tasks = [task for player_id in (ids or player_ids()) for task in chart_tasks(player_id)]
+    return render_tasks(tasks, images_path, max_workers, force)
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generación de gráficos en lote")
+    parser.add_argument("players", nargs="*", help="Ids de config/players.json (todos por defecto)")
+    parser.add_argument("--workers", type=int, help="Procesos para dibujar (por defecto, uno por núcleo)")
+    parser.add_argument("--force", action="store_true", help="Regenerar todos los gráficos aunque no cambien los datos")
+    args = parser.parse_args()
+    render_players(args.players, args.workers, args.force)
@@ -0,0 +1,204 @@
+# rolling.py — Ventanas móviles, rachas y curvas acumuladas de carrera por jugador (sumas acumuladas y RLE con NumPy)
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cube import dataset_fingerprint
+from instrumentation import instrumented
+from players import get_player
+from storage import _pyarrow, read_dataset
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+rolling_path = project_root / "data/processed/rolling"
+
+# Se incrementa al cambiar columnas o ventanas: invalida los resultados guardados
+ROLLING_VERSION = 1
+
+# Medidas con ventana móvil y curva acumulada
+MEASURES = ["Goals", "Assists", "Minutes"]
+
+# Ventanas por defecto: últimos N partidos y últimos N días (incluido el día del partido)
+MATCH_WINDOWS = (5, 10)
+DAY_WINDOWS = (30, 365)
+MAX_WINDOW_DAYS = 10_000
+
+ROLLING_COLUMNS = ["Date", "Player"] + MEASURES
+
+# Todo se calcula sobre las filas ordenadas por (jugador, fecha): cada jugador es un tramo contiguo
+# y group_start[i] es la primera fila del tramo de la fila i. Una suma móvil es la diferencia de dos
+# posiciones de la suma acumulada y una racha es la distancia al inicio de su tramo de valores iguales (RLE).
+
+# -------------------- PREPARACIÓN --------------------
+
+def _prepare(df, columns=None):
+    """
+    Filas con fecha ordenadas por jugador y fecha (solo las columnas pedidas), con el código de jugador de cada fila,
+    una clave de orden entera (jugador, días) e inicio de tramo. En la clave cada jugador ocupa un intervalo de días
+    propio separado por más de MAX_WINDOW_DAYS, así un rango de días nunca cruza de un jugador a otro.
+    """
+    df = df[df["Date"].notna()]
+    codes, players = pd.factorize(df["Player"], sort=True)
+    days = df["Date"].to_numpy(dtype="datetime64[ns]").astype("datetime64[D]").astype(np.int64)
+    days = days - days.min(initial=0)
+    span = int(days.max(initial=0)) + MAX_WINDOW_DAYS + 1
+    key = codes.astype(np.int64) * span + days
+    order = np.argsort(key, kind="stable")  # estable: partidos del mismo día conservan su orden
+    key, codes = key[order], codes[order]
+    columns = [c for c in (columns or df.columns) if c in df and c != "Player"]
+    df = df[columns].take(order).reset_index(drop=True)
+    df.insert(1 if "Date" in columns else 0, "Player", pd.Categorical.from_codes(codes, players))
+
+    n = len(df)
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if n else np.empty(0, dtype=np.int64)
+    group_start = np.repeat(starts, np.diff(np.r_[starts, n]))
+    return df, key, group_start
+
+def _values(df, measure):
+    """Medida como float64 con los nulos a 0 (como suma pandas)."""
+    return np.nan_to_num(df[measure].to_numpy(dtype=np.float64, na_value=np.nan))
+
+def _cumsum(values):
+    return np.concatenate([[0.0], np.cumsum(values)])
+
+def _window_sum(cs, lo, hi):
+    """Suma de values[lo:hi] para cada fila a partir de la suma acumulada cs (con 0 inicial)."""
+    return cs[hi] - cs[lo]
+
+def _as_measure(result, like):
+    # Las medidas enteras siguen siendo enteras (las sumas en float64 son exactas hasta 2**53)
+    return result.astype(np.int64) if pd.api.types.is_integer_dtype(like) else result
+
+# -------------------- RACHAS (RLE) --------------------
+
+def _runs(cond, group_start):
+    """
+    Run-length encoding de una condición por tramo de jugador: (inicio de cada racha, longitud hasta cada fila).
+    Una racha empieza donde cambia la condición o donde empieza un jugador.
+    """
+    n = len(cond)
+    idx = np.arange(n)
+    breaks = np.ones(n, dtype=bool)
+    breaks[1:] = cond[1:] != cond[:-1]
+    breaks |= group_start == idx
+    run_starts = np.flatnonzero(breaks)
+    run_id = np.cumsum(breaks) - 1
+    return run_starts, idx - run_starts[run_id] + 1
+
+def streak_lengths(cond, group_start):
+    """Longitud de la racha en curso en cada fila donde se cumple la condición (0 donde no)."""
+    _, length = _runs(cond, group_start)
+    return np.where(cond, length, 0)
+
+def streaks(df, measure="Goals", scoring=True, min_length=1, top=None):
+    """
+    Rachas de cada jugador: partidos seguidos con la medida > 0 (scoring=True) o sin ella (sequías).
+    Devuelve una fila por racha con jugador, fechas de inicio y fin, partidos y total de la medida,
+    de la más larga a la más corta.
+    """
+    df, _, group_start = _prepare(df, ["Date", measure])
+    values = _values(df, measure)
+    cond = values > 0
+    run_starts, _ = _runs(cond, group_start)
+    run_ends = np.r_[run_starts[1:], len(df)] - 1
+    keep = (cond[run_starts] == scoring) & (run_ends - run_starts + 1 >= min_length)
+    run_starts, run_ends = run_starts[keep], run_ends[keep]
+
+    cs = _cumsum(values)
+    result = pd.DataFrame({
+        "Player": df["Player"].to_numpy()[run_starts],
+        "Start": df["Date"].to_numpy()[run_starts],
+        "End": df["Date"].to_numpy()[run_ends],
+        "Matches": run_ends - run_starts + 1,
+        measure: _as_measure(_window_sum(cs, run_starts, run_ends + 1), df[measure]),
+    })
+    result = result.sort_values(["Matches", "Start"], ascending=[False, True], kind="stable").reset_index(drop=True)
+    return result.head(top) if top else result
+
+# -------------------- VENTANAS Y CURVAS --------------------
+
+def rolling_matches(values, group_start, n):
+    """Suma de los últimos n partidos de cada jugador (incluido el actual) para cada fila."""
+    idx = np.arange(len(values))
+    return _window_sum(_cumsum(values), np.maximum(idx - n + 1, group_start), idx + 1)
+
+def rolling_days(values, key, window):
+    """Suma de los partidos de los últimos 'window' días (fecha - window, fecha] de cada jugador para cada fila."""
+    if window > MAX_WINDOW_DAYS:
+        raise ValueError(f"Ventana de {window} días: el máximo es {MAX_WINDOW_DAYS}")
+    lo = np.searchsorted(key, key - window, side="right")
+    return _window_sum(_cumsum(values), lo, np.arange(len(values)) + 1)
+
+@instrumented("rolling_metrics")
+def rolling_metrics(df, match_windows=MATCH_WINDOWS, day_windows=DAY_WINDOWS, measures=MEASURES):
+    """
+    Métricas por partido de uno o varios jugadores, ordenadas por jugador y fecha (sin los partidos sin fecha):
+      <medida>_last<N>    suma de los últimos N partidos          <medida>_<N>d   suma de los últimos N días
+      Career_<medida>     acumulado de la carrera                 Career_Matches  partidos disputados hasta la fecha
+      Scoring_Streak      partidos seguidos marcando              Assist_Streak   partidos seguidos asistiendo
+      Scoreless_Run       partidos seguidos sin marcar (sequía)
+    """
+    measures = [m for m in measures if m in df]
+    df, key, group_start = _prepare(df, ["Date"] + measures)
+    idx = np.arange(len(df))
+
+    result = {"Player": df["Player"], "Date": df["Date"]}
+    values = {m: _values(df, m) for m in measures}
+    for m in measures:
+        result[m] = _as_measure(values[m], df[m])
+        for n in match_windows:
+            result[f"{m}_last{n}"] = _as_measure(rolling_matches(values[m], group_start, n), df[m])
+        for window in day_windows:
+            result[f"{m}_{window}d"] = _as_measure(rolling_days(values[m], key, window), df[m])
+        result[f"Career_{m}"] = _as_measure(_window_sum(_cumsum(values[m]), group_start, idx + 1), df[m])
+    result["Career_Matches"] = idx - group_start + 1
+
+    if "Goals" in values:
+        scored = values["Goals"] > 0
+        result["Scoring_Streak"] = streak_lengths(scored, group_start)
+        result["Scoreless_Run"] = streak_lengths(~scored, group_start)
+    if "Assists" in values:
+        result["Assist_Streak"] = streak_lengths(values["Assists"] > 0, group_start)
+    return pd.DataFrame(result)
+
+# -------------------- CACHÉ EN DISCO --------------------
+
+@instrumented("load_rolling", labels=("player_id",))
+def load_rolling(player_id):
+    """
+    Métricas móviles de un jugador del registro, guardadas en data/processed/rolling/ junto al dataset limpio.
+    Si el dataset no ha cambiado (mismo hash y ROLLING_VERSION) se leen sin recalcular.
+    """
+    base_path = get_player(player_id)["cleaned_path"]
+    path = rolling_path / f"{player_id}_{dataset_fingerprint(base_path, ROLLING_VERSION)}.parquet"
+    pq = _pyarrow().parquet
+    if path.exists():
+        return pq.read_table(path).to_pandas()
+
+    result = rolling_metrics(read_dataset(base_path, columns=ROLLING_COLUMNS))
+    rolling_path.mkdir(parents=True, exist_ok=True)
+    for old in rolling_path.glob(f"{player_id}_*.parquet"):
+        old.unlink()
+    pq.write_table(_pyarrow().Table.from_pandas(result, preserve_index=False), path)
+    print(f"📈 Métricas móviles de {player_id} guardadas: {len(result)} partidos")
+    return result
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rachas y forma reciente de un jugador")
+    parser.add_argument("player", help="Id del jugador en config/players.json")
+    parser.add_argument("--top", type=int, default=5, help="Rachas a mostrar")
+    args = parser.parse_args()
+
+    metricas = load_rolling(args.player)
+    columnas = read_dataset(get_player(args.player)["cleaned_path"], columns=ROLLING_COLUMNS)
+    print(f"\n🔥 Rachas goleadoras más largas:\n{streaks(columnas, 'Goals', top=args.top).to_string(index=False)}")
+    print(f"\n🎯 Rachas asistiendo más largas:\n{streaks(columnas, 'Assists', top=args.top).to_string(index=False)}")
+    print(f"\n🥶 Sequías más largas:\n{streaks(columnas, 'Goals', scoring=False, top=args.top).to_string(index=False)}")
+    ultimo = metricas.iloc[-1]
+    print(f"\n📈 Forma reciente ({ultimo['Date']:%d-%m-%Y}): {ultimo['Goals_last5']} goles y "
+          f"{ultimo['Assists_last5']} asistencias en los últimos 5 partidos, {ultimo['Career_Goals']} goles en su carrera")
@@ -0,0 +1,136 @@
+# schema.py — Esquema compacto de los datasets procesados: categorías con códigos globales y números estrechos
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from locks import file_lock
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+codes_path = project_root / "data/processed/category_codes.json"
+
+# Columnas de texto con pocos valores distintos: se codifican como categorías
+CATEGORICAL_COLUMNS = [
+    "Player", "Season", "Competition", "Home Team", "Away Team",
+    "Rival_Team_Name", "Player_Team", "Lineup", "Home/Away", "Outcome",
+]
+
+# Columnas numéricas que se reducen al tipo más pequeño que las representa
+NUMERIC_COLUMNS = ["Minutes", "Goals", "Assists", "Cards"]
+
+# -------------------- TABLA GLOBAL DE CÓDIGOS --------------------
+
+# category_codes.json guarda, por columna, la lista de valores en orden de aparición.
+# Solo se añaden valores al final: el código de un valor (su posición) no cambia nunca
+# y es el mismo en los datasets de todos los jugadores.
+
+def load_code_table():
+    """Tabla global {columna: [valores]} (vacía si aún no existe)."""
+    if not codes_path.exists():
+        return {}
+    return json.loads(codes_path.read_text(encoding="utf-8"))
+
+def update_code_table(df):
+    """Añade a la tabla global los valores nuevos del DataFrame y devuelve la tabla actualizada."""
+    with file_lock(codes_path):
+        table = load_code_table()
+        changed = False
+        for col in CATEGORICAL_COLUMNS:
+            if col not in df:
+                continue
+            known = table.setdefault(col, [])
+            seen = set(known)
+            new_values = [v for v in pd.unique(df[col].dropna().astype(object)) if v not in seen]
+            if new_values:
+                known.extend(new_values)
+                changed = True
+        if changed:
+            tmp_path = codes_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(table, indent=2, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, codes_path)
+    return table
+
+# -------------------- APLICAR EL ESQUEMA --------------------
+
+def encode_categories(df, table=None):
+    """
+    Convierte las columnas categóricas a categorías con el orden de la tabla global (códigos estables).
+    Los valores que aún no están en la tabla se añaden al final solo en este DataFrame.
+    """
+    table = load_code_table() if table is None else table
+    for col in CATEGORICAL_COLUMNS:
+        if col not in df:
+            continue
+        values = df[col].astype(object)
+        categories = list(table.get(col, []))
+        known = set(categories)
+        categories += [v for v in pd.unique(values.dropna()) if v not in known]
+        df[col] = pd.Categorical(values, categories=categories)
+    return df
+
+def downcast_numbers(df):
+    """Enteros sin nulos al entero más pequeño posible; columnas con nulos a float32."""
+    for col in NUMERIC_COLUMNS:
+        if col not in df:
+            continue
+        values = pd.to_numeric(df[col], errors="coerce")
+        if values.isna().any():
+            df[col] = values.astype(np.float32)
+        else:
+            df[col] = pd.to_numeric(values.astype(np.int64), downcast="integer")
+    return df
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1e6
+
+def apply_schema(df, update=True, report=None):
+    """
+    Aplica el esquema compacto: categorías con códigos globales y números estrechos.
+    update=True registra en la tabla global los valores nuevos; report=nombre imprime la memoria ahorrada.
+    """
+    before = memory_mb(df) if report else None
+    table = update_code_table(df) if update else None
+    df = downcast_numbers(encode_categories(df, table))
+    if report:
+        after = memory_mb(df)
+        print(f"💾 Memoria {report}: {before:.2f} MB → {after:.2f} MB (-{100 * (1 - after / before):.0f}%)")
+    return df
+
+# -------------------- TIPOS FIJOS POR TROZOS --------------------
+# Un fichero leído o escrito por trozos debe tener en todos ellos los tipos del conjunto completo:
+# se reúnen antes los nulos y límites de cada trozo y se aplica a todos el mismo tipo.
+
+def numeric_stats(df):
+    """Nulos, mínimo y máximo de cada columna numérica de un trozo (lo que decide su tipo en downcast_numbers)."""
+    stats = {}
+    for col in NUMERIC_COLUMNS:
+        if col in df:
+            values = pd.to_numeric(df[col], errors="coerce")
+            stats[col] = (bool(values.isna().any()), values.min(), values.max())
+    return stats
+
+def numeric_dtypes(chunk_stats):
+    """Tipo de cada columna numérica en todo el fichero: float32 si hay nulos, si no el entero más pequeño."""
+    dtypes = {}
+    for col in NUMERIC_COLUMNS:
+        stats = [s[col] for s in chunk_stats if col in s]
+        if not stats:
+            continue
+        if any(nulls for nulls, _, _ in stats):
+            dtypes[col] = np.float32
+        else:
+            limits = [v for _, lo, hi in stats for v in (lo, hi) if pd.notna(v)] or [0]
+            dtypes[col] = pd.to_numeric(pd.Series([min(limits), max(limits)]).astype(np.int64), downcast="integer").dtype
+    return dtypes
+
+def fixed_types(df, table, dtypes):
+    """Categorías con la tabla global fijada al empezar y tipos numéricos de todo el fichero."""
+    df = encode_categories(df, table)
+    for col, dtype in dtypes.items():
+        values = pd.to_numeric(df[col], errors="coerce")
+        df[col] = values.astype(dtype) if dtype == np.float32 else values.astype(np.int64).astype(dtype)
+    return df
@@ -1,134 +1,242 @@
-# scraping.py — Messi + Lamine
+# scraping.py — Scraping de los jugadores del registro (messistats.com y FBRef)
 
-import requests
-from bs4 import BeautifulSoup
 import pandas as pd
 from pathlib import Path
-import os
-import time
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import hashlib
+import json
+
+from extractor import extract_messi_table, extract_fbref_table
+from fetching import fetch_all
+from instrumentation import current, instrumented, measure
+from players import get_player, player_ids
 
 # Detectar la raíz del proyecto para rutas relativas robustas
 project_root = Path(__file__).resolve().parent.parent
-messi_raw_path = project_root / "data/raw/messi_raw_data.csv"
-lamine_raw_path = project_root / "data/raw/lamine_raw_data.csv"
-messi_raw_path.parent.mkdir(parents=True, exist_ok=True)
-
-# -------------------- MESSI --------------------
-
-# Lista completa de URLs de temporadas desde messistats.com
-URL_LIST_MESSI = [
-    "https://www.messistats.com/en/games/0/0/all/0/2/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/3/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/4/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/5/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/6/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/7/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/8/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/9/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/10/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/11/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/12/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/13/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/14/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/15/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/16/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/17/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/18/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/19/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/20/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/21/0/t/0/0/0/1",
-    "https://www.messistats.com/en/games/0/0/all/0/24/0/t/0/0/0/1",
+
+# Jugadores scrapeados a la vez (las descargas de cada host ya van limitadas por fetching)
+MAX_PLAYER_THREADS = 8
+
+# Columnas que identifican un partido en cada CSV crudo
+MESSI_KEY = ["Date", "Home Team", "Away Team"]
+LAMINE_KEY = ["Date", "Squad", "Opponent"]
+
+# -------------------- MODO INCREMENTAL --------------------
+
+# Junto a cada CSV crudo se guardan dos ficheros auxiliares:
+#   <nombre>.state.json -> marca de agua por URL (última fecha, hash de la página, temporada cerrada)
+#   <nombre>.keys       -> índice de claves de partido ya guardadas (una por línea)
+
+def _state_path(raw_path):
+    return raw_path.with_suffix(".state.json")
+
+def _keys_path(raw_path):
+    return raw_path.with_suffix(".keys")
+
+def _load_state(raw_path):
+    path = _state_path(raw_path)
+    return json.loads(path.read_text(encoding="utf-8")) if path.exists() else {}
+
+def _save_state(raw_path, state):
+    _state_path(raw_path).write_text(json.dumps(state, indent=2, ensure_ascii=False), encoding="utf-8")
+
+def _season_closed(last_date, today=None):
+    """Una temporada (agosto-julio) está cerrada cuando ya pasó su 31 de julio final."""
+    if pd.isna(last_date):
+        return False
+    today = today or pd.Timestamp.today()
+    start_year = last_date.year if last_date.month >= 8 else last_date.year - 1
+    return today > pd.Timestamp(start_year + 1, 7, 31)
+
+def _update_watermark(state, url, page_hash, dates=None):
+    """Actualiza la marca de agua de una URL con la última fecha de partido y el hash de la página."""
+    watermark = state.setdefault(url, {})
+    if dates is not None and dates.notna().any():
+        watermark["last_date"] = dates.max().strftime("%Y-%m-%d")
+    watermark["page_hash"] = page_hash
+    last_date = pd.to_datetime(watermark.get("last_date"))
+    watermark["closed"] = bool(_season_closed(last_date))
+
+def _row_keys(df, key_cols):
+    keys = df[key_cols[0]].astype(str)
+    for col in key_cols[1:]:
+        keys = keys + "|" + df[col].astype(str)
+    return keys
+
+def _write_key_index(raw_path, df, key_cols):
+    keys = _row_keys(df, key_cols)
+    _keys_path(raw_path).write_text("".join(k + "\n" for k in keys), encoding="utf-8")
+
+def _append_new_rows(df, raw_path, key_cols):
+    """Añade al CSV crudo solo los partidos cuya clave no está en el índice. Devuelve cuántos añade."""
+    if not raw_path.exists():
+        df = df.drop_duplicates(subset=key_cols, keep="last")
+        df.to_csv(raw_path, index=False, encoding="utf-8")
+        _write_key_index(raw_path, df, key_cols)
+        return len(df)
+
+    keys_path = _keys_path(raw_path)
+    if keys_path.exists():
+        known = set(keys_path.read_text(encoding="utf-8").splitlines())
+    else:
+        # Índice perdido: se reconstruye leyendo solo las columnas clave
+        known = set(_row_keys(pd.read_csv(raw_path, usecols=key_cols, dtype=str), key_cols))
+
+    keys = _row_keys(df, key_cols)
+    mask = ~keys.isin(known) & ~keys.duplicated(keep="last")
+    if not mask.any():
+        return 0
+
+    # Alinear columnas con la cabecera existente y añadir al final del fichero
+    header = pd.read_csv(raw_path, nrows=0).columns
+    df[mask].reindex(columns=header).to_csv(raw_path, mode="a", header=False, index=False, encoding="utf-8")
+    with open(keys_path, "a", encoding="utf-8") as f:
+        f.write("".join(k + "\n" for k in keys[mask]))
+    return int(mask.sum())
+
+def _pending_urls(urls, state, incremental):
+    """En modo incremental se omiten las temporadas ya cerradas."""
+    if not incremental:
+        return list(urls)
+    pending = [url for url in urls if not state.get(url, {}).get("closed")]
+    skipped = len(urls) - len(pending)
+    if skipped:
+        print(f"⏭️ {skipped} temporadas cerradas omitidas")
+    return pending
+
+# -------------------- FUENTE: MESSISTATS.COM --------------------
+
+# Cabeceras esperadas (pueden variar levemente según temporada)
+MESSI_HEADERS = [
+    "Index", "Date", "Competition", "Home Team", "Result", "Away Team",
+    "Lineup", "Minutes", "Goals", "Assists", "Cards", "Jersey", "Extra"
 ]
 
-def scrape_messi_data():
+def parse_messi_page(content, url=None):
+    """Convierte el HTML de una temporada de messistats.com en DataFrame (None si no hay filas)."""
+    return extract_messi_table(content, MESSI_HEADERS)
+
+# -------------------- FUENTE: FBREF --------------------
+
+def parse_lamine_page(content, url):
+    """Extrae la tabla 'matchlogs_all' de una página de FBRef y añade la temporada de la URL."""
+    # La cabecera es la última fila del <thead> (equivale a quedarse con el último nivel)
+    df = extract_fbref_table(content, "matchlogs_all")
+    df = df[df["Date"].notna()]
+    season = url.split("/")[-2]
+    df["Season"] = season
+    return df
+
+# Cómo se parsea y guarda cada fuente:
+#   parse          -> HTML de una temporada a DataFrame crudo
+#   date_format    -> formato de la columna Date (para las marcas de agua)
+#   key            -> columnas que identifican un partido
+#   merge_existing -> si el CSV existente se une al nuevo (messistats) o se sobrescribe (FBRef)
+SOURCES = {
+    "messistats": {"parse": parse_messi_page, "date_format": "%d-%m-%Y", "key": MESSI_KEY, "merge_existing": True, "icon": "🌐"},
+    "fbref": {"parse": parse_lamine_page, "date_format": None, "key": LAMINE_KEY, "merge_existing": False, "icon": "🌍"},
+}
+
+# -------------------- SCRAPING GENÉRICO --------------------
+
+@instrumented("scrape_player", labels=("player_id",))
+def scrape_player(player_id, urls=None, replay=False, incremental=False):
+    """Scrapea todas las temporadas de un jugador del registro y actualiza su CSV crudo."""
+    player = get_player(player_id)
+    source = SOURCES[player["source"]]
+    raw_path = player["raw_path"]
+    raw_path.parent.mkdir(parents=True, exist_ok=True)
+    urls = player["urls"] if urls is None else urls
+
     all_data = []
+    state = _load_state(raw_path)
 
-    for url in URL_LIST_MESSI:
-        print(f"🌐 Scrapeando Messi: {url}")
-        response = requests.get(url)
-        soup = BeautifulSoup(response.content, "html.parser")
+    # Descarga concurrente de todas las temporadas; el parseo se hace en el orden original
+    for url, content in fetch_all(_pending_urls(urls, state, incremental), replay=replay):
+        print(f"{source['icon']} Scrapeando {player['name']}: {url}")
+        if content is None:
+            continue
 
-        # Cabeceras esperadas (pueden variar levemente según temporada)
-        headers = [
-            "Index", "Date", "Competition", "Home Team", "Result", "Away Team",
-            "Lineup", "Minutes", "Goals", "Assists", "Cards", "Jersey", "Extra"
-        ]
+        # Página idéntica a la última vez: no hay partidos nuevos que parsear
+        page_hash = hashlib.sha256(content).hexdigest()
+        if incremental and state.get(url, {}).get("page_hash") == page_hash:
+            _update_watermark(state, url, page_hash)
+            continue
 
-        data = []
-        for row in soup.find_all("tr"):
-            cols = [col.text.strip() for col in row.find_all("td")]
-            if cols:
-                data.append(cols)
+        try:
+            with measure("parse_page", player=player_id) as record:
+                df = source["parse"](content, url)
+                record.update(bytes=len(content), rows_out=0 if df is None else len(df), details={"url": url})
+        except Exception as e:
+            print(f"❌ Error en {url}: {e}")
+            continue
 
         # Convertir cada tabla a DataFrame si hay datos
-        if data:
-            df = pd.DataFrame(data, columns=headers[:len(data[0])])
+        if df is not None:
             all_data.append(df)
+            _update_watermark(state, url, page_hash, pd.to_datetime(df["Date"], format=source["date_format"], errors="coerce"))
+
+    _save_state(raw_path, state)
 
     if not all_data:
-        print("⚠️ No se encontraron datos.")
+        print(f"✅ Sin partidos nuevos de {player['name']}." if incremental else f"⚠️ No se encontraron datos de {player['name']}.")
         return
 
     # Concatenar todos los DataFrames
     df_total = pd.concat(all_data, ignore_index=True)
+    current()["rows_in"] = len(df_total)
 
-    # Si ya existe un archivo, unir sin duplicados
-    if messi_raw_path.exists():
-        df_existing = pd.read_csv(messi_raw_path, dtype=str, on_bad_lines='skip')
-        df_combined = pd.concat([df_existing, df_total], ignore_index=True)
-    else:
-        df_combined = df_total
+    if incremental:
+        added = _append_new_rows(df_total, raw_path, source["key"])
+        print(f"✅ CSV actualizado: {raw_path} con {added} registros nuevos.")
+        return
 
-    # Eliminar duplicados por combinación de columnas clave
-    df_combined.drop_duplicates(subset=["Date", "Home Team", "Away Team"], keep="last", inplace=True)
+    # Si ya existe un archivo, unir sin duplicados por combinación de columnas clave
+    if source["merge_existing"] and raw_path.exists():
+        df_existing = pd.read_csv(raw_path, dtype=str, on_bad_lines='skip')
+        df_total = pd.concat([df_existing, df_total], ignore_index=True)
+    if source["merge_existing"]:
+        df_total.drop_duplicates(subset=source["key"], keep="last", inplace=True)
 
     # Guardar como CSV
-    df_combined.to_csv(messi_raw_path, index=False, encoding="utf-8")
-    print(f"✅ CSV actualizado: {messi_raw_path} con {len(df_combined)} registros.")
-
-# -------------------- LAMINE --------------------
-
-# URLs desde FBRef de todas las temporadas de Lamine disponibles
-LAMINE_URLS = [
-    "https://fbref.com/en/players/82ec26c1/matchlogs/2022-2023/Lamine-Yamal-Match-Logs",
-    "https://fbref.com/en/players/82ec26c1/matchlogs/2023-2024/Lamine-Yamal-Match-Logs",
-    "https://fbref.com/en/players/82ec26c1/matchlogs/2024-2025/Lamine-Yamal-Match-Logs"
-]
-
-def scrape_lamine_data():
-    all_data = []
-
-    for url in LAMINE_URLS:
-        print(f"🌍 Scrapeando Lamine: {url}")
-        try:
-            df = pd.read_html(url, attrs={"id": "matchlogs_all"})[0]
-
-            # Si la tabla tiene multi-nivel, usar solo la última fila
-            if df.columns.nlevels > 1:
-                df.columns = df.columns.get_level_values(-1)
+    df_total.to_csv(raw_path, index=False, encoding="utf-8")
+    _write_key_index(raw_path, df_total, source["key"])
+    print(f"✅ CSV actualizado: {raw_path} con {len(df_total)} registros.")
+
+def scrape_players(ids=None, replay=False, incremental=False):
+    """
+    Scrapea varios jugadores del registro (todos por defecto) a la vez: cada host avanza a su ritmo de cortesía.
+    Con replay=True reconstruye los CSV crudos solo desde el archivo local, sin red.
+    Con incremental=True solo se descargan temporadas abiertas y se añaden partidos nuevos.
+    """
+    ids = list(ids or player_ids())
+    if not ids:
+        return
+    with ThreadPoolExecutor(max_workers=min(len(ids), MAX_PLAYER_THREADS)) as pool:
+        futures = [pool.submit(scrape_player, player_id, replay=replay, incremental=incremental) for player_id in ids]
+        for future in futures:
+            future.result()
 
-            df = df[df["Date"].notna()]
-            season = url.split("/")[-2]
-            df["Season"] = season
-            all_data.append(df)
+# -------------------- MESSI Y LAMINE --------------------
 
-        except Exception as e:
-            print(f"❌ Error en {url}: {e}")
+# Las URLs de temporadas de cada jugador se leen de config/players.json al scrapear (get_player)
 
-        # Esperar entre peticiones
-        time.sleep(1)
+def scrape_messi_data(urls=None, replay=False, incremental=False):
+    scrape_player("messi", urls, replay=replay, incremental=incremental)
 
-    if not all_data:
-        print("⚠️ No se encontraron datos de Lamine.")
-        return
+def scrape_lamine_data(urls=None, replay=False, incremental=False):
+    scrape_player("lamine", urls, replay=replay, incremental=incremental)
 
-    # Guardar datos combinados
-    df_yamal = pd.concat(all_data, ignore_index=True)
-    df_yamal.to_csv(lamine_raw_path, index=False)
-    print(f"✅ CSV guardado en {lamine_raw_path} con {len(df_yamal)} filas.")
+def scrape_all_data(replay=False, incremental=False):
+    scrape_players(replay=replay, incremental=incremental)
 
 # -------------------- EJECUCIÓN DIRECTA --------------------
 
 if __name__ == "__main__":
-    scrape_messi_data()
-    scrape_lamine_data()
+    parser = argparse.ArgumentParser(description="Scraping de los jugadores del registro")
+    parser.add_argument("players", nargs="*", help="Ids de config/players.json (todos por defecto)")
+    parser.add_argument("--replay", action="store_true", help="Reconstruir data/raw/*.csv desde el archivo local sin red")
+    parser.add_argument("--incremental", action="store_true", help="Descargar solo temporadas abiertas y añadir partidos nuevos")
+    args = parser.parse_args()
+    scrape_players(args.players, replay=args.replay, incremental=args.incremental)
@@ -0,0 +1,467 @@
+# service.py — Servicio HTTP local de consultas: totales, desgloses y comparativas desde un almacén indexado en memoria
+
+import argparse
+import http.client
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from age_index import age_days, at_age, build_age_index
+from instrumentation import instrumented
+from players import get_player, player_ids
+from storage import FORMATS, dataset_path, read_dataset
+
+# -------------------- CONFIGURACIÓN --------------------
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8050
+
+# Resultados guardados en la caché LRU (respuestas JSON ya serializadas)
+CACHE_SIZE = 4096
+
+# Cada cuánto (segundos como máximo) se comprueba si han cambiado los datasets procesados
+RELOAD_CHECK_SECONDS = 1.0
+
+# Filtros e índices: parámetro de la URL -> columna del dataset limpio ('player' es el id del registro)
+DIMENSIONS = {
+    "player": "player",
+    "season": "Season",
+    "competition": "Competition",
+    "rival": "Rival_Team_Name",
+    "venue": "Home/Away",
+    "lineup": "Lineup",
+}
+
+# Medidas sumadas: nombre en la respuesta -> columna
+MEASURES = {"goals": "Goals", "assists": "Assists", "minutes": "Minutes", "cards": "Cards"}
+
+# Desgloses posibles: las dimensiones indexadas más el año natural (sale de la fecha)
+BREAKDOWNS = list(DIMENSIONS) + ["year"]
+
+STORE_COLUMNS = ["Date"] + [c for c in DIMENSIONS.values() if c != "player"] + list(MEASURES.values())
+
+# -------------------- ALMACÉN INDEXADO --------------------
+
+def _signature(ids):
+    """(ruta, mtime, tamaño) de todos los ficheros procesados de los jugadores: cambia si se reprocesan."""
+    signature = []
+    for player_id in ids:
+        for fmt in FORMATS:
+            path = dataset_path(get_player(player_id)["cleaned_path"], fmt)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+def _index(codes, n_labels):
+    """Posiciones (ordenadas) de las filas de cada código: un argsort estable y cortes por frontera."""
+    order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=n_labels))])
+    return [order[bounds[k]:bounds[k + 1]] for k in range(n_labels)]
+
+def build_store(frames, signature=None):
+    """
+    Almacén en memoria a partir de {player_id: DataFrame limpio}. Las filas se ordenan por fecha, de modo que
+    un rango de fechas es un rango de posiciones, y cada dimensión tiene un índice valor -> posiciones ordenadas.
+    Los valores de cada dimensión se guardan como códigos enteros (0 = sin dato) para desglosar con np.bincount.
+    """
+    parts = []
+    for player_id, df in frames.items():
+        part = pd.DataFrame({c: (df[c].astype(object) if c != "Date" else df[c])
+                             for c in STORE_COLUMNS if c in df}, index=df.index)
+        part.insert(0, "player", player_id)
+        parts.append(part.reset_index(drop=True))
+    df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["player"] + STORE_COLUMNS)
+
+    # NaT al final: así las fechas ordenadas admiten searchsorted y los partidos sin fecha quedan fuera de los rangos
+    fechas = pd.to_datetime(df["Date"]).to_numpy("datetime64[ns]").astype(np.int64)
+    fechas = np.where(fechas == np.iinfo(np.int64).min, np.iinfo(np.int64).max, fechas)
+    order = np.argsort(fechas, kind="stable")
+    df = df.iloc[order].reset_index(drop=True)
+    fechas = fechas[order]
+
+    store = {"rows": len(df), "dates": fechas, "signature": signature, "loaded_at": time.time(),
+             "measures": {}, "codes": {}, "labels": {}, "index": {}}
+    for name, column in MEASURES.items():
+        valores = df[column].to_numpy(dtype=float, na_value=np.nan) if column in df else np.zeros(len(df))
+        store["measures"][name] = np.nan_to_num(valores)  # los nulos suman 0, como en pandas
+
+    dims = {param: df[column] if column in df else pd.Series(None, index=df.index, dtype=object)
+            for param, column in DIMENSIONS.items()}
+    years = pd.Series(pd.to_datetime(df["Date"]).dt.year, dtype="Int64") if len(df) else pd.Series([], dtype=object)
+    for param, serie in dict(dims, year=years).items():
+        codes, labels = pd.factorize(serie, sort=True)
+        labels = [None] + [v.item() if hasattr(v, "item") else v for v in labels]
+        codes = codes.astype(np.int64) + 1
+        store["codes"][param] = codes
+        store["labels"][param] = labels
+        if param in DIMENSIONS:
+            positions = _index(codes, len(labels))
+            store["index"][param] = {label: positions[k] for k, label in enumerate(labels) if k}
+    return store
+
+@instrumented("service_load")
+def load_store(ids=None):
+    """Lee los datasets procesados de los jugadores y construye el almacén (se queda solo con STORE_COLUMNS)."""
+    ids = list(ids or player_ids())
+    signature = _signature(ids)
+    frames = {}
+    for player_id in ids:
+        path = get_player(player_id)["cleaned_path"]
+        try:
+            frames[player_id] = read_dataset(path)
+        except FileNotFoundError:
+            print(f"⚠️ {player_id} no tiene datos procesados: se omite")
+    store = build_store(frames, signature)
+    store["players"] = {player_id: get_player(player_id)["name"] for player_id in frames}
+    store["ages"] = {player_id: (get_player(player_id)["birthdate"], build_age_index(df, get_player(player_id)["birthdate"]))
+                     for player_id, df in frames.items()}
+    return store
+
+# -------------------- CONSULTAS --------------------
+
+def _number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
+
+def _date(value):
+    try:
+        return np.datetime64(pd.Timestamp(value).to_datetime64(), "ns").astype(np.int64)
+    except ValueError as e:
+        raise ValueError(f"Fecha no válida: '{value}' (usa AAAA-MM-DD)") from e
+
+def select_rows(store, filters, start=None, end=None):
+    """
+    Posiciones de las filas que cumplen los filtros ({parámetro: [valores]}) y el rango de fechas [start, end].
+    Se parte del índice más selectivo y se intersecan los demás; el rango de fechas se recorta con searchsorted.
+    """
+    candidates = []
+    for param, values in filters.items():
+        index = store["index"][param]
+        positions = [index[v] for v in values if v in index]
+        if len(positions) == 1:
+            candidates.append(positions[0])
+        else:
+            candidates.append(np.sort(np.concatenate(positions)) if positions else np.empty(0, dtype=np.int64))
+
+    lo = 0 if start is None else np.searchsorted(store["dates"], _date(start), "left")
+    hi = store["rows"] if end is None else np.searchsorted(store["dates"], _date(end), "right")
+    if end is None and start is not None:
+        hi = np.searchsorted(store["dates"], np.iinfo(np.int64).max, "left")  # sin los partidos sin fecha
+
+    if not candidates:
+        return np.arange(lo, hi)
+    candidates.sort(key=len)
+    rows = candidates[0]
+    for other in candidates[1:]:
+        rows = np.intersect1d(rows, other, assume_unique=True)
+    return rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)]
+
+def totals(store, rows):
+    result = {"matches": len(rows)}
+    for name, valores in store["measures"].items():
+        result[name] = _number(valores[rows].sum())
+    return result
+
+def breakdown(store, rows, by, sort=None, limit=None):
+    """Totales por valor de la dimensión 'by' (season, competition, rival, year...) con np.bincount."""
+    if by not in BREAKDOWNS:
+        raise ValueError(f"Desglose no válido: '{by}'. Usa: {', '.join(BREAKDOWNS)}")
+    labels = store["labels"][by]
+    codes = store["codes"][by][rows]
+    matches = np.bincount(codes, minlength=len(labels))
+    sums = {name: np.bincount(codes, weights=valores[rows], minlength=len(labels))
+            for name, valores in store["measures"].items()}
+
+    result = []
+    for k in np.flatnonzero(matches):
+        entry = {by: labels[k], "matches": int(matches[k])}
+        entry.update({name: _number(sums[name][k]) for name in sums})
+        result.append(entry)
+    if sort:
+        if sort not in ["matches", *MEASURES]:
+            raise ValueError(f"Orden no válido: '{sort}'. Usa: matches, {', '.join(MEASURES)}")
+        result.sort(key=lambda e: e[sort], reverse=True)
+    if limit is None:
+        return result
+    if limit < 0:
+        raise ValueError(f"Límite no válido: {limit} (usa un entero >= 0)")
+    return result[:limit]
+
+def _per_90(result):
+    minutes = result["minutes"]
+    for name in ("goals", "assists"):
+        result[f"{name}_per_90"] = round(result[name] / minutes * 90, 3) if minutes else None
+    return result
+
+# -------------------- ENDPOINTS --------------------
+
+def _single(qs, name, default=None):
+    values = qs.get(name)
+    return values[-1] if values else default
+
+def _filters(store, qs):
+    filters = {param: qs[param] for param in DIMENSIONS if param in qs}
+    unknown = [p for p in filters.get("player", []) if p not in store["players"]]
+    if unknown:
+        raise KeyError(f"Jugador desconocido: '{unknown[0]}'. Disponibles: {', '.join(store['players'])}")
+    return filters, _single(qs, "from"), _single(qs, "to")
+
+def q_players(store, qs):
+    rows = store["index"]["player"]
+    return [{"id": player_id, "name": name, "matches": len(rows.get(player_id, ()))}
+            for player_id, name in store["players"].items()]
+
+def q_totals(store, qs):
+    filters, start, end = _filters(store, qs)
+    return totals(store, select_rows(store, filters, start, end))
+
+def q_breakdown(store, qs):
+    filters, start, end = _filters(store, qs)
+    limit = _single(qs, "limit")
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError(f"Límite no válido: '{limit}' (usa un entero >= 0)") from None
+    return breakdown(store, select_rows(store, filters, start, end), _single(qs, "by", "season"),
+                     sort=_single(qs, "sort"), limit=limit)
+
+def q_compare(store, qs):
+    """Totales (y goles/asistencias por 90') de cada jugador con los mismos filtros; con 'by', también su desglose."""
+    filters, start, end = _filters(store, qs)
+    ids = filters.pop("player", None) or list(store["players"])
+    by = _single(qs, "by")
+    result = {}
+    for player_id in ids:
+        rows = select_rows(store, dict(filters, player=[player_id]), start, end)
+        result[player_id] = _per_90(totals(store, rows))
+        if by:
+            result[player_id]["breakdown"] = breakdown(store, rows, by)
+    return result
+
+def q_age(store, qs):
+    """Totales de carrera de cada jugador al cumplir 'age' años (binaria sobre su índice por edad exacta)."""
+    filters, _, _ = _filters(store, qs)
+    try:
+        years = float(_single(qs, "age"))
+    except (TypeError, ValueError):
+        raise ValueError("Falta la edad o no es un número: usa age=17.5") from None
+    result = {}
+    for player_id in filters.get("player") or list(store["players"]):
+        if player_id not in store.get("ages", {}):
+            raise KeyError(f"{player_id} no tiene índice por edad")
+        birthdate, index = store["ages"][player_id]
+        result[player_id] = {m.lower(): _number(v) for m, v in at_age(index, age_days(years, birthdate)).items()}
+    return result
+
+# Endpoints cacheados: ruta -> función (almacén, parámetros) -> resultado serializable
+ENDPOINTS = {
+    "/players": q_players,
+    "/totals": q_totals,
+    "/breakdown": q_breakdown,
+    "/compare": q_compare,
+    "/age": q_age,
+}
+
+# -------------------- CACHÉ Y RECARGA --------------------
+
+def _new_state(ids, store=None):
+    """Estado del servicio: almacén y caché van juntos, así que al recargar la caché vieja se descarta entera."""
+    store = store if store is not None else load_store(ids)
+    return {"ids": ids, "snapshot": (store, OrderedDict()), "lock": threading.Lock(),
+            "checked_at": time.monotonic(), "hits": 0, "misses": 0, "reloads": 0}
+
+def _current(state):
+    """Almacén y caché vigentes; si los ficheros procesados cambiaron se recarga (un solo hilo, sin bloquear al resto)."""
+    store, cache = state["snapshot"]
+    now = time.monotonic()
+    if store["signature"] is None or now - state["checked_at"] < RELOAD_CHECK_SECONDS:
+        return store, cache
+    if not state["lock"].acquire(blocking=False):
+        return store, cache  # otro hilo está comprobando o recargando: se responde con la versión actual
+    try:
+        state["checked_at"] = now
+        if _signature(state["ids"]) != store["signature"]:
+            print("🔄 Datos procesados modificados: recargando el almacén")
+            state["snapshot"] = (load_store(state["ids"]), OrderedDict())
+            state["reloads"] += 1
+    finally:
+        state["lock"].release()
+    return state["snapshot"]
+
+_cache_lock = threading.Lock()
+
+def answer(state, path, query):
+    """Responde una petición GET: (código HTTP, cuerpo JSON en bytes). Las respuestas correctas se cachean (LRU)."""
+    store, cache = _current(state)
+    if path == "/status":
+        body = {"rows": store["rows"], "players": list(store["players"]), "loaded_at": store["loaded_at"],
+                "cache_entries": len(cache), "hits": state["hits"], "misses": state["misses"], "reloads": state["reloads"]}
+        return 200, json.dumps(body).encode()
+    if path not in ENDPOINTS:
+        return 404, json.dumps({"error": f"Ruta desconocida: {path}", "endpoints": list(ENDPOINTS)}).encode()
+
+    qs = parse_qs(query)
+    key = (path, tuple(sorted((k, tuple(v)) for k, v in qs.items())))
+    with _cache_lock:
+        body = cache.get(key)
+        if body is not None:
+            cache.move_to_end(key)
+            state["hits"] += 1
+            return 200, body
+
+    try:
+        result = ENDPOINTS[path](store, qs)
+    except KeyError as e:
+        return 404, json.dumps({"error": e.args[0]}, ensure_ascii=False).encode()
+    except ValueError as e:
+        return 400, json.dumps({"error": str(e)}, ensure_ascii=False).encode()
+    body = json.dumps(result, ensure_ascii=False, default=str).encode()
+
+    with _cache_lock:
+        state["misses"] += 1
+        cache[key] = body
+        if len(cache) > CACHE_SIZE:
+            cache.popitem(last=False)
+    return 200, body
+
+# -------------------- SERVIDOR HTTP --------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # conexiones keep-alive: los clientes no pagan un handshake por consulta
+    disable_nagle_algorithm = True  # cabeceras y cuerpo van en dos escrituras: sin TCP_NODELAY cada respuesta espera ~40 ms
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        status, body = answer(self.server.state, url.path, url.query)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, ids=None, store=None, verbose=False):
+    """Servidor con un hilo por conexión. Con store se sirve ese almacén fijo (sin recargas), p.ej. en benchmarks."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.state = _new_state(list(ids or player_ids()), store)
+    server.verbose = verbose
+    return server
+
+# -------------------- PRUEBA DE CARGA --------------------
+
+def typical_queries(store, n=300, seed=0):
+    """Mezcla de consultas habituales (totales, desgloses, filtros por temporada/rival/fechas, comparativas)."""
+    rng = random.Random(seed)
+    labels = {param: [v for v in store["labels"][param][1:]] for param in ("season", "competition", "rival")}
+    ids = list(store["players"])
+    queries = []
+    for _ in range(n):
+        player = rng.choice(ids)
+        kind = rng.randrange(7)
+        if kind == 0:
+            params = {"player": player}
+        elif kind == 1:
+            params = {"player": player, "season": rng.choice(labels["season"])}
+        elif kind == 2:
+            params = {"player": player, "by": rng.choice(["season", "competition", "year"])}
+        elif kind == 3:
+            params = {"player": player, "by": "rival", "sort": "goals", "limit": 10}
+        elif kind == 4:
+            params = {"player": player, "rival": rng.choice(labels["rival"]), "competition": rng.choice(labels["competition"])}
+        elif kind == 5:
+            year = rng.randrange(2005, 2025)
+            params = {"player": player, "from": f"{year}-01-01", "to": f"{year + 1}-06-30"}
+        else:
+            params = {"player": ids[:2], "by": "season"}
+        path = "/compare" if kind == 6 else "/breakdown" if "by" in params else "/totals"
+        queries.append(f"{path}?{urlencode(params, doseq=True)}")
+    return queries
+
+def load_test(base_url, paths, clients=8, requests_per_client=250, seed=0):
+    """
+    Lanza 'clients' clientes concurrentes (una conexión keep-alive cada uno) que piden rutas al azar de 'paths'.
+    Devuelve peticiones, errores, peticiones/s y percentiles de latencia en milisegundos.
+    """
+    url = urlsplit(base_url)
+    latencies = [[] for _ in range(clients)]
+    errors = [0] * clients
+
+    def client(k):
+        rng = random.Random(seed + k)
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+        try:
+            for _ in range(requests_per_client):
+                path = rng.choice(paths)
+                start = time.perf_counter()
+                conn.request("GET", path)
+                response = conn.getresponse()
+                response.read()
+                latencies[k].append((time.perf_counter() - start) * 1000)
+                errors[k] += response.status != 200
+        finally:
+            conn.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - start
+
+    ms = np.concatenate([np.asarray(l) for l in latencies])
+    return {
+        "requests": len(ms), "errors": sum(errors), "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(ms) / elapsed, 1),
+        **{f"p{q}_ms": round(float(np.percentile(ms, q)), 3) for q in (50, 95, 99)},
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+def print_load_test(title, result):
+    print(f"  {title:<28} {result['requests']:6,} peticiones | {result['requests_per_second']:8,.0f}/s | "
+          f"p50 {result['p50_ms']:6.2f} ms | p95 {result['p95_ms']:6.2f} ms | p99 {result['p99_ms']:6.2f} ms"
+          + (f" | ❌ {result['errors']} errores" if result["errors"] else ""))
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servicio HTTP local de consultas sobre los datos procesados")
+    parser.add_argument("players", nargs="*", help="Jugadores a cargar (todos por defecto)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--verbose", action="store_true", help="Registrar cada petición")
+    parser.add_argument("--load-test", metavar="URL", help="No servir: lanzar una prueba de carga contra un servicio en marcha")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=250, help="Peticiones por cliente")
+    args = parser.parse_args()
+
+    if args.load_test:
+        paths = typical_queries(load_store(args.players or None))
+        print(f"🧪 Prueba de carga contra {args.load_test} ({args.clients} clientes):")
+        print_load_test("consultas habituales", load_test(args.load_test, paths, args.clients, args.requests))
+    else:
+        server = make_server(args.host, args.port, args.players or None, verbose=args.verbose)
+        store, _ = server.state["snapshot"]
+        print(f"🌐 Servicio de consultas en http://{args.host}:{server.server_address[1]} "
+              f"({store['rows']:,} partidos de {', '.join(store['players'])})")
+        print(f"   Rutas: /status, {', '.join(ENDPOINTS)}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("👋 Servicio detenido")
+        finally:
+            server.server_close()
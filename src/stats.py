@@ -0,0 +1,271 @@
+# stats.py — Contrastes de hipótesis por remuestreo: intervalos bootstrap y tests de permutación vectorizados
+
+import argparse
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+from players import get_player, player_ids
+from storage import read_dataset
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+stats_path = project_root / "data/processed/stats"
+results_path = stats_path / "hypothesis_tests.csv"
+
+# Remuestreos por contraste, nivel de confianza de los intervalos y significación de los tests
+N_RESAMPLES = 10_000
+CONFIDENCE = 0.95
+ALPHA = 0.05
+SEED = 2025
+
+# Los remuestreos se generan en fragmentos de SHARD_RESAMPLES con semilla propia (SeedSequence con clave
+# [contraste, tipo, fragmento]): el resultado es el mismo con 1 o con N procesos. Dentro de un fragmento se
+# trabaja por lotes de matrices (remuestreos × partidos o × pares distintos) de como mucho MAX_BATCH_CELLS elementos.
+SHARD_RESAMPLES = 10_000
+MAX_BATCH_CELLS = 4_000_000
+
+# Bootstrap por recuentos multinomiales si hay al menos COUNTS_RATIO partidos por par (num, den) distinto; si no,
+# por matrices de índices. Las permutaciones usan recuentos hipergeométricos (por marginales con pocos pares).
+COUNTS_RATIO = 8
+MARGINALS_MAX_PAIRS = 100
+
+STATS_COLUMNS = ["Player", "Age", "Home/Away", "Lineup", "Goals", "Assists", "Minutes"]
+
+# Todas las métricas son una razón: suma(numerador) / suma(denominador) * escala, sobre partidos jugados
+# (Minutes > 0). Sin denominador es la media por partido; con minutos y escala 90, el ratio por 90 minutos.
+METRICS = {
+    "goals_per_90": (["Goals"], "Minutes", 90),
+    "assists_per_90": (["Assists"], "Minutes", 90),
+    "contributions_per_90": (["Goals", "Assists"], "Minutes", 90),
+    "contributions_per_match": (["Goals", "Assists"], None, 1),
+    "assists_per_match": (["Assists"], None, 1),
+    "minutes_per_match": (["Minutes"], None, 1),
+}
+
+# Métricas de cada batería: jugadores a la misma edad, y local/visitante y titular/suplente de cada jugador
+PLAYER_METRICS = ["goals_per_90", "assists_per_90", "contributions_per_match", "assists_per_match", "minutes_per_match"]
+SPLIT_METRICS = ["goals_per_90", "assists_per_90"]
+SPLITS = {"home_away": ("Home/Away", "Home", "Away"), "lineup": ("Lineup", "Starter", "Substitute")}
+
+# -------------------- MÉTRICAS --------------------
+
+def metric_arrays(df, metric):
+    """(numerador, denominador) por partido jugado (Minutes > 0); sin denominador, None. Los nulos suman 0, como en pandas."""
+    columns, den_col, _ = METRICS[metric]
+    minutes = df["Minutes"].to_numpy(dtype=np.float64, na_value=np.nan)
+    played = minutes > 0
+    values = {c: np.nan_to_num(df[c].to_numpy(dtype=np.float64, na_value=np.nan)[played]) for c in set(columns) | {den_col} - {None}}
+    return sum(values[c] for c in columns), values[den_col] if den_col else None
+
+def _ratio(num_sum, den_sum, scale):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den_sum > 0, num_sum / den_sum * scale, np.nan)
+
+def observed(num, den, scale):
+    """Valor de la métrica en la muestra original."""
+    return float(_ratio(num.sum(), den.sum() if den is not None else len(num), scale))
+
+# -------------------- REMUESTREO --------------------
+
+def _compress(num, den):
+    """
+    Pares (numerador, denominador) distintos y cuántas veces aparece cada uno: un remuestreo solo depende de
+    cuántas veces sale cada par. Sin denominador el par lleva un 1 (su suma es el número de partidos).
+    """
+    pairs = np.column_stack([num, den if den is not None else np.ones_like(num)])
+    return np.unique(pairs, axis=0, return_counts=True)
+
+def _batch_rows(n_cols):
+    return max(1, MAX_BATCH_CELLS // max(n_cols, 1))
+
+def _bootstrap_shard(groups, scale, size, seed):
+    """
+    Fragmento bootstrap: size remuestreos con reemplazamiento de cada grupo (pares distintos y apariciones).
+    Con pocos pares distintos cada lote es una matriz de recuentos multinomiales (remuestreos × pares); si no,
+    una matriz de índices (remuestreos × partidos). Devuelve un array (grupos, size) con la métrica de cada remuestreo.
+    """
+    rng = np.random.default_rng(seed)
+    result = np.empty((len(groups), size))
+    for g, (values, counts) in enumerate(groups):
+        n = int(counts.sum())
+        by_counts = len(values) * COUNTS_RATIO <= n
+        num, den = np.repeat(values, counts, axis=0).T
+        step = _batch_rows(len(values) if by_counts else n)
+        for start in range(0, size, step):
+            b = min(step, size - start)
+            if by_counts:
+                num_sum, den_sum = (rng.multinomial(n, counts / n, size=b) @ values).T
+            else:
+                idx = rng.integers(0, n, size=(b, n), dtype=np.intp)
+                num_sum, den_sum = np.take(num, idx).sum(axis=1), np.take(den, idx).sum(axis=1)
+            result[g, start:start + b] = _ratio(num_sum, den_sum, scale)
+    return result
+
+def _permutation_shard(pooled, k, scale, size, seed):
+    """
+    Fragmento de permutación: size reparticiones al azar de los partidos de ambos grupos (los k primeros son a).
+    Cuántas veces cae cada par distinto en el grupo más pequeño sigue una hipergeométrica multivariante: cada lote
+    es una matriz de recuentos (reparticiones × pares) y el otro grupo es el total menos ese.
+    Devuelve la diferencia de la métrica (a - b) en cada repartición.
+    """
+    rng = np.random.default_rng(seed)
+    values, colors = pooled
+    n = int(colors.sum())
+    m = min(k, n - k)
+    total = colors @ values
+    method = "marginals" if len(values) < MARGINALS_MAX_PAIRS else "count"
+    result = np.empty(size)
+    step = _batch_rows(len(values))
+    for start in range(0, size, step):
+        rows = min(step, size - start)
+        small = rng.multivariate_hypergeometric(colors, m, size=rows, method=method) @ values
+        num_a, den_a = (small if m == k else total - small).T
+        result[start:start + rows] = _ratio(num_a, den_a, scale) - _ratio(total[0] - num_a, total[1] - den_a, scale)
+    return result
+
+def _shard_seeds(seed, key, n_resamples):
+    """(tamaño, semilla) de cada fragmento: la semilla depende solo de seed, la clave y el número de fragmento."""
+    sizes = [min(SHARD_RESAMPLES, n_resamples - start) for start in range(0, n_resamples, SHARD_RESAMPLES)]
+    return [(size, np.random.SeedSequence(seed, spawn_key=(*key, i))) for i, size in enumerate(sizes)]
+
+def _run_shards(func, args, seed, key, n_resamples, n_jobs):
+    """Ejecuta los fragmentos (en un pool de procesos si n_jobs > 1) y concatena sus resultados en orden."""
+    shards = _shard_seeds(seed, key, n_resamples)
+    if n_jobs > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(shards))) as pool:
+            parts = list(pool.map(func, *zip(*[(*args, size, s) for size, s in shards])))
+    else:
+        parts = [func(*args, size, s) for size, s in shards]
+    return np.concatenate(parts, axis=-1)
+
+def _key(label):
+    return (zlib.crc32(label.encode("utf-8")),)
+
+def bootstrap(groups, scale=1, n_resamples=N_RESAMPLES, seed=SEED, label="", n_jobs=1):
+    """Distribución bootstrap de la métrica de cada grupo [(num, den), ...]: array (grupos, n_resamples)."""
+    compressed = [_compress(num, den) for num, den in groups]
+    return _run_shards(_bootstrap_shard, (compressed, scale), seed, _key(label) + (0,), n_resamples, n_jobs)
+
+def permutation_diffs(a, b, scale=1, n_resamples=N_RESAMPLES, seed=SEED, label="", n_jobs=1):
+    """Diferencias a - b de la métrica bajo la hipótesis nula (grupos intercambiables): array (n_resamples,)."""
+    den = np.concatenate([a[1], b[1]]) if a[1] is not None else None
+    pooled = _compress(np.concatenate([a[0], b[0]]), den)
+    return _run_shards(_permutation_shard, (pooled, len(a[0]), scale), seed, _key(label) + (1,), n_resamples, n_jobs)
+
+def percentile_ci(samples, confidence=CONFIDENCE):
+    """Intervalo de confianza por percentiles (ignora los remuestreos sin minutos)."""
+    tail = (1 - confidence) / 2
+    return tuple(np.nanquantile(samples, [tail, 1 - tail], axis=-1))
+
+def p_value(diffs, observed_diff):
+    """p-valor bilateral de un test de permutación (con la corrección +1 para no dar nunca 0)."""
+    extreme = np.count_nonzero(np.abs(diffs) >= abs(observed_diff) - 1e-12)
+    return (extreme + 1) / (len(diffs) + 1)
+
+# -------------------- CONTRASTES --------------------
+
+def compare(df_a, df_b, metric, n_resamples=N_RESAMPLES, seed=SEED, label="", n_jobs=1, confidence=CONFIDENCE):
+    """
+    Compara una métrica entre dos conjuntos de partidos: valor de cada uno con su intervalo bootstrap,
+    intervalo de la diferencia y p-valor del test de permutación. Devuelve un dict (una fila de resultados).
+    """
+    scale = METRICS[metric][2]
+    a, b = metric_arrays(df_a, metric), metric_arrays(df_b, metric)
+    row = {"metric": metric, "n_a": len(a[0]), "n_b": len(b[0])}
+    if not len(a[0]) or not len(b[0]):
+        return row
+    value_a, value_b = observed(*a, scale), observed(*b, scale)
+    samples = bootstrap([a, b], scale, n_resamples, seed, label, n_jobs)
+    (low_a, low_b, low_diff), (high_a, high_b, high_diff) = percentile_ci(np.vstack([samples, samples[0] - samples[1]]), confidence)
+    diffs = permutation_diffs(a, b, scale, n_resamples, seed, label, n_jobs)
+    p = p_value(diffs, value_a - value_b)
+    return {
+        **row, "value_a": value_a, "ci_a_low": low_a, "ci_a_high": high_a,
+        "value_b": value_b, "ci_b_low": low_b, "ci_b_high": high_b,
+        "diff": value_a - value_b, "ci_diff_low": low_diff, "ci_diff_high": high_diff,
+        "p_value": p, "significant": p < ALPHA,
+    }
+
+def same_age_window(df, players):
+    """Rango de edad (años) común a varios jugadores: desde el debut del más tardío hasta la edad actual del más joven."""
+    ages = df[df["Player"].isin(players)].groupby("Player", observed=True)["Age"].agg(["min", "max"])
+    return ages["min"].max(), ages["max"].min()
+
+def hypothesis_tests(df, n_resamples=N_RESAMPLES, seed=SEED, n_jobs=1):
+    """
+    Batería de contrastes sobre el dataset de varios jugadores:
+      - cada pareja de jugadores en su ventana de edad común (PLAYER_METRICS)
+      - local frente a visitante y titular frente a suplente de cada jugador (SPLIT_METRICS)
+    Devuelve un DataFrame con una fila por contraste.
+    """
+    df = df.assign(Player=df["Player"].astype(object), **{col: df[col].astype(object) for col, _, _ in SPLITS.values()})
+    players = list(pd.unique(df["Player"].dropna()))
+    rows = []
+
+    def add(test, group_a, group_b, df_a, df_b, metrics):
+        for metric in metrics:
+            label = f"{test}|{group_a}|{group_b}|{metric}"
+            rows.append({"test": test, "group_a": group_a, "group_b": group_b,
+                         **compare(df_a, df_b, metric, n_resamples, seed, label, n_jobs)})
+
+    for player_a, player_b in combinations(players, 2):
+        low, high = same_age_window(df, [player_a, player_b])
+        if not low <= high:
+            print(f"⚠️ {player_a} y {player_b} no coinciden en edad: se omite la comparativa")
+            continue
+        window = df[df["Age"].between(low, high)]
+        add(f"same_age_{low:.2f}-{high:.2f}", player_a, player_b,
+            window[window["Player"] == player_a], window[window["Player"] == player_b], PLAYER_METRICS)
+
+    for player in players:
+        own = df[df["Player"] == player]
+        for split, (col, value_a, value_b) in SPLITS.items():
+            add(f"{split}:{player}", value_a, value_b, own[own[col] == value_a], own[own[col] == value_b], SPLIT_METRICS)
+    return pd.DataFrame(rows)
+
+def load_players(ids=None):
+    """Partidos de varios jugadores del registro (los que no tienen datos procesados se omiten)."""
+    frames = []
+    for player_id in ids or player_ids():
+        try:
+            frames.append(read_dataset(get_player(player_id)["cleaned_path"], columns=STATS_COLUMNS))
+        except FileNotFoundError:
+            print(f"⚠️ {player_id} no tiene datos procesados: se omite")
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=STATS_COLUMNS)
+
+def print_results(results):
+    for r in results.itertuples():
+        if pd.isna(getattr(r, "p_value", np.nan)):
+            print(f"   {r.test} · {r.metric}: sin partidos suficientes ({r.n_a} / {r.n_b})")
+            continue
+        verdict = f"✅ diferencia significativa (p = {r.p_value:.4f})" if r.significant else f"❌ sin diferencia significativa (p = {r.p_value:.4f})"
+        print(f"   {r.test} · {r.metric}: {r.group_a} {r.value_a:.2f} [{r.ci_a_low:.2f}, {r.ci_a_high:.2f}] vs "
+              f"{r.group_b} {r.value_b:.2f} [{r.ci_b_low:.2f}, {r.ci_b_high:.2f}] → {verdict}")
+
+@instrumented("hypothesis_tests")
+def run_tests(ids=None, n_resamples=N_RESAMPLES, seed=SEED, n_jobs=1, output_path=results_path):
+    """Ejecuta la batería de contrastes de los jugadores del registro y la guarda en data/processed/stats/."""
+    results = hypothesis_tests(load_players(ids), n_resamples, seed, n_jobs)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    results.to_csv(output_path, index=False, sep=",", decimal=",", encoding="utf-8")
+    print(f"\n📐 Contrastes de hipótesis ({n_resamples:,} remuestreos, IC {CONFIDENCE:.0%}, α = {ALPHA}):")
+    print_results(results)
+    print(f"✅ Resultados guardados en: {output_path}")
+    return results
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Contrastes de hipótesis por bootstrap y permutación")
+    parser.add_argument("players", nargs="*", help="Ids de config/players.json (todos por defecto)")
+    parser.add_argument("--resamples", type=int, default=N_RESAMPLES, help="Remuestreos por contraste")
+    parser.add_argument("--seed", type=int, default=SEED, help="Semilla (mismos resultados con cualquier número de procesos)")
+    parser.add_argument("--jobs", type=int, default=1, help="Procesos en paralelo para los remuestreos")
+    args = parser.parse_args()
+    run_tests(args.players, args.resamples, args.seed, args.jobs)
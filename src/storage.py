@@ -0,0 +1,105 @@
+# storage.py — Escritura y lectura de datasets procesados (CSV, Parquet o Arrow IPC con tipos reales)
+
+from pathlib import Path
+
+import pandas as pd
+
+from schema import downcast_numbers, encode_categories
+
+# Extensión de fichero de cada formato soportado
+FORMATS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+
+# Orden de preferencia al leer: los formatos columnares permiten proyección y lectura mapeada en memoria
+READ_PREFERENCE = ["arrow", "parquet", "csv"]
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("Los formatos 'parquet' y 'arrow' necesitan pyarrow (pip install pyarrow)") from e
+    return pyarrow
+
+def dataset_path(base_path, fmt):
+    """Ruta del dataset en un formato: data/processed/messi_cleaned_data.csv -> .parquet / .arrow"""
+    return Path(base_path).with_suffix(FORMATS[fmt])
+
+def stored_format(base_path):
+    """Formato que lee read_dataset sin fmt: el primero de READ_PREFERENCE que existe."""
+    for fmt in READ_PREFERENCE:
+        if dataset_path(base_path, fmt).exists():
+            return fmt
+    raise FileNotFoundError(f"No existe el dataset {Path(base_path).with_suffix('')}.*")
+
+def remove_other_formats(base_path, formats):
+    """
+    Borra las copias del dataset en formatos que no se escribieron en esta ejecución: un .arrow de una
+    ejecución anterior con --formats arrow se leería antes que el CSV/Parquet nuevos. Devuelve las rutas borradas.
+    """
+    removed = []
+    for fmt in set(FORMATS) - set(formats):
+        path = dataset_path(base_path, fmt)
+        if path.exists():
+            path.unlink()
+            removed.append(path)
+    return removed
+
+# -------------------- TIPOS --------------------
+
+def to_typed(df):
+    """
+    Copia del DataFrame limpio con tipos reales: Date datetime, Age float (el CSV la guarda como '17,05'),
+    columnas numéricas estrechas y textos repetitivos como categorías con los códigos globales de schema.py.
+    """
+    df = df.copy()
+    if "Date" in df:
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    if "Age" in df and df["Age"].dtype == object:
+        df["Age"] = pd.to_numeric(df["Age"].str.replace(",", ".", regex=False), errors="coerce")
+    return downcast_numbers(encode_categories(df))
+
+# -------------------- ESCRITURA --------------------
+
+def write_dataset(df, base_path, formats=("csv",), decimal=","):
+    """Guarda el dataset en cada formato pedido ('csv', 'parquet', 'arrow'). Devuelve las rutas escritas."""
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Formatos no soportados: {', '.join(sorted(unknown))}. Usa: {', '.join(FORMATS)}")
+
+    paths = []
+    typed = to_typed(df) if set(formats) - {"csv"} else None
+    for fmt in formats:
+        path = dataset_path(base_path, fmt)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if fmt == "csv":
+            df.to_csv(path, index=False, sep=",", decimal=decimal, encoding="utf-8")
+        else:
+            pa = _pyarrow()
+            table = pa.Table.from_pandas(typed, preserve_index=False)
+            if fmt == "parquet":
+                pa.parquet.write_table(table, path)
+            else:
+                pa.feather.write_feather(table, path, compression="uncompressed")
+        paths.append(path)
+    return paths
+
+# -------------------- LECTURA --------------------
+
+def read_dataset(base_path, columns=None, fmt=None, memory_map=True, decimal=","):
+    """
+    Lee un dataset procesado cargando solo las columnas pedidas.
+    Sin fmt se usa el mejor formato disponible (Arrow IPC mapeado en memoria > Parquet > CSV).
+    """
+    fmt = fmt or stored_format(base_path)
+    path = dataset_path(base_path, fmt)
+    columns = list(columns) if columns is not None else None
+
+    if fmt == "arrow":
+        # Sin compresión y con split_blocks las columnas numéricas sin nulos quedan como vistas (de solo lectura)
+        # del fichero mapeado; las que tienen nulos (NaN), fechas y categorías sí se copian al convertir
+        return _pyarrow().feather.read_table(path, columns=columns, memory_map=memory_map).to_pandas(split_blocks=True)
+    if fmt == "parquet":
+        return _pyarrow().parquet.read_table(path, columns=columns, memory_map=memory_map).to_pandas(split_blocks=True)
+
+    return to_typed(pd.read_csv(path, usecols=columns, decimal=decimal))
@@ -0,0 +1,203 @@
+# synthetic.py — Carreras sintéticas a escala: CSV crudos (messistats y FBRef) y páginas archivadas para benchmarks
+
+import argparse
+import gzip
+import hashlib
+import json
+from html import escape
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+synthetic_path = project_root / "data/synthetic"
+
+# Tamaños de los conjuntos sintéticos (filas por jugador)
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000, "10m": 10_000_000}
+
+# Los CSV grandes se generan y escriben por bloques de este número de filas (memoria acotada)
+CHUNK_ROWS = 1_000_000
+
+# Filas por página HTML archivada (las reales tienen ~50 partidos por temporada)
+ROWS_PER_PAGE = 5_000
+
+FBREF_COLUMNS = [
+    "Date", "Day", "Comp", "Round", "Venue", "Result", "Squad", "Opponent",
+    "Start", "Pos", "Min", "Gls", "Ast", "CrdY", "Match Report",
+]
+
+# -------------------- CSV CRUDOS --------------------
+
+def synthetic_messi_raw(n_rows, seed=0):
+    """CSV crudo sintético con el formato de messistats.com (fechas 2004-2025, nulos y saltos de línea incluidos)."""
+    rng = np.random.default_rng(seed)
+    fechas = pd.Timestamp(2004, 8, 1) + pd.to_timedelta(rng.integers(0, 21 * 365, n_rows), unit="D")
+    fechas = pd.Series(fechas.strftime("%d-%m-%Y"), dtype=object)
+    fechas[rng.random(n_rows) < 0.001] = None
+
+    equipos = np.array(["FC Barcelona", "Paris Saint-Germain", "Inter Miami CF", "Argentina", "Real Madrid", "Sevilla", "Brazil", "Uruguay"], dtype=object)
+    competiciones = np.array(["🏆\nLaLiga", "🏆\nUEFA Champions League", "🏆\nWorld Cup Qualifiers (Argentina)", "Copa del Rey", "🏆\nLigue 1", "MLS"], dtype=object)
+    home = equipos[rng.integers(0, len(equipos), n_rows)]
+    away = equipos[rng.integers(0, len(equipos), n_rows)]
+    return pd.DataFrame({
+        "Index": np.arange(1, n_rows + 1),
+        "Date": fechas,
+        "Competition": competiciones[rng.integers(0, len(competiciones), n_rows)],
+        "Home Team": home,
+        "Result": [f"{a}-{b}" for a, b in rng.integers(0, 5, (n_rows, 2))],
+        "Away Team": away,
+        "Lineup": np.array(["⭐\nStarter", "🔁\nSubstitute", "Starter"], dtype=object)[rng.integers(0, 3, n_rows)],
+        "Minutes": np.where(rng.random(n_rows) < 0.02, "", rng.integers(1, 121, n_rows).astype(str)),
+        "Goals": rng.choice(["0", "1", "2", "3", ""], n_rows, p=[0.5, 0.3, 0.12, 0.03, 0.05]),
+        "Assists": rng.choice(["0", "1", "2", ""], n_rows, p=[0.6, 0.3, 0.05, 0.05]),
+        "Cards": rng.choice(["", "1"], n_rows, p=[0.9, 0.1]),
+        "Jersey": "10",
+        "Extra": "",
+    })
+
+def synthetic_fbref_raw(n_rows, seed=0):
+    """CSV crudo sintético con el formato de los match logs de FBRef (prefijos de país, '–' en resultados, temporada)."""
+    rng = np.random.default_rng(seed)
+    fechas = pd.Timestamp(2022, 8, 1) + pd.to_timedelta(np.sort(rng.integers(0, 3 * 365, n_rows)), unit="D")
+    inicio = np.where(fechas.month >= 8, fechas.year, fechas.year - 1)
+
+    internacional = rng.random(n_rows) < 0.15
+    rivales = np.array(["es Betis", "es Real Madrid", "fr Paris S-G", "de Dortmund", "it Napoli", "es Sevilla", "eng England", "de Bayern Munich"], dtype=object)
+    competiciones = np.array(["La Liga", "Champions Lg", "Copa del Rey", "Supercopa de España"], dtype=object)
+    goles = rng.integers(0, 5, (n_rows, 2))
+    marcador = np.array([f"{a}–{b}" for a, b in goles], dtype=object)
+    letra = np.where(goles[:, 0] > goles[:, 1], "W", np.where(goles[:, 0] < goles[:, 1], "L", "D"))
+    return pd.DataFrame({
+        "Date": fechas.strftime("%Y-%m-%d"),
+        "Day": fechas.strftime("%a"),
+        "Comp": np.where(internacional, "Friendlies (M)", competiciones[rng.integers(0, len(competiciones), n_rows)]),
+        "Round": [f"Matchweek {k}" for k in rng.integers(1, 39, n_rows)],
+        "Venue": np.where(rng.random(n_rows) < 0.5, "Home", "Away"),
+        "Result": np.char.add(np.char.add(letra.astype(str), " "), marcador.astype(str)),
+        "Squad": np.where(internacional, "es Spain", "es Barcelona"),
+        "Opponent": rivales[rng.integers(0, len(rivales), n_rows)],
+        "Start": rng.choice(["Y", "N", "Y*"], n_rows, p=[0.6, 0.3, 0.1]),
+        "Pos": "RW",
+        "Min": rng.integers(1, 91, n_rows),
+        "Gls": rng.choice([0, 1, 2], n_rows, p=[0.7, 0.25, 0.05]),
+        "Ast": rng.choice([0, 1, 2], n_rows, p=[0.65, 0.3, 0.05]),
+        "CrdY": rng.choice([0, 1], n_rows, p=[0.9, 0.1]),
+        "Match Report": "Match Report",
+        "Season": [f"{y}-{y + 1}" for y in inicio],
+    })
+
+RAW_GENERATORS = {"messistats": synthetic_messi_raw, "fbref": synthetic_fbref_raw}
+
+def write_raw(source, n_rows, path, seed=0):
+    """Escribe un CSV crudo sintético por bloques de CHUNK_ROWS (cada bloque con su propia semilla)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for k, start in enumerate(range(0, n_rows, CHUNK_ROWS)):
+            chunk = RAW_GENERATORS[source](min(CHUNK_ROWS, n_rows - start), seed=seed + k)
+            if source == "messistats":
+                chunk["Index"] += start
+            chunk.to_csv(f, index=False, header=k == 0)
+    return path
+
+# -------------------- PÁGINAS HTML --------------------
+
+def _cell(value):
+    return "" if pd.isna(value) else escape(str(value))
+
+def messi_page(df):
+    """Página de temporada de messistats.com: tabla sin id, competición y titularidad con icono y salto de línea."""
+    rows = []
+    for row in df.itertuples(index=False):
+        competicion = _cell(row.Competition).replace("🏆\n", "<span>🏆</span>\n   ")
+        lineup = _cell(row.Lineup).split("\n")[-1]
+        cells = [_cell(row.Index), _cell(row.Date), competicion, _cell(row[3]), _cell(row.Result), _cell(row[5]),
+                 f"<i>i</i>\n{lineup}", _cell(row.Minutes), _cell(row.Goals), _cell(row.Assists), _cell(row.Cards),
+                 _cell(row.Jersey), " "]
+        rows.append("<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>")
+    return ('<html><head><meta charset="utf-8"><title>Messi</title></head><body>'
+            "<table><thead><tr><th>#</th><th>Date</th></tr></thead><tbody>"
+            + "\n".join(rows) + "</tbody></table></body></html>").encode()
+
+def fbref_page(df):
+    """Página de match logs de FBRef: tabla 'matchlogs_all' con sobrecabecera y fecha en un <th>."""
+    header = "".join(f"<th>{c}</th>" for c in FBREF_COLUMNS)
+    rows = []
+    for values in df[FBREF_COLUMNS].itertuples(index=False):
+        fecha, *resto = (_cell(v) for v in values)
+        rows.append(f'<tr><th scope="row" data-stat="date"><a href="#">{fecha}</a></th>'
+                    + "".join(f"<td>{c}</td>" for c in resto) + "</tr>")
+    return ('<html><head><meta charset="utf-8"></head><body><div><table class="stats_table" id="matchlogs_all"><thead>'
+            '<tr class="over_header"><th colspan="10"></th><th colspan="4">Performance</th><th></th></tr>'
+            f"<tr>{header}</tr></thead><tbody>" + "\n".join(rows) + "</tbody></table></div></body></html>").encode()
+
+def synthetic_pages(source, n_rows, seed=0, rows_per_page=ROWS_PER_PAGE):
+    """Genera (url, html) de páginas sintéticas con n_rows partidos en total, como las que guarda el archivo."""
+    for k, start in enumerate(range(0, n_rows, rows_per_page)):
+        df = RAW_GENERATORS[source](min(rows_per_page, n_rows - start), seed=seed + k)
+        if source == "messistats":
+            df["Index"] += start
+            yield f"https://www.messistats.com/en/games/0/0/all/0/{k}/0/t/0/0/0/1", messi_page(df)
+        else:
+            season = df["Season"].iloc[0]
+            yield f"https://fbref.com/en/players/synthetic/matchlogs/{season}/Lamine-Yamal-Match-Logs?page={k}", fbref_page(df)
+
+def write_archive(pages, root):
+    """Guarda páginas con la misma estructura que data/archive (index.jsonl + objects/xx/sha.html.gz)."""
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / "index.jsonl", "w", encoding="utf-8") as index:
+        for url, content in pages:
+            sha = hashlib.sha256(content).hexdigest()
+            object_file = root / "objects" / sha[:2] / f"{sha}.html.gz"
+            object_file.parent.mkdir(parents=True, exist_ok=True)
+            with gzip.open(object_file, "wb", compresslevel=1) as f:
+                f.write(content)
+            entry = {"url": url, "sha256": sha, "fetched_at": "2025-01-01T00:00:00+00:00", "status": 200,
+                     "etag": None, "last_modified": None}
+            index.write(json.dumps(entry) + "\n")
+
+def read_archive(root):
+    """(url, html) de las páginas de un archivo sintético, en el orden en que se guardaron."""
+    with open(root / "index.jsonl", encoding="utf-8") as index:
+        for line in index:
+            entry = json.loads(line)
+            with gzip.open(root / "objects" / entry["sha256"][:2] / f"{entry['sha256']}.html.gz", "rb") as f:
+                yield entry["url"], f.read()
+
+# -------------------- CONJUNTOS COMPLETOS --------------------
+
+def fixture_dir(size, root=synthetic_path):
+    return Path(root) / size
+
+def generate(size, root=synthetic_path, seed=0, pages=True):
+    """
+    Crea (si no existe) el conjunto sintético de un tamaño de SIZES en root/<tamaño>/:
+    messi_raw_data.csv, lamine_raw_data.csv y, con pages=True, archive_messistats/ y archive_fbref/.
+    """
+    n_rows = SIZES[size]
+    base = fixture_dir(size, root)
+    done = base / "done.json"
+    if done.exists() and json.loads(done.read_text())["pages"] >= pages:
+        return base
+
+    print(f"🧬 Generando conjunto sintético {size} ({n_rows:,} filas por jugador) en {base}")
+    write_raw("messistats", n_rows, base / "messi_raw_data.csv", seed)
+    write_raw("fbref", n_rows, base / "lamine_raw_data.csv", seed)
+    if pages:
+        for source in RAW_GENERATORS:
+            write_archive(synthetic_pages(source, n_rows, seed), base / f"archive_{source}")
+    done.write_text(json.dumps({"rows": n_rows, "seed": seed, "pages": pages}))
+    return base
+
+# -------------------- EJECUCIÓN DIRECTA --------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generador de carreras sintéticas para benchmarks")
+    parser.add_argument("sizes", nargs="+", choices=list(SIZES), help="Tamaños a generar")
+    parser.add_argument("--out", type=Path, default=synthetic_path, help="Carpeta de salida")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-pages", action="store_true", help="Solo los CSV crudos, sin páginas HTML")
+    args = parser.parse_args()
+    for size in args.sizes:
+        generate(size, args.out, args.seed, pages=not args.no_pages)
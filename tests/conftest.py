@@ -0,0 +1,69 @@
+# conftest.py — Configuración común de las pruebas: módulos de src/ importables y datos generados en una carpeta temporal
+
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+# Detectar la raíz del proyecto para rutas relativas robustas
+project_root = Path(__file__).resolve().parent.parent
+fixtures_path = Path(__file__).resolve().parent / "fixtures"
+sys.path.insert(0, str(project_root / "src"))
+
+@pytest.fixture(autouse=True)
+def isolated_data(tmp_path, monkeypatch):
+    """
+    Cada prueba escribe sus ficheros generados (tabla global de códigos, alias aprendidos...) en tmp_path:
+    nunca toca data/ del proyecto ni depende de lo que haya dejado otra ejecución.
+    """
+    import normalization
+    import schema
+
+    monkeypatch.setattr(schema, "codes_path", tmp_path / "category_codes.json")
+    monkeypatch.setattr(normalization, "learned_path", tmp_path / "aliases_learned.json")
+    monkeypatch.setattr(normalization, "_learned", None)
+    return tmp_path
+
+@pytest.fixture
+def archive_dir(tmp_path, monkeypatch):
+    """Archivo de páginas vacío en tmp_path (índice en memoria incluido)."""
+    import archive
+
+    root = tmp_path / "archive"
+    monkeypatch.setattr(archive, "archive_path", root)
+    monkeypatch.setattr(archive, "objects_path", root / "objects")
+    monkeypatch.setattr(archive, "index_path", root / "index.jsonl")
+    monkeypatch.setattr(archive, "_index", None)
+    return root
+
+@pytest.fixture
+def project_data(tmp_path, monkeypatch):
+    """
+    Proyecto en tmp_path con los CSV crudos sintéticos de tests/fixtures ya procesados: las rutas de cada
+    jugador (players.get_player) y las cachés derivadas (cubos, rolling, índice de edades, stats, export)
+    apuntan a tmp_path/data.
+    """
+    import age_index
+    import cube
+    import export
+    import players
+    import rolling
+    import stats
+    from processing import process_player
+
+    data = tmp_path / "data"
+    monkeypatch.setattr(players, "project_root", tmp_path)
+    monkeypatch.setattr(cube, "cubes_path", data / "processed/cubes")
+    monkeypatch.setattr(rolling, "rolling_path", data / "processed/rolling")
+    monkeypatch.setattr(age_index, "age_index_path", data / "processed/age_index")
+    monkeypatch.setattr(stats, "stats_path", data / "processed/stats")
+    monkeypatch.setattr(stats, "results_path", data / "processed/stats/hypothesis_tests.csv")
+    monkeypatch.setattr(export, "export_path", data / "export")
+    monkeypatch.setattr(export, "manifest_path", data / "export/manifest.json")
+    for player_id in players.player_ids():
+        raw_path = players.get_player(player_id)["raw_path"]
+        raw_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy(fixtures_path / f"{player_id}_raw_synthetic.csv", raw_path)
+        process_player(player_id, return_df=False)
+    return data
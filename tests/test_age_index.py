@@ -0,0 +1,47 @@
+# test_age_index.py — Totales de carrera a una edad exacta frente a filtrar los partidos por fecha
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import age_index
+from age_index import age_curves, age_days, at_age, build_age_index, compare_at_age, load_age_index
+from players import get_player
+from storage import read_dataset
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(age_index, "_loaded", {})
+
+def test_age_days_follows_birthdays():
+    assert age_days(18, "2007-07-13") == (pd.Timestamp("2025-07-13") - pd.Timestamp("2007-07-13")).days
+    assert age_days(1) == 365
+
+@pytest.mark.parametrize("player_id", ["messi", "lamine"])
+def test_at_age_matches_filter(player_id, project_data):
+    player = get_player(player_id)
+    df = read_dataset(player["cleaned_path"], columns=age_index.AGE_COLUMNS)
+    index = build_age_index(df, player["birthdate"])
+    fechas = df["Date"].dropna().sort_values()
+    for fecha in [fechas.iloc[0] - pd.Timedelta(days=1), fechas.iloc[0], fechas.iloc[len(fechas) // 2], fechas.iloc[-1]]:
+        hasta = df[df["Date"] <= fecha]
+        totals = at_age(index, (fecha - pd.Timestamp(player["birthdate"])).days)
+        assert totals["Matches"] == len(hasta)
+        for m in age_index.MEASURES:
+            assert totals[m] == hasta[m].fillna(0).sum()
+
+def test_compare_and_cache(project_data):
+    result = compare_at_age(["messi", "lamine"], 17.5)
+    assert list(result.index) == ["Leo Messi", "Lamine Yamal"]
+    assert list(result.columns) == ["Matches"] + age_index.MEASURES
+    assert len(list(age_index.age_index_path.glob("*.parquet"))) == 2
+    # Desde disco, sin la caché del proceso
+    age_index._loaded.clear()
+    assert np.array_equal(load_age_index("lamine")["Goals"], build_age_index(
+        read_dataset(get_player("lamine")["cleaned_path"]), get_player("lamine")["birthdate"])["Goals"])
+
+def test_age_curves_grid():
+    index = {"age_days": np.array([10, 20, 40]), "Matches": np.arange(4), **{m: np.array([0, 1, 1, 3]) for m in age_index.MEASURES}}
+    curves = age_curves({"A": index}, step_days=10, measures=("Goals",))
+    assert curves[("Goals", "A")].tolist() == [1, 1, 1, 3]
+    assert curves.index.tolist() == [0.03, 0.05, 0.08, 0.11]
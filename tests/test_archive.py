@@ -0,0 +1,41 @@
+# test_archive.py — Archivo local de páginas: contenido deduplicado, historial y revalidación
+
+import gzip
+
+import archive
+
+URL = "https://www.messistats.com/en/games/0/0/all/0/2/0/t/0/0/0/1"
+
+def test_store_and_load(archive_dir):
+    sha = archive.store(URL, b"<html>v1</html>", etag='"abc"', last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    assert archive.load(URL) == b"<html>v1</html>"
+    with gzip.open(archive_dir / "objects" / sha[:2] / f"{sha}.html.gz") as f:
+        assert f.read() == b"<html>v1</html>"
+    assert archive.conditional_headers(URL) == {"If-None-Match": '"abc"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+def test_unknown_url(archive_dir):
+    assert archive.load(URL) is None
+    assert archive.latest(URL) is None
+    assert archive.conditional_headers(URL) == {}
+
+def test_identical_content_is_stored_once(archive_dir):
+    archive.store(URL, b"<html>igual</html>")
+    archive.store(URL + "?otra", b"<html>igual</html>")
+    assert len(list((archive_dir / "objects").rglob("*.html.gz"))) == 1
+    assert len(archive.history(URL)) == 1
+
+def test_history_and_not_modified(archive_dir):
+    first = archive.store(URL, b"v1")
+    archive.store(URL, b"v2")
+    entry = archive.record_not_modified(URL)
+    assert [e["status"] for e in archive.history(URL)] == [200, 200, 304]
+    assert entry["sha256"] != first
+    assert archive.load(URL) == b"v2"
+    assert archive.load(URL, before="2000-01-01") is None
+
+def test_index_is_persisted(archive_dir, monkeypatch):
+    archive.store(URL, b"v1")
+    archive.record_not_modified(URL)
+    monkeypatch.setattr(archive, "_index", None)
+    assert [e["status"] for e in archive.history(URL)] == [200, 304]
+    assert archive.load(URL) == b"v1"
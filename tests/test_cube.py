@@ -0,0 +1,64 @@
+# test_cube.py — Cubo de agregados: cortes iguales a un groupby, unión de cubos parciales y caché en disco
+
+import numpy as np
+import pandas as pd
+
+import cube
+from cube import MEASURES, build_cube, load_cube, merge_cubes, slice_cube
+from players import get_player
+from storage import read_dataset
+
+def _matches():
+    return pd.DataFrame({
+        "Date": pd.to_datetime(["2020-08-20", "2020-09-01", "2020-09-15", None, "2021-01-10"]),
+        "Player": "Leo Messi",
+        "Season": ["2020-2021", "2020-2021", "2020-2021", None, "2020-2021"],
+        "Competition": ["La Liga", "La Liga", "Copa del Rey", "La Liga", None],
+        "Home/Away": ["Home", "Away", "Home", "Home", "Away"],
+        "Lineup": "Starter",
+        "Goals": [1, 0, 2, 1, 3],
+        "Assists": [0, 1, 0, 0, 0],
+        "Minutes": [90, 90, 45, 90, 90],
+        "Cards": [0, 0, 1, 0, 0],
+    })
+
+def test_totals_and_nulls_are_kept():
+    df = _matches()
+    result = build_cube(df)
+    assert result[MEASURES].sum().tolist() == df[MEASURES].sum().tolist()
+    assert result["Matches"].sum() == len(df)
+    # El partido sin fecha ni temporada y el de competición nula siguen en el cubo
+    assert result["Year"].isna().sum() == 1
+    assert result["Competition"].isna().sum() == 1
+
+def test_year_and_month():
+    result = build_cube(_matches().dropna())
+    assert sorted(zip(result["Year"], result["Month"])) == [(2020, 8), (2020, 9), (2020, 9)]
+    assert result["Year"].dtype == np.int32
+
+def test_slice_matches_groupby(project_data):
+    df = read_dataset(get_player("messi")["cleaned_path"], columns=cube.CUBE_COLUMNS)
+    result = build_cube(df)
+    for by in ["Season", "Competition", ["Season", "Home/Away"]]:
+        expected = df.groupby(by, observed=True)[MEASURES].sum()
+        expected.index = expected.index.set_levels([lvl.astype(object) for lvl in expected.index.levels]) \
+            if isinstance(expected.index, pd.MultiIndex) else expected.index.astype(object)
+        pd.testing.assert_frame_equal(slice_cube(result, by, MEASURES), expected.sort_index(), check_dtype=False, check_names=False)
+
+def test_merge_of_chunks_equals_whole(project_data):
+    df = read_dataset(get_player("lamine")["cleaned_path"], columns=cube.CUBE_COLUMNS)
+    merged = merge_cubes([build_cube(df.iloc[start:start + 33]) for start in range(0, len(df), 33)])
+    for by in ["Season", ["Competition", "Lineup"]]:
+        pd.testing.assert_frame_equal(slice_cube(merged, by, MEASURES + ["Matches"]), slice_cube(build_cube(df), by, MEASURES + ["Matches"]))
+
+def test_load_cube_is_cached_until_data_changes(project_data):
+    first = load_cube("messi")
+    saved = list(cube.cubes_path.glob("messi_*.parquet"))
+    assert len(saved) == 1
+    pd.testing.assert_frame_equal(load_cube("messi"), first)
+
+    df = read_dataset(get_player("messi")["cleaned_path"], fmt="csv").iloc[:50]
+    df.to_parquet(get_player("messi")["cleaned_path"].with_suffix(".parquet"))
+    assert load_cube("messi")["Matches"].sum() == 50
+    assert list(cube.cubes_path.glob("messi_*.parquet")) != saved
+    assert len(list(cube.cubes_path.glob("messi_*.parquet"))) == 1
@@ -0,0 +1,73 @@
+# test_export.py — Exportación particionada: contenido de particiones y resúmenes, y reescritura solo de lo que cambia
+
+import pandas as pd
+
+import export
+from export import export_players, load_manifest
+from players import get_player
+from processing import process_player
+
+def _detail(player_id):
+    """Partidos exportados de un jugador (todas sus particiones CSV) en el orden del CSV limpio."""
+    manifest = load_manifest()
+    parts = [pd.read_csv(export.export_path / entry["files"][0], dtype=str, keep_default_na=False)
+             for key, entry in sorted(manifest["partitions"].items()) if entry["player"] == player_id]
+    return pd.concat(parts)
+
+def _modified(section):
+    return {key: entry["modified"] for key, entry in load_manifest()[section].items()}
+
+def _reprocess(player_id, edit):
+    raw_path = get_player(player_id)["raw_path"]
+    raw = pd.read_csv(raw_path, dtype=str, keep_default_na=False)
+    edit(raw).to_csv(raw_path, index=False)
+    process_player(player_id, return_df=False)
+
+def test_partitions_and_summaries(project_data):
+    files = export_players()
+    assert all(path.exists() for path in files)
+    manifest = load_manifest()
+    cleaned = pd.read_csv(get_player("lamine")["cleaned_path"], dtype=str, keep_default_na=False)
+    assert {entry["season"] for entry in manifest["partitions"].values() if entry["player"] == "lamine"} == set(cleaned["Season"])
+    # Cada partición guarda el texto del CSV limpio tal cual (mismas filas, edad con coma decimal)
+    detail = _detail("lamine")
+    pd.testing.assert_frame_equal(detail.sort_values(["Date", "Home Team"], kind="stable").reset_index(drop=True),
+                                  cleaned.sort_values(["Date", "Home Team"], kind="stable").reset_index(drop=True))
+
+    career = pd.read_parquet(export.export_path / "summary/career.parquet").set_index("Player")
+    assert career.loc["Lamine Yamal", "Matches"] == len(cleaned)
+    assert career.loc["Lamine Yamal", "Goals"] == cleaned["Goals"].astype(int).sum()
+
+def test_unchanged_data_is_not_rewritten(project_data):
+    export_players()
+    partitions, summaries = _modified("partitions"), _modified("summaries")
+    mtimes = {path: path.stat().st_mtime_ns for path in export.manifest_files() if path != export.manifest_path}
+    export_players()
+    assert _modified("partitions") == partitions and _modified("summaries") == summaries
+    assert {path: path.stat().st_mtime_ns for path in mtimes} == mtimes
+
+def test_only_changed_season_is_rewritten(project_data, monkeypatch):
+    monkeypatch.setattr(export, "_now", lambda: "antes")
+    export_players()
+    monkeypatch.setattr(export, "_now", lambda: "después")
+
+    def edit(raw):
+        raw.loc[0, "Gls"] = "7"
+        return raw
+
+    _reprocess("lamine", edit)
+    export_players(["lamine"])
+    changed = {key for key, modified in _modified("partitions").items() if modified == "después"}
+    season = pd.read_csv(get_player("lamine")["cleaned_path"], nrows=1)["Season"].iloc[0]
+    assert changed == {f"detail/player=lamine/season={season}"}
+    assert {key for key, modified in _modified("summaries").items() if modified == "después"} == set(f"summary/{s}" for s in export.SUMMARIES)
+
+def test_removed_season_is_deleted(project_data):
+    export_players()
+    first_season = pd.read_csv(get_player("lamine")["cleaned_path"])["Season"].iloc[0]
+    _reprocess("lamine", lambda raw: raw[pd.to_datetime(raw["Date"]) >= pd.Timestamp(first_season[5:] + "-08-01")])
+    export_players(["lamine"])
+    assert f"detail/player=lamine/season={first_season}" not in load_manifest()["partitions"]
+    assert not (export.export_path / f"detail/player=lamine/season={first_season}").exists()
+    # Las particiones de otros jugadores se conservan
+    assert any(entry["player"] == "messi" for entry in load_manifest()["partitions"].values())
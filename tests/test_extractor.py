@@ -0,0 +1,63 @@
+# test_extractor.py — Extracción de tablas en streaming frente a BeautifulSoup y pd.read_html
+
+import io
+
+import pandas as pd
+import pytest
+from bs4 import BeautifulSoup
+
+from extractor import extract_fbref_table, extract_messi_table
+from scraping import MESSI_HEADERS, parse_lamine_page, parse_messi_page
+from synthetic import fbref_page, messi_page, synthetic_fbref_raw, synthetic_messi_raw
+
+class _Trickle(io.BytesIO):
+    """Fichero que entrega como mucho 7 bytes por lectura: filas y celdas quedan partidas entre trozos."""
+    def read(self, size=-1):
+        return super().read(7)
+
+SOURCES = [bytes, _Trickle]
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_messi_table_matches_beautifulsoup(source):
+    content = messi_page(synthetic_messi_raw(40))
+    soup = BeautifulSoup(content, "html.parser")
+    rows = [[td.text.strip() for td in tr.find_all("td")] for tr in soup.find_all("tr")]
+    expected = pd.DataFrame([r for r in rows if r], columns=MESSI_HEADERS)
+    pd.testing.assert_frame_equal(parse_messi_page(source(content)), expected)
+
+def test_messi_short_rows_are_padded_and_empty_page_is_none():
+    html = b"<table><tr><td>1</td><td>a</td></tr><tr><td>2</td></tr></table>"
+    df = extract_messi_table(html, ["Index", "Date", "Competition"])
+    assert df.to_dict("list") == {"Index": ["1", "2"], "Date": ["a", None]}
+    assert extract_messi_table(b"<html><body><p>Sin partidos</p></body></html>", MESSI_HEADERS) is None
+
+def test_messi_extra_cells_raise():
+    """Una fila con más celdas que cabeceras no pierde celdas en silencio (como pd.DataFrame del código original)."""
+    html = b"<table><tr><td>1</td><td>a</td><td>x</td></tr></table>"
+    with pytest.raises(ValueError):
+        pd.DataFrame([["1", "a", "x"]], columns=["Index", "Date"])
+    with pytest.raises(ValueError, match="2 columns passed"):
+        extract_messi_table(html, ["Index", "Date"])
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_fbref_table_matches_read_html(source):
+    content = fbref_page(synthetic_fbref_raw(40))
+    expected = pd.read_html(io.BytesIO(content), attrs={"id": "matchlogs_all"})[0]
+    expected.columns = expected.columns.get_level_values(-1)
+    pd.testing.assert_frame_equal(extract_fbref_table(source(content), "matchlogs_all"), expected)
+
+def test_fbref_missing_table():
+    with pytest.raises(ValueError):
+        extract_fbref_table(b"<table id='otra'><tr><td>1</td></tr></table>", "matchlogs_all")
+
+def test_lamine_page_takes_season_from_url():
+    df = parse_lamine_page(fbref_page(synthetic_fbref_raw(5)), "https://fbref.com/en/players/x/matchlogs/2023-2024/Lamine-Yamal-Match-Logs")
+    assert len(df) == 5
+    assert (df["Season"] == "2023-2024").all()
+
+def test_scrape_players_with_empty_registry(monkeypatch):
+    """Sin jugadores no se crea el pool (ThreadPoolExecutor no admite 0 hilos)."""
+    import scraping
+
+    monkeypatch.setattr(scraping, "player_ids", lambda: [])
+    assert scraping.scrape_players() is None
@@ -0,0 +1,40 @@
+# test_instrumentation.py — Registro de métricas: volcado de los procesos de un pool
+
+import json
+import os
+
+import pytest
+
+import instrumentation
+from instrumentation import flush, measure
+from processing import process_players
+
+@pytest.fixture
+def metrics(tmp_path, monkeypatch):
+    """Registro activado con las salidas en tmp_path; lo pendiente se vuelca antes de restaurar las rutas."""
+    root = tmp_path / "metrics"
+    monkeypatch.setattr(instrumentation, "ENABLED", True)
+    monkeypatch.setattr(instrumentation, "metrics_path", root)
+    monkeypatch.setattr(instrumentation, "events_path", root / "events.jsonl")
+    monkeypatch.setattr(instrumentation, "totals_path", root / "totals.json")
+    monkeypatch.setattr(instrumentation, "prometheus_path", root / "pipeline.prom")
+    yield root
+    flush()
+
+def _events(root):
+    return [json.loads(line) for line in (root / "events.jsonl").read_text(encoding="utf-8").splitlines()]
+
+def test_pool_workers_flush_their_events(project_data, metrics, tmp_path):
+    """Los trabajadores del pool no pasan por atexit: sus etapas llegan igual a events.jsonl, y solo una vez."""
+    with measure("antes_del_pool"):
+        pass
+    process_players(["messi", "lamine"], output_rel=str(tmp_path / "players.csv"), max_workers=2)
+    flush()
+    events = _events(metrics)
+    workers = [e for e in events if e["stage"] == "process_player"]
+    assert sorted(e["labels"]["player_id"] for e in workers) == ["lamine", "messi"]
+    assert all(e["pid"] != os.getpid() for e in workers)
+    # El pendiente del padre que heredan los hijos (fork) no se vuelca dos veces
+    assert [e["stage"] for e in events].count("antes_del_pool") == 1
+    totals = json.loads((metrics / "totals.json").read_text(encoding="utf-8"))
+    assert sum(s["runs"] for k, s in totals.items() if '"process_player"' in k) == 2
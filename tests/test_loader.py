@@ -0,0 +1,78 @@
+# test_loader.py — Carga en base de datos (SQLite) y lectura: upsert idempotente, resumen precalculado y trozos tipados
+
+import pandas as pd
+import pytest
+from sqlalchemy import func, select
+
+from cube import CUBE_COLUMNS, build_cube, slice_cube
+from db import get_engine
+from loader import load_frame, load_players, matches_table, totals_table
+from players import get_player
+from reader import load_cube_db, matches_query, read_matches, stream_matches, summary
+from storage import read_dataset
+
+@pytest.fixture
+def engine(project_data):
+    engine = get_engine(f"sqlite:///{project_data / 'futbol.db'}")
+    load_players(engine=engine)
+    return engine
+
+def _stored(player_id):
+    """Partidos del dataset limpio que identifica la base de datos (con fecha y equipos, última versión de cada uno)."""
+    df = read_dataset(get_player(player_id)["cleaned_path"]).dropna(subset=["Date", "Home Team", "Away Team"])
+    return df.drop_duplicates(subset=["Date", "Home Team", "Away Team"], keep="last")
+
+def _count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(table)).scalar()
+
+def test_load_is_idempotent(engine):
+    rows = len(_stored("messi")) + len(_stored("lamine"))
+    assert _count(engine, matches_table) == rows
+    load_players(engine=engine)
+    assert _count(engine, matches_table) == rows
+
+def test_summary_matches_pandas(engine):
+    df = _stored("lamine")
+    result = summary(["Season"], engine, players="lamine")
+    expected = df.groupby("Season", observed=True).agg(Matches=("Goals", "size"), Goals=("Goals", "sum"), Minutes=("Minutes", "sum"))
+    assert result[["Matches", "Goals", "Minutes"]].to_dict() == expected.astype("int64").to_dict()
+    with pytest.raises(ValueError):
+        summary(["Planeta"], engine)
+
+def test_reload_updates_only_changed_totals(engine):
+    player = get_player("lamine")
+    df = read_dataset(player["cleaned_path"], fmt="csv")
+    before = summary(["Season"], engine, players="lamine")
+    season = df["Season"].iloc[-1]
+    last = df.iloc[[-1]].assign(Goals=df["Goals"].iloc[-1] + 10)
+    assert load_frame(last, player, engine) == 1
+    after = summary(["Season"], engine, players="lamine")
+    assert after.loc[season, "Goals"] == before.loc[season, "Goals"] + 10
+    assert after.drop(index=season).equals(before.drop(index=season))
+    assert _count(engine, totals_table) > 0
+
+def test_read_matches_has_dataset_types(engine):
+    columns = ["Date", "Season", "Competition", "Home Team", "Goals", "Minutes"]
+    text = {c: object for c in ["Season", "Competition", "Home Team"]}
+    df = read_matches(columns, chunk_rows=40, engine=engine, players="messi")
+    expected = _stored("messi")[columns].astype(text).sort_values(columns).reset_index(drop=True)
+    pd.testing.assert_frame_equal(df.astype(text).sort_values(columns).reset_index(drop=True), expected, check_dtype=False)
+    chunks = list(stream_matches(columns, chunk_rows=40, engine=engine, players="messi"))
+    assert len(chunks) > 1
+    assert all(chunk.dtypes.equals(chunks[0].dtypes) for chunk in chunks)
+    assert chunks[0]["Goals"].dtype == df["Goals"].dtype
+
+def test_filters(engine):
+    df = _stored("messi")
+    season = df["Season"].astype(object).iloc[0]
+    result = read_matches(["Season"], engine=engine, players=["messi"], seasons=season, date_to=df["Date"].max())
+    assert len(result) == (df["Season"] == season).sum()
+    with pytest.raises(ValueError):
+        matches_query(["Altura"])
+
+def test_cube_from_database(engine):
+    df = _stored("lamine")[CUBE_COLUMNS]
+    cube = load_cube_db("lamine", engine, chunk_rows=50)
+    measures = ["Goals", "Minutes", "Matches"]
+    pd.testing.assert_frame_equal(slice_cube(cube, "Season", measures), slice_cube(build_cube(df), "Season", measures), check_dtype=False)
@@ -0,0 +1,41 @@
+# test_locks.py — Bloqueo entre procesos sobre ficheros .lock
+
+import multiprocessing
+
+import pytest
+
+from locks import file_lock
+
+def _hold(path, ready, release):
+    with file_lock(path):
+        ready.set()
+        release.wait(10)
+
+def test_lock_held_by_other_process_times_out(tmp_path):
+    path = tmp_path / "tabla.json"
+    ready, release = multiprocessing.Event(), multiprocessing.Event()
+    holder = multiprocessing.Process(target=_hold, args=(path, ready, release))
+    holder.start()
+    try:
+        assert ready.wait(10)
+        with pytest.raises(TimeoutError, match=str(holder.pid)):
+            with file_lock(path, timeout=0.1):
+                pass
+    finally:
+        release.set()
+        holder.join()
+    # Liberado al terminar el otro proceso: se obtiene sin esperar
+    with file_lock(path, timeout=0.1):
+        assert path.with_suffix(".lock").exists()
+
+def test_lock_released_when_holder_dies(tmp_path):
+    """El sistema libera el bloqueo de un proceso muerto: nunca hay que borrar el .lock a mano."""
+    path = tmp_path / "tabla.json"
+    ready, release = multiprocessing.Event(), multiprocessing.Event()
+    holder = multiprocessing.Process(target=_hold, args=(path, ready, release))
+    holder.start()
+    assert ready.wait(10)
+    holder.kill()
+    holder.join()
+    with file_lock(path, timeout=1):
+        pass
@@ -0,0 +1,49 @@
+# test_normalization.py — Tabla de alias: nombres canónicos, búsqueda aproximada y alias aprendidos
+
+import json
+
+import pandas as pd
+
+import normalization
+from normalization import fold, normalize, resolve_names
+
+def test_fold_ignores_accents_case_and_punctuation():
+    assert fold("Atlético-Madrid") == "atletico madrid"
+    assert fold("  CÁDIZ  ") == "cadiz"
+
+def test_exact_and_folded_aliases():
+    assert resolve_names(["Barcelona", "FC Barcelona", "cadiz", "BAYERN munich"], "teams", fuzzy=False) == [
+        "FC Barcelona", "FC Barcelona", "Cádiz", "Bayern München",
+    ]
+    assert resolve_names(["Champions Lg", "Friendlies (M)"], "competitions") == ["UEFA Champions League", "International friendly"]
+
+def test_unknown_and_non_text_names_are_kept():
+    assert resolve_names(["Equipo Inventado", None, 3.0], "teams") == ["Equipo Inventado", None, 3.0]
+
+def test_fuzzy_alias_is_learned_and_saved(isolated_data):
+    assert resolve_names(["Borussia Dortmun"], "teams") == ["Borussia Dortmund"]
+    saved = json.loads(normalization.learned_path.read_text(encoding="utf-8"))
+    assert saved["teams"] == {"borussia dortmun": "Borussia Dortmund"}
+    assert saved["version"] == normalization.load_aliases()["version"]
+    # Sin búsqueda aproximada no se aplica
+    assert resolve_names(["Borussia Dortmun"], "teams", fuzzy=False) == ["Borussia Dortmun"]
+
+def test_learned_aliases_from_another_table_are_discarded(isolated_data):
+    normalization.learned_path.write_text(json.dumps({"version": "otra", "teams": {"foo": "FC Barcelona"}, "competitions": {}}))
+    assert resolve_names(["Foo"], "teams") == ["Foo"]
+
+def test_fuzzy_match_respects_reserve_markers():
+    """'Barcelona B' no es el primer equipo aunque el nombre se parezca."""
+    assert resolve_names(["Barcelona B", "Real Madrid Castilla"], "teams") == ["Barcelona B", "Real Madrid Castilla"]
+
+def test_normalize_keeps_index_nulls_and_strips_country():
+    serie = pd.Series(["es Barcelona", None, "eng England", "es Barcelona"], index=[10, 11, 12, 13], name="Squad")
+    result = normalize(serie, "teams", strip_country=True)
+    assert result.index.tolist() == [10, 11, 12, 13]
+    assert result.name == "Squad"
+    assert result.tolist()[0] == "FC Barcelona" and result.tolist()[2:] == ["England", "FC Barcelona"]
+    assert pd.isna(result[11])
+
+def test_normalize_categorical_input():
+    serie = pd.Series(pd.Categorical(["Mallorca", "Betis", "Mallorca"], categories=["Betis", "Mallorca", "Sin uso"]))
+    assert normalize(serie, "teams").tolist() == ["Real Mallorca", "Real Betis", "Real Mallorca"]
@@ -0,0 +1,34 @@
+# test_pipeline.py — Hashes de las etapas: qué cambios obligan a repetir cada una
+
+import json
+
+import pytest
+
+import pipeline
+from pipeline import _stage_hash, build_stages
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "project_root", tmp_path)
+    monkeypatch.setattr(pipeline, "aliases_path", tmp_path / "config/aliases.json")
+    monkeypatch.setattr(pipeline, "learned_path", tmp_path / "data/processed/aliases_learned.json")
+    return tmp_path
+
+def _hash(name, **options):
+    stage = next(s for s in build_stages(["messi"], **options) if s["name"] == name)
+    return _stage_hash(stage, {}, {})
+
+def test_process_hash_covers_alias_files(project):
+    before = _hash("process:messi")
+    for path in (pipeline.aliases_path, pipeline.learned_path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"teams": {}}), encoding="utf-8")
+        after = _hash("process:messi")
+        assert after != before
+        before = after
+
+def test_scrape_hash_covers_mode_flags(project):
+    """Pasar a --replay o --incremental (o dejarlo) vuelve a scrapear aunque la etapa no haya caducado."""
+    hashes = {_hash("scrape:messi", replay=replay, incremental=incremental)
+              for replay in (False, True) for incremental in (False, True)}
+    assert len(hashes) == 4
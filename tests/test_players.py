@@ -0,0 +1,26 @@
+# test_players.py — Registro de jugadores de config/players.json
+
+import pandas as pd
+import pytest
+
+import players
+from players import get_player, player_ids, season_overrides
+
+def test_registry_ids_and_paths():
+    assert player_ids()[:2] == ["messi", "lamine"]
+    player = get_player("lamine")
+    assert (player["id"], player["source"], player["name"]) == ("lamine", "fbref", "Lamine Yamal")
+    assert player["raw_path"] == players.project_root / "data/raw/lamine_raw_data.csv"
+    assert player["cleaned_path"] == players.project_root / "data/processed/lamine_cleaned_data.csv"
+
+def test_unknown_player():
+    with pytest.raises(KeyError, match="Disponibles: messi, lamine"):
+        get_player("ronaldinho")
+
+def test_get_player_returns_a_copy():
+    get_player("messi")["name"] = "Otro"
+    assert get_player("messi")["name"] == "Leo Messi"
+
+def test_season_overrides():
+    assert season_overrides(get_player("messi")) == [(pd.Timestamp("2019-08-15"), pd.Timestamp("2020-08-14"), 2019)]
+    assert season_overrides(get_player("lamine")) == []
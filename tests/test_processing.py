@@ -0,0 +1,152 @@
+# test_processing.py — Transformaciones de processing.py frente a la salida del código original
+
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import fixtures_path
+from processing import SCORE_COLUMNS, process_player, transform_fbref, transform_messistats
+from players import get_player
+from storage import read_dataset
+
+# Los *_baseline_*.csv son la salida de process_data / process_lamine_data del commit base (30314b3),
+# generada una vez con ese código sobre los *_raw_*.csv: fijan el comportamiento original sin depender
+# de nada de lo que se quiere comprobar. *_sample son datos reales; *_synthetic, de synthetic.py.
+
+def _cleaned_text(path, drop=()):
+    """CSV limpio como texto, tal cual se escribió (sin reinterpretar números) y sin las columnas drop."""
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    return df.drop(columns=list(drop)).to_csv(index=False)
+
+# -------------------- MESSISTATS --------------------
+
+@pytest.mark.parametrize("sample", ["sample", "synthetic"])
+def test_process_data_matches_baseline(sample, tmp_path):
+    """El CSV limpio de Messi es el del código original byte a byte, más las columnas del marcador al final."""
+    output = tmp_path / "messi_cleaned_data.csv"
+    process_player("messi", fixtures_path / f"messi_raw_{sample}.csv", output, return_df=False)
+    columns = list(pd.read_csv(output, nrows=0).columns)
+    assert columns[-len(SCORE_COLUMNS):] == SCORE_COLUMNS
+    assert _cleaned_text(output, SCORE_COLUMNS) == _cleaned_text(fixtures_path / f"messi_baseline_{sample}.csv")
+
+def test_messistats_names_use_alias_table():
+    """Cambio declarado (TRANSFORM_VERSION 3): los equipos de messistats pasan a su nombre canónico."""
+    raw = pd.read_csv(io.StringIO(
+        "Index,Date,Competition,Home Team,Result,Away Team,Lineup,Minutes,Goals,Assists,Cards,Jersey,Extra\n"
+        "1,01-10-2010,\"X\nLaLiga\",FC Barcelona,2-0,Mallorca,\"i\nStarter\",90,1,0,0,10,\n"
+        "2,08-10-2010,\"X\nLaLiga\",Cadiz,1-1,FC Barcelona,\"i\nStarter\",90,0,1,0,10,\n"
+    ))
+    df = transform_messistats(raw, get_player("messi"))
+    assert df["Away Team"].tolist() == ["Real Mallorca", "FC Barcelona"]
+    assert df["Home Team"].tolist() == ["FC Barcelona", "Cádiz"]
+    assert df["Rival_Team_Name"].tolist() == ["Real Mallorca", "Cádiz"]
+    assert df["Home/Away"].tolist() == ["Home", "Away"]
+
+# -------------------- FBREF --------------------
+
+@pytest.mark.parametrize("sample", ["sample", "synthetic"])
+def test_process_fbref_matches_baseline(sample, tmp_path):
+    """El CSV limpio de Lamine es el de process_lamine_data original (diccionarios literales, apply por fila)."""
+    output = tmp_path / "lamine_cleaned_data.csv"
+    process_player("lamine", fixtures_path / f"lamine_raw_{sample}.csv", output, return_df=False)
+    assert _cleaned_text(output, SCORE_COLUMNS) == _cleaned_text(fixtures_path / f"lamine_baseline_{sample}.csv")
+
+@pytest.mark.parametrize("sample", ["sample", "synthetic"])
+def test_fbref_outcome_matches_result_letter(sample):
+    """Goals_For / Goals_Against / Outcome coherentes con la letra W/D/L de FBRef allí donde hay marcador."""
+    raw = pd.read_csv(fixtures_path / f"lamine_raw_{sample}.csv")
+    df = transform_fbref(raw.copy(), get_player("lamine"))
+    letra = raw["Result"].astype(str).str[:1]
+    con_marcador = letra.isin(["W", "D", "L"]) & df["Outcome"].notna()
+    assert con_marcador.sum() > 0
+    assert (df.loc[con_marcador, "Outcome"] == letra[con_marcador]).all()
+    goles = df.loc[con_marcador, ["Goals_For", "Goals_Against"]].astype(int)
+    esperado = np.where(goles["Goals_For"] > goles["Goals_Against"], "W", np.where(goles["Goals_For"] < goles["Goals_Against"], "L", "D"))
+    assert (df.loc[con_marcador, "Outcome"].to_numpy() == esperado).all()
+
+def test_dates_use_fixed_format_per_source():
+    """Cada fuente lee sus fechas con su formato fijo: un trozo no puede inferir otro (01-02 es 1 de febrero)."""
+    raw = pd.read_csv(fixtures_path / "lamine_raw_sample.csv", dtype=str).head(3)
+    raw["Date"] = ["2024-01-02", "02/01/2024", None]
+    fechas = transform_fbref(raw, get_player("lamine"))["Date"]
+    assert fechas.iloc[0] == pd.Timestamp(2024, 1, 2)
+    assert fechas.iloc[1:].isna().all()
+    raw = pd.read_csv(fixtures_path / "messi_raw_sample.csv", dtype=str).head(2)
+    raw["Date"] = ["01-02-2024", "13-02-2024"]
+    fechas = transform_messistats(raw, get_player("messi"))["Date"]
+    assert fechas.tolist() == [pd.Timestamp(2024, 2, 1), pd.Timestamp(2024, 2, 13)]
+
+# -------------------- INCREMENTAL Y STREAMING --------------------
+# Los modos incremental y por trozos deben dejar exactamente el dataset del proceso completo.
+
+def _full(player_id, raw_path, output):
+    process_player(player_id, raw_path, output, return_df=False)
+    return output
+
+def _assert_same_dataset(path, expected):
+    assert path.read_text(encoding="utf-8") == expected.read_text(encoding="utf-8")
+    pd.testing.assert_frame_equal(read_dataset(path, fmt="parquet"), read_dataset(expected, fmt="parquet"))
+
+@pytest.mark.parametrize("player_id", ["messi", "lamine"])
+def test_incremental_append_matches_full(player_id, tmp_path):
+    raw = pd.read_csv(fixtures_path / f"{player_id}_raw_synthetic.csv", dtype=str, keep_default_na=False)
+    raw_path, output = tmp_path / "raw.csv", tmp_path / "out" / "cleaned.csv"
+    raw.iloc[:150].to_csv(raw_path, index=False)
+    process_player(player_id, raw_path, output, return_df=False, incremental=True)
+    raw.to_csv(raw_path, index=False)
+    new = process_player(player_id, raw_path, output, incremental=True)
+    assert len(new) == len(raw) - 150
+    _assert_same_dataset(output, _full(player_id, raw_path, tmp_path / "full" / "cleaned.csv"))
+
+def test_incremental_rewrite_only_transforms_changed_rows(tmp_path):
+    raw = pd.read_csv(fixtures_path / "messi_raw_synthetic.csv", dtype=str, keep_default_na=False)
+    raw_path, output = tmp_path / "raw.csv", tmp_path / "out" / "cleaned.csv"
+    raw.to_csv(raw_path, index=False)
+    process_player("messi", raw_path, output, return_df=False, incremental=True)
+    raw.loc[10, "Goals"] = "4"
+    raw = raw.drop(index=20)
+    raw.to_csv(raw_path, index=False)
+    new = process_player("messi", raw_path, output, incremental=True)
+    assert new["Goals"].tolist() == [4]
+    _assert_same_dataset(output, _full("messi", raw_path, tmp_path / "full" / "cleaned.csv"))
+
+@pytest.mark.parametrize("player_id", ["messi", "lamine"])
+def test_stream_matches_full(player_id, tmp_path):
+    raw_path = fixtures_path / f"{player_id}_raw_synthetic.csv"
+    output = tmp_path / "out" / "cleaned.csv"
+    assert process_player(player_id, raw_path, output, stream=True, chunk_rows=37) is None
+    _assert_same_dataset(output, _full(player_id, raw_path, tmp_path / "full" / "cleaned.csv"))
+
+def test_stream_dedup_keeps_last_version(tmp_path):
+    raw = pd.read_csv(fixtures_path / "messi_raw_synthetic.csv", dtype=str, keep_default_na=False)
+    repetidos = raw.iloc[:30].assign(Goals="5")
+    raw_path = tmp_path / "raw.csv"
+    pd.concat([raw, repetidos]).to_csv(raw_path, index=False)
+    output = tmp_path / "out" / "cleaned.csv"
+    process_player("messi", raw_path, output, stream=True, chunk_rows=50, dedup=True)
+    df = pd.read_csv(output, decimal=",")
+    assert len(df) == len(raw)
+    assert (df.tail(30)["Goals"] == 5).all()
+
+def test_invalid_mode_combinations(tmp_path):
+    raw_path = fixtures_path / "messi_raw_sample.csv"
+    with pytest.raises(ValueError):
+        process_player("messi", raw_path, tmp_path / "x.csv", stream=True, incremental=True)
+    with pytest.raises(ValueError):
+        process_player("messi", raw_path, tmp_path / "x.csv", dedup=True)
+
+def test_incremental_rebuilds_when_learned_aliases_change(tmp_path, capsys):
+    """Editar o borrar aliases_learned.json cambia nombres ya procesados: el incremental reconstruye."""
+    import normalization
+
+    raw_path, output = fixtures_path / "lamine_raw_synthetic.csv", tmp_path / "cleaned.csv"
+    process_player("lamine", raw_path, output, return_df=False, incremental=True)
+    capsys.readouterr()
+    process_player("lamine", raw_path, output, return_df=False, incremental=True)
+    assert "reconstrucción completa" not in capsys.readouterr().out
+    normalization.learned_path.write_text(json.dumps(normalization._read_learned() | {"teams": {"x": "FC Barcelona"}}))
+    process_player("lamine", raw_path, output, return_df=False, incremental=True)
+    assert "reconstrucción completa" in capsys.readouterr().out
@@ -0,0 +1,60 @@
+# test_rolling.py — Ventanas móviles, rachas y curvas de carrera frente a pandas rolling / cumsum
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import rolling
+from players import get_player
+from rolling import ROLLING_COLUMNS, load_rolling, rolling_days, rolling_metrics, streaks
+from storage import read_dataset
+
+def _matches():
+    return pd.DataFrame({
+        "Date": pd.to_datetime(["2021-01-01", "2021-01-05", "2021-01-20", "2021-02-10", None, "2021-01-03", "2021-01-04"]),
+        "Player": ["A", "A", "A", "A", "A", "B", "B"],
+        "Goals": [1, 2, 0, 1, 5, 1, 1],
+        "Assists": [0, 1, 1, 0, 0, 0, 0],
+        "Minutes": [90, 90, 90, 90, 90, 90, 90],
+    })
+
+def test_small_example():
+    result = rolling_metrics(_matches(), match_windows=(2,), day_windows=(30,))
+    a = result[result["Player"] == "A"]
+    # El partido sin fecha se descarta y cada jugador tiene su propio tramo
+    assert len(result) == 6
+    assert a["Goals_last2"].tolist() == [1, 3, 2, 1]
+    assert a["Goals_30d"].tolist() == [1, 3, 3, 1]
+    assert a["Career_Goals"].tolist() == [1, 3, 3, 4]
+    assert a["Scoring_Streak"].tolist() == [1, 2, 0, 1]
+    assert a["Scoreless_Run"].tolist() == [0, 0, 1, 0]
+    assert a["Assist_Streak"].tolist() == [0, 1, 2, 0]
+    assert result[result["Player"] == "B"]["Career_Matches"].tolist() == [1, 2]
+
+def test_matches_pandas_rolling(project_data):
+    df = pd.concat([read_dataset(get_player(p)["cleaned_path"], columns=ROLLING_COLUMNS) for p in ["messi", "lamine"]], ignore_index=True)
+    result = rolling_metrics(df, match_windows=(5,), day_windows=(30,))
+    expected = df[df["Date"].notna()].assign(Player=lambda d: d["Player"].astype(str))
+    expected = expected.sort_values(["Player", "Date"], kind="stable").reset_index(drop=True)
+    by_player = expected.groupby("Player")
+    for m in ["Goals", "Minutes"]:
+        assert np.array_equal(result[f"{m}_last5"], by_player[m].transform(lambda s: s.fillna(0).rolling(5, min_periods=1).sum()))
+        assert np.array_equal(result[f"Career_{m}"], by_player[m].transform(lambda s: s.fillna(0).cumsum()))
+        days = expected.set_index("Date").groupby("Player")[m].transform(lambda s: s.fillna(0).rolling("30D").sum())
+        assert np.array_equal(result[f"{m}_30d"], days.to_numpy())
+
+def test_streaks():
+    result = streaks(_matches(), "Goals")
+    assert result[["Player", "Matches", "Goals"]].values.tolist() == [["A", 2, 3], ["B", 2, 2], ["A", 1, 1]]
+    sequias = streaks(_matches(), "Goals", scoring=False)
+    assert sequias[["Player", "Matches"]].values.tolist() == [["A", 1]]
+    assert len(streaks(_matches(), "Goals", min_length=2, top=1)) == 1
+
+def test_day_window_limit():
+    with pytest.raises(ValueError):
+        rolling_days(np.zeros(3), np.arange(3), rolling.MAX_WINDOW_DAYS + 1)
+
+def test_load_rolling_is_cached(project_data):
+    first = load_rolling("lamine")
+    assert len(list(rolling.rolling_path.glob("lamine_*.parquet"))) == 1
+    pd.testing.assert_frame_equal(load_rolling("lamine"), first)
@@ -0,0 +1,93 @@
+# test_service.py — Servicio de consultas: respuestas frente a filtrar el dataset con pandas, errores, caché y recarga
+
+import json
+import threading
+import urllib.request
+
+import pandas as pd
+import pytest
+
+import service
+from players import get_player
+from service import answer, load_store, make_server
+from storage import read_dataset
+
+@pytest.fixture
+def state(project_data):
+    return service._new_state(["messi", "lamine"])
+
+def _get(state, path, query=""):
+    status, body = answer(state, path, query)
+    return status, json.loads(body)
+
+def _cleaned(player_id):
+    return read_dataset(get_player(player_id)["cleaned_path"]).astype({"Season": object, "Competition": object})
+
+def test_totals_match_pandas(state):
+    df = _cleaned("messi")
+    df = df[(df["Season"] == df["Season"].iloc[0]) & (df["Home/Away"] == "Home")]
+    status, body = _get(state, "/totals", f"player=messi&season={df['Season'].iloc[0]}&venue=Home")
+    assert status == 200
+    assert body == {"matches": len(df), "goals": df["Goals"].sum(), "assists": df["Assists"].sum(),
+                    "minutes": df["Minutes"].sum(), "cards": df["Cards"].sum()}
+
+def test_date_range_excludes_undated_matches(state):
+    df = _cleaned("lamine")
+    desde = df["Date"].dropna().iloc[len(df) // 2]
+    _, body = _get(state, "/totals", f"player=lamine&from={desde:%Y-%m-%d}")
+    assert body["matches"] == (df["Date"] >= desde).sum()
+
+def test_breakdown_sort_and_limit(state):
+    df = _cleaned("lamine")
+    expected = df.groupby("Competition")["Goals"].sum().sort_values(ascending=False)
+    _, body = _get(state, "/breakdown", "player=lamine&by=competition&sort=goals&limit=2")
+    assert [(e["competition"], e["goals"]) for e in body] == list(expected.head(2).items())
+    _, body = _get(state, "/breakdown", "player=lamine&by=season")
+    assert sum(e["matches"] for e in body) == len(df)
+    # limit=0 es una lista vacía, no "sin límite"
+    assert _get(state, "/breakdown", "player=lamine&by=season&limit=0") == (200, [])
+
+def test_compare_and_age(state):
+    _, body = _get(state, "/compare", "player=messi&player=lamine")
+    assert set(body) == {"messi", "lamine"}
+    assert body["lamine"]["goals_per_90"] == round(body["lamine"]["goals"] / body["lamine"]["minutes"] * 90, 3)
+    _, body = _get(state, "/age", "player=lamine&age=17")
+    fecha = pd.Timestamp(get_player("lamine")["birthdate"]) + pd.DateOffset(years=17)
+    assert body["lamine"]["matches"] == (_cleaned("lamine")["Date"] <= fecha).sum()
+
+@pytest.mark.parametrize("path, query, status", [
+    ("/nada", "", 404),
+    ("/totals", "player=ronaldinho", 404),
+    ("/breakdown", "by=planeta", 400),
+    ("/breakdown", "sort=altura", 400),
+    ("/totals", "from=ayer", 400),
+    ("/age", "", 400),
+    ("/breakdown", "limit=-1", 400),
+    ("/breakdown", "limit=dos", 400),
+])
+def test_errors(state, path, query, status):
+    assert answer(state, path, query)[0] == status
+
+def test_cache_and_reload(state, monkeypatch):
+    monkeypatch.setattr(service, "RELOAD_CHECK_SECONDS", 0)
+    _get(state, "/totals", "player=messi")
+    _get(state, "/totals", "player=messi")
+    assert (state["hits"], state["misses"]) == (1, 1)
+
+    # Reprocesar un jugador cambia la firma: se recarga el almacén y se descarta la caché
+    path = get_player("messi")["cleaned_path"].with_suffix(".parquet")
+    read_dataset(path).iloc[:10].to_parquet(path)
+    _, body = _get(state, "/totals", "player=messi")
+    assert body["matches"] == 10
+    assert state["reloads"] == 1
+
+def test_http_server(project_data):
+    server = make_server(port=0, store=load_store(["lamine"]))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/players") as response:
+            assert response.headers["Content-Type"] == "application/json; charset=utf-8"
+            assert json.load(response)[0]["id"] == "lamine"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,54 @@
+# test_stats.py — Bootstrap y permutaciones: métricas, reproducibilidad con cualquier número de procesos y batería completa
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stats
+from stats import SHARD_RESAMPLES, bootstrap, compare, metric_arrays, observed, p_value, percentile_ci, permutation_diffs, run_tests
+
+def _matches(goals, minutes):
+    return pd.DataFrame({"Goals": goals, "Assists": 0, "Minutes": minutes})
+
+def test_metrics_only_count_played_matches():
+    df = _matches([1, 2, 5, None], [90, 45, 0, 90])
+    num, den = metric_arrays(df, "goals_per_90")
+    assert num.tolist() == [1, 2, 0] and den.tolist() == [90, 45, 90]
+    assert observed(num, den, 90) == pytest.approx(3 / 225 * 90)
+    num, den = metric_arrays(df, "minutes_per_match")
+    assert den is None and observed(num, den, 1) == 75
+
+def test_bootstrap_ci_contains_observed():
+    rng = np.random.default_rng(0)
+    a = metric_arrays(_matches(rng.poisson(0.8, 300), rng.integers(1, 91, 300)), "goals_per_90")
+    samples = bootstrap([a], 90, n_resamples=2_000)
+    low, high = percentile_ci(samples[0])
+    assert low < observed(*a, 90) < high
+
+def test_same_result_with_any_number_of_processes():
+    rng = np.random.default_rng(1)
+    a = (rng.poisson(1, 50).astype(float), None)
+    b = (rng.poisson(1, 60).astype(float), None)
+    n = SHARD_RESAMPLES + 100
+    assert np.array_equal(bootstrap([a, b], n_resamples=n, label="x"), bootstrap([a, b], n_resamples=n, label="x", n_jobs=2))
+    assert np.array_equal(permutation_diffs(a, b, n_resamples=n, label="x"), permutation_diffs(a, b, n_resamples=n, label="x", n_jobs=2))
+    assert not np.array_equal(bootstrap([a], n_resamples=100, label="x"), bootstrap([a], n_resamples=100, label="y"))
+
+def test_permutation_test():
+    rng = np.random.default_rng(2)
+    iguales = _matches(rng.poisson(1, 200), 90), _matches(rng.poisson(1, 200), 90)
+    distintos = _matches(rng.poisson(2, 200), 90), _matches(rng.poisson(0.5, 200), 90)
+    assert not compare(*iguales, "goals_per_90", n_resamples=2_000)["significant"]
+    result = compare(*distintos, "goals_per_90", n_resamples=2_000)
+    assert result["significant"] and result["ci_diff_low"] > 0
+    assert p_value(np.zeros(9), 1.0) == 0.1
+
+def test_compare_without_matches():
+    assert compare(_matches([], []), _matches([1], [90]), "goals_per_90") == {"metric": "goals_per_90", "n_a": 0, "n_b": 1}
+
+def test_run_tests_battery(project_data):
+    results = run_tests(n_resamples=200, output_path=stats.results_path)
+    tests = set(results["test"])
+    assert {"home_away:Leo Messi", "lineup:Lamine Yamal"} <= tests
+    assert any(t.startswith("same_age_") for t in tests)
+    assert len(pd.read_csv(stats.results_path, decimal=",")) == len(results)
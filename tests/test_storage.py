@@ -0,0 +1,81 @@
+# test_storage.py — Esquema compacto (códigos globales, números estrechos) y datasets en CSV / Parquet / Arrow
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import schema
+from schema import apply_schema, downcast_numbers, encode_categories, fixed_types, load_code_table, numeric_dtypes, numeric_stats
+from storage import dataset_path, read_dataset, remove_other_formats, stored_format, write_dataset
+
+def _cleaned(n=6):
+    return pd.DataFrame({
+        "Date": pd.date_range("2020-08-01", periods=n, freq="7D").strftime("%Y-%m-%d"),
+        "Season": "2020-2021",
+        "Age": ["33,10"] * n,
+        "Player": "Leo Messi",
+        "Competition": ["La Liga", "Copa del Rey"] * (n // 2),
+        "Home/Away": ["Home", "Away"] * (n // 2),
+        "Minutes": [90, 45, 90, 12, 90, 90][:n],
+        "Goals": [1, 0, 2, 0, 0, 3][:n],
+        "Assists": [0] * n,
+        "Cards": [0, 1, 0, 0, 0, 0][:n],
+    })
+
+# -------------------- SCHEMA --------------------
+
+def test_codes_are_stable_and_shared():
+    apply_schema(pd.DataFrame({"Competition": ["La Liga", "Copa del Rey"]}))
+    df = apply_schema(pd.DataFrame({"Competition": ["UEFA Euro", "La Liga"]}))
+    assert load_code_table()["Competition"] == ["La Liga", "Copa del Rey", "UEFA Euro"]
+    assert df["Competition"].cat.codes.tolist() == [2, 0]
+
+def test_encode_without_update_leaves_table_untouched():
+    df = encode_categories(pd.DataFrame({"Lineup": ["Starter", "Substitute"]}))
+    assert df["Lineup"].tolist() == ["Starter", "Substitute"]
+    assert not schema.codes_path.exists()
+
+def test_downcast_numbers():
+    df = downcast_numbers(pd.DataFrame({"Goals": [0, 3], "Minutes": [90, 1200], "Cards": [1, None]}))
+    assert df["Goals"].dtype == np.int8
+    assert df["Minutes"].dtype == np.int16
+    assert df["Cards"].dtype == np.float32
+
+def test_fixed_types_match_whole_file():
+    """Tipos de todo el fichero aunque un trozo solo tenga valores pequeños."""
+    chunks = [pd.DataFrame({"Minutes": [1, 2], "Goals": [0, 1]}), pd.DataFrame({"Minutes": [90, 1000], "Goals": [1, None]})]
+    dtypes = numeric_dtypes([numeric_stats(c) for c in chunks])
+    assert dtypes == {"Minutes": np.int16, "Goals": np.float32}
+    first = fixed_types(chunks[0], {}, dtypes)
+    assert (first["Minutes"].dtype, first["Goals"].dtype) == (np.int16, np.float32)
+
+# -------------------- FORMATOS --------------------
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "arrow"])
+def test_roundtrip_has_real_types(fmt, tmp_path):
+    base = tmp_path / "messi_cleaned_data.csv"
+    write_dataset(_cleaned(), base, formats=(fmt,))
+    df = read_dataset(base)
+    assert stored_format(base) == fmt
+    assert pd.api.types.is_datetime64_any_dtype(df["Date"])
+    assert df["Age"].tolist() == [33.1] * 6
+    assert isinstance(df["Competition"].dtype, pd.CategoricalDtype)
+    assert df["Goals"].tolist() == [1, 0, 2, 0, 0, 3]
+
+def test_read_projection(tmp_path):
+    base = tmp_path / "messi_cleaned_data.csv"
+    write_dataset(_cleaned(), base, formats=("parquet",))
+    assert list(read_dataset(base, columns=["Goals", "Season"]).columns) == ["Goals", "Season"]
+
+def test_read_preference_and_stale_formats(tmp_path):
+    base = tmp_path / "messi_cleaned_data.csv"
+    write_dataset(_cleaned(), base, formats=("csv", "parquet", "arrow"))
+    assert stored_format(base) == "arrow"
+    assert remove_other_formats(base, ("csv", "parquet")) == [dataset_path(base, "arrow")]
+    assert stored_format(base) == "parquet"
+
+def test_missing_and_unknown_formats(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        stored_format(tmp_path / "nada.csv")
+    with pytest.raises(ValueError):
+        write_dataset(_cleaned(), tmp_path / "x.csv", formats=("xlsx",))